@@ -0,0 +1,167 @@
+import math
+
+import numpy as np
+
+from constants import *
+from world import Controls
+
+# Optimal trim in closed form. With the relative wind w (0 = from the bow,
+# clockwise) and the boom deflection d, Boat.update's sail term is
+#   sin(AoA) * sin(boom angle) = sin(w - d - 180) * sin(180 + d) = sin(w - d) * sin(d)
+#                              = (cos(w - 2d) - cos(w)) / 2
+# and the hull term does not depend on d, so thrust is maximal at d = w / 2,
+# with w taken in [-180, 180) (which also puts the boom on the side the automatic
+# gybe picks) and d limited to the boom's range.
+
+
+def angle_difference(a, b):
+    # Signed smallest difference a - b in degrees, in [-180, 180)
+    return (a - b + 180) % 360 - 180
+
+
+def bearing_to(x, y, target_x, target_y):
+    # Heading (0 = North, clockwise) from (x, y) to the target, with Pygame's inverted Y
+    return math.degrees(math.atan2(target_x - x, -(target_y - y))) % 360
+
+
+def optimal_deflection(relative_wind, max_deflection=BOOM_MAX_ANGLE_ADJUST):
+    # Thrust-maximizing boom deflection for a relative wind angle (scalar or NumPy array)
+    return np.clip(angle_difference(relative_wind, 0) / 2, -max_deflection, max_deflection)
+
+
+class TrimTable:
+    # optimal_deflection() memoized per quantized relative wind angle, as a Python
+    # list for single boats and a NumPy array for fleets
+    def __init__(self, resolution=AUTOPILOT_WIND_RESOLUTION, max_deflection=BOOM_MAX_ANGLE_ADJUST):
+        self.resolution = resolution
+        self.max_deflection = max_deflection
+        self.steps = int(round(360 / resolution))
+        self.table = optimal_deflection(np.arange(self.steps) * resolution, max_deflection)
+        self._list = self.table.tolist()
+
+    def deflection(self, relative_wind):
+        return self._list[int(round(relative_wind / self.resolution)) % self.steps]
+
+    def deflections(self, relative_wind):
+        return self.table[np.rint(np.asarray(relative_wind) / self.resolution).astype(np.int64) % self.steps]
+
+
+_trim_tables = {}
+
+
+def get_trim_table(resolution=AUTOPILOT_WIND_RESOLUTION, max_deflection=BOOM_MAX_ANGLE_ADJUST):
+    # One table per resolution and boom range, shared by every autopilot
+    key = (resolution, max_deflection)
+    table = _trim_tables.get(key)
+    if table is None:
+        table = _trim_tables[key] = TrimTable(resolution, max_deflection)
+    return table
+
+
+class Autopilot:
+    # Controls for World.tick: optimal trim, plus steering to a fixed heading or,
+    # with heading=None, around the course: to a point before the next gate, then
+    # through it, beating upwind on alternate tacks.
+    APPROACH_DISTANCE = 60 # How far before/after a gate the pilot aims
+    WAYPOINT_REACHED = 25
+
+    def __init__(self, heading=None, no_go=AUTOPILOT_NO_GO, trim_table=None):
+        self.heading = heading
+        self.no_go = no_go
+        self.trim_table = trim_table or get_trim_table()
+        self.through_gate = False
+        self.tack = 1
+        self.gates_done = 0
+
+    def target(self, world):
+        for gate in world.gates:
+            if gate.attempted_or_scored:
+                continue
+            if not self.through_gate:
+                point = gate.center - gate.passage_direction_vec * self.APPROACH_DISTANCE
+                if point.distance_to((world.boat.x, world.boat.y)) > self.WAYPOINT_REACHED:
+                    return point
+                self.through_gate = True
+            return gate.center + gate.passage_direction_vec * self.APPROACH_DISTANCE
+        return None
+
+    def steer(self, world, heading_wanted):
+        boat = world.boat
+        # Upwind of the no-go angle: sail close-hauled on the current tack,
+        # switching only once the target is clearly on the other side
+        off_wind = angle_difference(heading_wanted, world.wind_direction)
+        if abs(off_wind) < self.no_go:
+            if off_wind * self.tack < -self.no_go / 4:
+                self.tack = -self.tack
+            heading_wanted = world.wind_direction + self.tack * self.no_go
+        error = angle_difference(heading_wanted, boat.angle)
+        if abs(error) < BOAT_TURN_SPEED / 2:
+            return 0
+        return 1 if error > 0 else -1
+
+    def trim_boom(self, world):
+        # Boom control moving the deflection towards the optimum, one BOOM_ADJUST_SPEED step per tick
+        boat = world.boat
+        wanted = abs(self.trim_table.deflection((world.wind_direction - boat.angle) % 360))
+        magnitude = abs(boat.boom_deflection_from_aft)
+        if abs(wanted - magnitude) < BOOM_ADJUST_SPEED / 2 or boat.boom_deflection_from_aft == 0:
+            return 0
+        side = 1 if boat.boom_deflection_from_aft > 0 else -1
+        return side if wanted > magnitude else -side
+
+    def course_heading(self, world):
+        # Heading to the next waypoint, or None once every gate is done
+        done = sum(gate.attempted_or_scored for gate in world.gates)
+        if done != self.gates_done:
+            self.gates_done = done
+            self.through_gate = False
+        target = self.target(world)
+        if target is None:
+            return None
+        return bearing_to(world.boat.x, world.boat.y, target.x, target.y)
+
+    def __call__(self, world):
+        heading = self.heading if self.heading is not None else self.course_heading(world)
+        if heading is None:
+            return Controls()
+        return Controls(turn=self.steer(world, heading), boom=self.trim_boom(world))
+
+
+class FleetAutopilot:
+    # The same pilot for every boat of a Fleet at once: per-boat turn and boom
+    # controls from array operations and one trim table lookup per boat.
+    def __init__(self, n, no_go=AUTOPILOT_NO_GO, trim_table=None):
+        self.no_go = no_go
+        self.trim_table = trim_table or get_trim_table()
+        self.tack = np.ones(n)
+
+    def trim_controls(self, fleet, wind_direction):
+        wanted = np.abs(self.trim_table.deflections((wind_direction - fleet.angle) % 360))
+        deflection = fleet.boom_deflection_from_aft
+        magnitude = np.abs(deflection)
+        hold = (np.abs(wanted - magnitude) < BOOM_ADJUST_SPEED / 2) | (deflection == 0)
+        return np.where(hold, 0, np.sign(deflection) * np.where(wanted > magnitude, 1, -1)).astype(np.int64)
+
+    def steer_controls(self, fleet, wind_direction, headings):
+        headings = np.asarray(headings, dtype=float)
+        off_wind = angle_difference(headings, wind_direction)
+        upwind = np.abs(off_wind) < self.no_go
+        self.tack = np.where(upwind & (off_wind * self.tack < -self.no_go / 4), -self.tack, self.tack)
+        headings = np.where(upwind, wind_direction + self.tack * self.no_go, headings)
+        error = angle_difference(headings, fleet.angle)
+        return np.where(np.abs(error) < BOAT_TURN_SPEED / 2, 0, np.sign(error)).astype(np.int64)
+
+    def headings_to(self, fleet, target_x, target_y):
+        return np.degrees(np.arctan2(target_x - fleet.x, -(target_y - fleet.y))) % 360
+
+    def apply(self, fleet, wind_direction, headings=None):
+        # Applies the controls to the fleet (steering only with headings) and returns them
+        turn = np.zeros(fleet.n, dtype=np.int64) if headings is None else self.steer_controls(fleet, wind_direction, headings)
+        boom = self.trim_controls(fleet, wind_direction)
+        fleet.rotate(turn * BOAT_TURN_SPEED)
+        fleet.adjust_boom(boom * BOOM_ADJUST_SPEED)
+        return turn, boom
+
+    def snap_trim(self, fleet, wind_direction):
+        # Fast-forward: put every boom straight at its optimum instead of easing it there
+        fleet.boom_deflection_from_aft = self.trim_table.deflections((wind_direction - fleet.angle) % 360)
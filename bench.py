@@ -0,0 +1,272 @@
+import argparse
+import cProfile
+import json
+import math
+import os
+import platform
+import pstats
+import random
+import sys
+import time
+
+# Render benchmarks draw to offscreen surfaces: no window is needed
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from boat import Boat
+from constants import *
+from fleet import Fleet
+from gate import Gate
+from hud import draw_wind_indicator
+from spatial import GateIndex
+from world import Controls, World
+
+# Micro-benchmarks of the per-frame hot paths, each measured on its own with
+# many boats and gates. Every benchmark is a list of calls run once per "step";
+# each call is timed separately for the latency percentiles.
+#
+#   python bench.py                         run everything and print the table
+#   python bench.py --save                  ... and store the results as the baseline
+#   python bench.py --compare               ... and fail if slower than the baseline
+#   python bench.py --profile boat_draw     cProfile one benchmark
+
+BENCH_BASELINE = 'bench_baseline.json'
+BENCH_TOLERANCE = 0.15 # Allowed slowdown of the median call before --compare fails
+BENCH_SEED = 1234
+
+
+def random_boats(rng, n):
+    boats = []
+    for _ in range(n):
+        boat = Boat(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT))
+        boat.angle = rng.uniform(0, 360)
+        boat.speed = rng.uniform(0, BOAT_MAX_SPEED)
+        boat.boom_deflection_from_aft = rng.uniform(-BOOM_MAX_ANGLE_ADJUST, BOOM_MAX_ANGLE_ADJUST)
+        boats.append(boat)
+    return boats
+
+
+def random_gates(rng, n, swept):
+    return [Gate(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT), rng.uniform(60, 150),
+                 rng.uniform(0, 360), verbose=False, swept=swept)
+            for _ in range(n)]
+
+
+def random_moves(rng, n):
+    # (prev, curr) positions of boats sailing at up to twice the max speed
+    moves = []
+    for _ in range(n):
+        x, y = rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT)
+        heading = math.radians(rng.uniform(0, 360))
+        distance = rng.uniform(0, 2 * BOAT_MAX_SPEED)
+        moves.append(((x, y), (x + distance * math.sin(heading), y - distance * math.cos(heading))))
+    return moves
+
+
+# Each setup function returns the list of calls making up one step
+
+def bench_boat_update(rng, n_boats, n_gates):
+    boats = random_boats(rng, n_boats)
+    return [lambda boat=boat: boat.update(WIND_DIRECTION, WIND_SPEED) for boat in boats]
+
+
+def bench_fleet_update(rng, n_boats, n_gates):
+    fleet = Fleet.from_boats(random_boats(rng, n_boats))
+    return [lambda: fleet.update(WIND_DIRECTION, WIND_SPEED)]
+
+
+def bench_boat_draw(rng, n_boats, n_gates):
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    boats = random_boats(rng, n_boats)
+
+    def draw(boat):
+        boat.rotate(BOAT_TURN_SPEED) # A new heading every call, as when steering
+        boat.draw(surface)
+    return [lambda boat=boat: draw(boat) for boat in boats]
+
+
+def _gate_calls(rng, n_boats, n_gates, swept):
+    gates = random_gates(rng, n_gates, swept)
+    moves = random_moves(rng, n_boats)
+
+    def check(gate, prev, curr):
+        gate.attempted_or_scored = False # Keep every gate live
+        gate.check_passage(prev, curr)
+    return [lambda gate=gate, prev=prev, curr=curr: check(gate, prev, curr)
+            for prev, curr in moves for gate in gates]
+
+
+def bench_gate_check_passage(rng, n_boats, n_gates):
+    return _gate_calls(rng, n_boats, n_gates, swept=False)
+
+
+def bench_gate_check_passage_swept(rng, n_boats, n_gates):
+    return _gate_calls(rng, n_boats, n_gates, swept=True)
+
+
+def bench_gate_index_check_passages(rng, n_boats, n_gates):
+    index = GateIndex(random_gates(rng, n_gates, swept=True))
+    moves = np.array(random_moves(rng, n_boats))
+    attempted = np.zeros((n_boats, n_gates), dtype=bool)
+
+    def check():
+        attempted[:] = False
+        index.check_passages(moves[:, 0, 0], moves[:, 0, 1], moves[:, 1, 0], moves[:, 1, 1], attempted)
+    return [check]
+
+
+def bench_wind_indicator(rng, n_boats, n_gates):
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    angles = [(rng.uniform(0, 360), rng.uniform(0, 360)) for _ in range(n_boats)]
+    return [lambda wind=wind, heading=heading: draw_wind_indicator(surface, wind, WIND_SPEED, heading)
+            for wind, heading in angles]
+
+
+def bench_world_tick(rng, n_boats, n_gates):
+    world = World()
+    controls = [Controls(turn=rng.choice((-1, 0, 1)), boom=rng.choice((-1, 0, 1))) for _ in range(n_boats)]
+    return [lambda c=c: world.tick(c) for c in controls]
+
+
+BENCHMARKS = {
+    'boat_update': bench_boat_update,
+    'fleet_update': bench_fleet_update,
+    'boat_draw': bench_boat_draw,
+    'gate_check_passage': bench_gate_check_passage,
+    'gate_check_passage_swept': bench_gate_check_passage_swept,
+    'gate_index_check_passages': bench_gate_index_check_passages,
+    'wind_indicator': bench_wind_indicator,
+    'world_tick': bench_world_tick,
+}
+
+
+def run_benchmark(name, n_boats, n_gates, steps, warmup=1):
+    calls = BENCHMARKS[name](random.Random(BENCH_SEED), n_boats, n_gates)
+    for _ in range(warmup):
+        for call in calls:
+            call()
+
+    clock = time.perf_counter_ns
+    latencies = []
+    step_times = []
+    for _ in range(steps):
+        step_start = clock()
+        for call in calls:
+            start = clock()
+            call()
+            latencies.append(clock() - start)
+        step_times.append(clock() - step_start)
+
+    latencies = np.array(latencies) / 1000.0 # microseconds
+    return {
+        'calls_per_step': len(calls),
+        'calls': len(latencies),
+        'mean_us': float(latencies.mean()),
+        'p50_us': float(np.percentile(latencies, 50)),
+        'p90_us': float(np.percentile(latencies, 90)),
+        'p99_us': float(np.percentile(latencies, 99)),
+        'max_us': float(latencies.max()),
+        'calls_per_sec': float(1e6 / latencies.mean()),
+        'steps_per_sec': float(1e9 / np.median(step_times)),
+    }
+
+
+def run_suite(names, n_boats, n_gates, steps):
+    results = {}
+    for name in names:
+        results[name] = run_benchmark(name, n_boats, n_gates, steps)
+        print_result(name, results[name])
+    return {
+        'config': {'boats': n_boats, 'gates': n_gates, 'steps': steps},
+        'machine': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+        },
+        'results': results,
+    }
+
+
+def print_header():
+    print(f"{'benchmark':<28}{'calls':>8}{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}{'max us':>10}"
+          f"{'calls/s':>12}{'steps/s':>10}")
+
+
+def print_result(name, r):
+    print(f"{name:<28}{r['calls']:>8}{r['p50_us']:>10.2f}{r['p90_us']:>10.2f}{r['p99_us']:>10.2f}"
+          f"{r['max_us']:>10.1f}{r['calls_per_sec']:>12.0f}{r['steps_per_sec']:>10.1f}")
+
+
+def compare(current, baseline, tolerance=BENCH_TOLERANCE):
+    # Returns the benchmarks whose median call time regressed by more than the tolerance
+    if current['config'] != baseline['config']:
+        print(f"Warning: baseline was run with {baseline['config']}, not {current['config']}")
+    regressions = []
+    for name, r in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        ratio = r['p50_us'] / baseline['results'][name]['p50_us']
+        flag = 'REGRESSION' if ratio > 1 + tolerance else ''
+        print(f"{name:<28}{baseline['results'][name]['p50_us']:>10.2f} -> {r['p50_us']:>8.2f} us  x{ratio:.2f}  {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def profile(name, n_boats, n_gates, steps, top=25):
+    calls = BENCHMARKS[name](random.Random(BENCH_SEED), n_boats, n_gates)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(steps):
+        for call in calls:
+            call()
+    profiler.disable()
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hot path benchmarks")
+    parser.add_argument('benchmarks', nargs='*', help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--boats', type=int, default=200)
+    parser.add_argument('--gates', type=int, default=20)
+    parser.add_argument('--steps', type=int, default=30, help="steps timed per benchmark")
+    parser.add_argument('--baseline', default=BENCH_BASELINE)
+    parser.add_argument('--save', action='store_true', help="store the results as the new baseline")
+    parser.add_argument('--compare', action='store_true', help="exit with 1 when a benchmark is slower than the baseline")
+    parser.add_argument('--tolerance', type=float, default=BENCH_TOLERANCE)
+    parser.add_argument('--profile', metavar='BENCHMARK', choices=list(BENCHMARKS), help="profile one benchmark instead")
+    args = parser.parse_args(argv)
+
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name}")
+    pygame.init()
+    pygame.display.set_mode((1, 1)) # Some surface conversions need a display, even a dummy one
+
+    if args.profile:
+        profile(args.profile, args.boats, args.gates, args.steps)
+        return 0
+
+    print_header()
+    current = run_suite(args.benchmarks or list(BENCHMARKS), args.boats, args.gates, args.steps)
+    status = 0
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            status = 1
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
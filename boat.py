@@ -0,0 +1,344 @@
+import pygame
+import math
+
+from constants import *
+from sprites import get_rotation_cache
+
+
+def draw_hull_image():
+    # Calculate dimensions for the image surface including rudder
+    rudder_visual_extension = BOAT_LENGTH * RUDDER_VISUAL_EXTENSION_RATIO
+    image_total_height = BOAT_LENGTH + rudder_visual_extension
+
+    # Create a more realistic boat shape
+    image = pygame.Surface([BOAT_WIDTH, image_total_height], pygame.SRCALPHA)
+    
+    # Hull shape (polygon points) - (x, y) from top-left
+    hull_points = [
+        (BOAT_WIDTH / 2, 0),  # Bow (pointe avant)
+        (BOAT_WIDTH, BOAT_LENGTH * 0.7),  # Stern starboard corner (coin arrière tribord)
+        (BOAT_WIDTH * 0.75, BOAT_LENGTH), # Stern center-starboard
+        (BOAT_WIDTH * 0.25, BOAT_LENGTH), # Stern center-port
+        (0, BOAT_LENGTH * 0.7)  # Stern port corner (coin arrière bâbord)
+    ]
+    pygame.draw.polygon(image, GREEN, hull_points) # Hull color
+
+    # Rudder shape (polygon points)
+    rudder_actual_width = BOAT_WIDTH * RUDDER_WIDTH_RATIO
+    rudder_points = [
+        (BOAT_WIDTH / 2 - rudder_actual_width / 2, BOAT_LENGTH), # Top-left of rudder
+        (BOAT_WIDTH / 2 + rudder_actual_width / 2, BOAT_LENGTH), # Top-right of rudder
+        (BOAT_WIDTH / 2 + rudder_actual_width / 2, image_total_height), # Bottom-right of rudder
+        (BOAT_WIDTH / 2 - rudder_actual_width / 2, image_total_height)  # Bottom-left of rudder
+    ]
+    pygame.draw.polygon(image, RUDDER_COLOR, rudder_points)
+    pygame.draw.line(image, BLACK, (BOAT_WIDTH / 2, 0), (BOAT_WIDTH / 2, BOAT_LENGTH), 1) # Hull Center line for reference
+    return image
+
+
+def hull_sprites(resolution_deg=SPRITE_ROTATION_RESOLUTION, smooth=SPRITE_SMOOTH_ROTATION, scale=1.0):
+    # One rotation cache shared by every Boat of this design (and camera zoom level)
+    if scale == 1.0:
+        return get_rotation_cache('hull', draw_hull_image, resolution_deg, smooth)
+
+    def draw_scaled_hull_image():
+        image = draw_hull_image()
+        size = (max(1, round(image.get_width() * scale)), max(1, round(image.get_height() * scale)))
+        return pygame.transform.smoothscale(image, size)
+    return get_rotation_cache(f'hull@{scale:g}', draw_scaled_hull_image, resolution_deg, smooth)
+
+
+# Everything that defines a boat's physical state (what keyframes and snapshots save)
+BOAT_STATE_FIELDS = (
+    'x', 'y', 'angle', 'speed', 'x_prev', 'y_prev',
+    'current_aoa_boom_plane', 'boom_deflection_from_aft', 'boom_angle_relative_to_boat',
+)
+
+
+def speed_over_ticks(speed, acceleration, ticks):
+    # Speed after `ticks` PHYSICS_DT ticks of constant thrust, and the distance sailed
+    # meanwhile, in closed form: the per-tick update is v = clamp((v + a) * (1 - c))
+    # then x += v, so v tends to a * (1 - c) / c geometrically. One step of dt gives
+    # the result of dt / PHYSICS_DT ticks.
+    q = 1 - WATER_RESISTANCE_FACTOR
+    terminal = acceleration * q / WATER_RESISTANCE_FACTOR
+    free = ticks # Ticks before the speed is capped
+    if abs(terminal) > BOAT_MAX_SPEED:
+        limit = math.copysign(BOAT_MAX_SPEED, terminal)
+        ratio = (limit - terminal) / (speed - terminal)
+        free = min(ticks, max(0, math.floor(math.log(ratio) / math.log(q))))
+    decay = q ** free
+    distance = free * terminal + (speed - terminal) * q * (1 - decay) / WATER_RESISTANCE_FACTOR
+    if free < ticks:
+        return limit, distance + (ticks - free) * limit
+    return terminal + (speed - terminal) * decay, distance
+
+
+class Boat:
+    thrust_table = None # Optional polar.PolarTable used as the thrust source (shared by all boats unless set per boat)
+    world_width = WORLD_WIDTH # Size of the world the boat wraps around in (World sets it per boat)
+    world_height = WORLD_HEIGHT
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.angle = 0  # Boat's heading in degrees (0 = North, 90 = East)
+        self.speed = 0
+        self.x_prev = x # For gate passage detection
+        self.y_prev = y # For gate passage detection
+        self.current_aoa_boom_plane = 0 # Angle of attack of wind on the boom's plane
+        self.boom_deflection_from_aft = 0.0 # Degrees from aft centerline. Positive=Port, Negative=Starboard
+        self.boom_angle_relative_to_boat = 180.0  # Boom angle relative to boat centerline (0=fwd, 180=aft). Calculated from deflection.
+        # Force terms of the last update (read by telemetry.py)
+        self.thrust_coefficient = 0.0 # Sail + hull
+        self.hull_thrust = 0.0 # Hull part (NaN with a thrust table, which only gives the total)
+        self.drag = 0.0 # Speed lost to water resistance
+        self.boom_pivot_offset_y = BOAT_LENGTH * 0.4 # Default pivot: 40% from bow
+        self._build_image()
+
+    def _build_image(self):
+        self.sprites = hull_sprites()
+        self.original_image = self.sprites.original
+        self.image_total_height = self.original_image.get_height()
+        self.image = self.original_image
+        self.image_angle = 0 # Heading the current self.image was rotated for
+        self.image_scale = 1.0 # Camera zoom the current sprites were scaled for
+        self.rect = self.image.get_rect(center=(self.x, self.y))
+
+    def move_start(self):
+        # Start of the last move for gate checks: (x_prev, y_prev), unless the boat wrapped
+        # around the world edge, which is not a move across the world (no sweep, no line crossing)
+        if abs(self.x - self.x_prev) > self.world_width / 2 or abs(self.y - self.y_prev) > self.world_height / 2:
+            return self.x, self.y
+        return self.x_prev, self.y_prev
+
+    def rotate(self, degrees):
+        # Only the heading changes here; the sprite is picked from the shared
+        # rotation cache in draw(), so headless simulation never touches surfaces.
+        self.angle = (self.angle + degrees) % 360
+
+    def _refresh_image(self, center, scale, angle):
+        if self.image_scale != scale:
+            self.sprites = hull_sprites(scale=scale)
+            self.image_scale = scale
+            self.image_angle = None
+        if self.image_angle != angle:
+            self.image = self.sprites.get(angle)
+            self.image_angle = angle
+        self.rect = self.image.get_rect(center=center)
+
+    def adjust_boom(self, amount):
+        self.boom_deflection_from_aft += amount # On ajuste la déflexion
+        self.boom_deflection_from_aft = max(-BOOM_MAX_ANGLE_ADJUST, min(BOOM_MAX_ANGLE_ADJUST, self.boom_deflection_from_aft)) # Puis on la limite
+        # The actual self.boom_angle_relative_to_boat will be updated in the update() method
+
+    def update(self, wind_direction_global, wind_speed_global, dt=PHYSICS_DT):
+        # Advances dt seconds. BOAT_ACCELERATION and WATER_RESISTANCE_FACTOR are per
+        # PHYSICS_DT tick; with dt = PHYSICS_DT the results are exactly the per-tick ones.
+        ticks = dt / PHYSICS_DT
+        self.x_prev = self.x
+        self.y_prev = self.y
+
+        # --- Automatic boom passage (gybe/tack) ---
+        wind_angle_rel_boat_zero_bow = (wind_direction_global - self.angle + 360) % 360
+        
+        wind_favors_port_boom = (0 < wind_angle_rel_boat_zero_bow < 180) # Wind from stbd -> boom to port
+        wind_favors_starboard_boom = (180 < wind_angle_rel_boat_zero_bow < 360) # Wind from port -> boom to stbd
+
+        current_deflection_magnitude = abs(self.boom_deflection_from_aft)
+        new_deflection_target = self.boom_deflection_from_aft # Start with current
+
+        if wind_favors_port_boom and self.boom_deflection_from_aft <= 0: # Wind from stbd, boom is stbd or centered
+            new_deflection_target = current_deflection_magnitude
+            if current_deflection_magnitude == 0: # If it was centered, give it a default out
+                new_deflection_target = min(DEFAULT_BOOM_OUT_ANGLE, BOOM_MAX_ANGLE_ADJUST) if BOOM_MAX_ANGLE_ADJUST > 0 else 0
+            if new_deflection_target != self.boom_deflection_from_aft:
+                # print(f"Boom auto-passed to Port. Deflection: {self.boom_deflection_from_aft:.1f} -> {new_deflection_target:.1f}")
+                self.boom_deflection_from_aft = new_deflection_target
+
+        elif wind_favors_starboard_boom and self.boom_deflection_from_aft >= 0: # Wind from port, boom is port or centered
+            new_deflection_target = -current_deflection_magnitude
+            if current_deflection_magnitude == 0: # If it was centered, give it a default out
+                new_deflection_target = -min(DEFAULT_BOOM_OUT_ANGLE, BOOM_MAX_ANGLE_ADJUST) if BOOM_MAX_ANGLE_ADJUST > 0 else 0
+            if new_deflection_target != self.boom_deflection_from_aft:
+                # print(f"Boom auto-passed to Starboard. Deflection: {self.boom_deflection_from_aft:.1f} -> {new_deflection_target:.1f}")
+                self.boom_deflection_from_aft = new_deflection_target
+        
+        # Update the main boom angle based on the (potentially changed) deflection
+        self.boom_angle_relative_to_boat = (180.0 + self.boom_deflection_from_aft + 360) % 360
+
+        # --- Physics Calculation ---
+        # For simplicity, assume true wind is apparent wind for now
+        # Angle of wind relative to the boat's direction
+        # wind_angle_relative_to_boat = (wind_direction_global - self.angle + 180) % 360 - 180
+
+        # current_aoa_boom_plane is the angle of the wind relative to the boom's plane.
+        # Positive AoA: wind from "starboard" side of boom (if boom points North, wind from Eastish).
+        # Negative AoA: wind from "port" side of boom (if boom points North, wind from Westish).
+        effective_boom_angle_global = (self.angle + self.boom_angle_relative_to_boat) % 360
+        angle_of_attack_on_boom = (wind_direction_global - effective_boom_angle_global + 180) % 360 - 180
+        self.current_aoa_boom_plane = angle_of_attack_on_boom
+
+        if self.thrust_table is not None:
+            # Precomputed polar table (polar.py), interpolated instead of the trigonometry below
+            total_thrust_coefficient = self.thrust_table.lookup(wind_angle_rel_boat_zero_bow, self.boom_deflection_from_aft)
+            hull_thrust_component = math.nan
+        else:
+            # New thrust calculation based on simplified model (e.g., Gamasutra "Ocean Spray")
+            # force_on_boom_plane_coeff is proportional to sin(AoA_boom), representing how "full" the sail is.
+            # It's signed: positive if wind pushes on one nominal side, negative on the other.
+            force_on_boom_plane_coeff = math.sin(math.radians(angle_of_attack_on_boom))
+
+            # self.boom_angle_relative_to_boat (boom_trim) is the angle of the boom relative to the boat's centerline.
+            # sin(boom_trim) projects the force on the sail (acting perpendicular to boom) into the boat's forward direction.
+            thrust_factor = force_on_boom_plane_coeff * math.sin(math.radians(self.boom_angle_relative_to_boat))
+
+            # Hull as a small sail effect
+            # Calculate the angle for the cosine projection:
+            # This angle represents how aligned the wind is with the boat's tail-to-bow axis.
+            # (wind_direction_global - self.angle) is angle from boat's bow to wind origin.
+            # Adding 180 makes it angle from boat's bow to wind vector direction if boat was target.
+            # cos will be 1 for direct tailwind, -1 for direct headwind.
+            angle_for_hull_cosine = (wind_direction_global - self.angle + 180) % 360
+            hull_force_projection_coeff = math.cos(math.radians(angle_for_hull_cosine))
+            hull_thrust_component = hull_force_projection_coeff * HULL_SAIL_EFFECT_FACTOR
+            total_thrust_coefficient = thrust_factor + hull_thrust_component
+        
+        acceleration = total_thrust_coefficient * wind_speed_global * BOAT_ACCELERATION
+        if ticks == 1:
+            # Apply thrust
+            self.speed += acceleration
+
+            # Apply water resistance (drag)
+            drag = self.speed * WATER_RESISTANCE_FACTOR
+            self.speed -= drag
+            # Cap speed
+            self.speed = max(-BOAT_MAX_SPEED, min(self.speed, BOAT_MAX_SPEED)) 
+            distance = self.speed
+        else:
+            # The same ticks in closed form (drag: speed lost to resistance and the cap)
+            speed, distance = speed_over_ticks(self.speed, acceleration, ticks)
+            drag = self.speed + acceleration * ticks - speed
+            self.speed = speed
+        self.thrust_coefficient, self.hull_thrust, self.drag = total_thrust_coefficient, hull_thrust_component, drag
+
+        # Movement
+        self.x += distance * math.sin(math.radians(self.angle))
+        self.y -= distance * math.cos(math.radians(self.angle)) # Subtract because Pygame Y is inverted
+
+        # Keep boat in the world (simple wrap around for now)
+        if self.x > self.world_width: self.x = 0
+        if self.x < 0: self.x = self.world_width
+        if self.y > self.world_height: self.y = 0
+        if self.y < 0: self.y = self.world_height
+
+    def draw(self, surface, camera=None, pose=None):
+        # Returns the bounding rect of everything drawn (for dirty-rect rendering).
+        # Without a camera, world coordinates are screen pixels. pose: optional
+        # (x, y, angle) to draw instead of the current one (render interpolation).
+        x, y, angle = pose if pose is not None else (self.x, self.y, self.angle)
+        if camera is None:
+            center, scale = (x, y), 1.0
+        else:
+            center, scale = camera.world_to_screen(x, y), camera.zoom
+        self._refresh_image(center, scale, angle)
+        dirty = surface.blit(self.image, self.rect)
+        # Draw boom and sail arc
+        
+        current_image_height = self.original_image.get_height() # Use the actual height of the drawn boat image
+        # Calculate the sail pivot point:
+        # 1. Define pivot relative to the boat's image center (before rotation).
+        #    self.boom_pivot_offset_y is distance from bow (Y=0 on image). Image center is at current_image_height / 2.
+        offset_from_center_y = (self.boom_pivot_offset_y - (current_image_height / 2)) * scale
+        pivot_vec_boat_coords = pygame.math.Vector2(0, offset_from_center_y)
+
+        # 2. Rotate this offset by the boat's angle (Pygame rotates CCW, our angle is CW from North)
+        pivot_offset_world = pivot_vec_boat_coords.rotate(angle) # dont change this Gemini
+        # 3. Add to boat's screen center to get the sail pivot's screen coordinates
+        boom_pivot_x = self.rect.centerx + pivot_offset_world.x
+        boom_pivot_y = self.rect.centery + pivot_offset_world.y
+        
+        # Calculate boom tip point for drawing
+        effective_boom_angle_global = (angle + self.boom_angle_relative_to_boat) % 360
+        boom_angle_rad = math.radians(effective_boom_angle_global)
+        boom_display_length = BOAT_LENGTH * 0.7 * scale # Length of the boom line
+
+        # For 0=North, CW angle system and Pygame's inverted Y:
+        boom_tip_x = boom_pivot_x + boom_display_length * math.sin(boom_angle_rad)
+        boom_tip_y = boom_pivot_y - boom_display_length * math.cos(boom_angle_rad) # Use -cos for Y to point North (Up) at 0 deg
+        
+        # Draw the sail as an arc
+        if abs(self.current_aoa_boom_plane) < MIN_AOA_FOR_ARC_DRAW or boom_display_length < 1:
+            dirty.union_ip(pygame.draw.line(surface, BLACK, (boom_pivot_x, boom_pivot_y), (boom_tip_x, boom_tip_y), 2)) # Draw boom as line
+        else:
+            # Calculate sagitta (height of the arc)
+            normalized_aoa_effect = abs(math.sin(math.radians(self.current_aoa_boom_plane)))
+            sagitta = SAIL_ARC_MAX_SAGITTA_RATIO * normalized_aoa_effect * boom_display_length
+
+            if sagitta < MIN_SAGITTA_FOR_ARC_DRAW:
+                dirty.union_ip(pygame.draw.line(surface, BLACK, (boom_pivot_x, boom_pivot_y), (boom_tip_x, boom_tip_y), 2)) # Draw boom as line
+            else:
+                # Calculate radius and center of the circle for the arc
+                chord_half_len = boom_display_length / 2.0
+                # Avoid division by zero if sagitta is extremely small relative to chord_half_len, though MIN_SAGITTA should prevent it
+                if sagitta < 1e-6: # Effectively flat
+                     dirty.union_ip(pygame.draw.line(surface, BLACK, (boom_pivot_x, boom_pivot_y), (boom_tip_x, boom_tip_y), 2))
+                     return dirty
+
+                radius = (sagitta**2 + chord_half_len**2) / (2 * sagitta)
+                
+                # Midpoint of the boom (chord)
+                mid_boom_x = (boom_pivot_x + boom_tip_x) / 2
+                mid_boom_y = (boom_pivot_y + boom_tip_y) / 2
+                
+                # Normalized vector perpendicular to the boom, pointing towards the bulge
+                boom_dx_norm = (boom_tip_x - boom_pivot_x) / boom_display_length
+                boom_dy_norm = (boom_tip_y - boom_pivot_y) / boom_display_length
+
+                # Perpendicular direction depends on AoA sign
+                # current_aoa_boom_plane > 0: wind from starboard of boom, bulge port (left of boom vector)
+                # current_aoa_boom_plane < 0: wind from port of boom, bulge starboard (right of boom vector)
+                bulge_sign = math.copysign(1.0, self.current_aoa_boom_plane) # +1 if wind from starboard, -1 if from port
+                
+                # Perpendicular vector for port bulge is (-dy, dx) from boom vector (dx, dy)
+                # This ensures sail bulges leeward.
+                perp_dx = -boom_dy_norm * bulge_sign 
+                perp_dy = boom_dx_norm * bulge_sign
+                
+                dist_mid_to_center = radius - sagitta
+                
+                circ_center_x = mid_boom_x + perp_dx * dist_mid_to_center
+                circ_center_y = mid_boom_y + perp_dy * dist_mid_to_center
+                
+                # Angles for pygame.draw.arc (CCW from positive x-axis of ellipse)
+                angle_pivot_rad = math.atan2(-(boom_pivot_y - circ_center_y), boom_pivot_x - circ_center_x)
+                angle_tip_rad = math.atan2(-(boom_tip_y - circ_center_y), boom_tip_x - circ_center_x)
+
+                # Determine the initial start and end angles (s0, e0) for a CCW sweep,
+                # based on the bulge direction. The arc should "contain" the bulge.
+                # If bulge_sign > 0 (port bulge), arc P->T should be CCW relative to the center.
+                # If bulge_sign < 0 (starboard bulge), arc T->P should be CCW relative to the center.
+                s0, e0 = (angle_pivot_rad, angle_tip_rad) if bulge_sign > 0 else (angle_tip_rad, angle_pivot_rad)
+                
+                # Calculate the CCW angular distance from s0 to e0, normalized to [0, 2*pi).
+                angular_distance_ccw = (e0 - s0 + 2 * math.pi) % (2 * math.pi)
+
+                # If this CCW sweep is the major arc (> pi), we want the minor arc.
+                # The minor arc is obtained by sweeping CCW from the original 'e0' to 's0'.
+                start_angle, stop_angle = (e0, s0) if angular_distance_ccw > math.pi else (s0, e0)
+                
+                # Ensure pygame's stop_angle is CCW 'after' start_angle
+                if stop_angle <= start_angle:
+                    stop_angle += 2 * math.pi
+                
+                arc_rect = pygame.Rect(circ_center_x - radius, circ_center_y - radius, 2 * radius, 2 * radius)
+                dirty.union_ip(pygame.draw.arc(surface, SAIL_COLOR, arc_rect, start_angle, stop_angle, 2))
+                # Draw the boom line (chord)
+                dirty.union_ip(pygame.draw.line(surface, BLACK, (boom_pivot_x, boom_pivot_y), (boom_tip_x, boom_tip_y), 1))
+
+                # --- Draw construction elements in RED ---
+                # pygame.draw.circle(surface, RED, (circ_center_x, circ_center_y), 3) # Circle center
+                # pygame.draw.line(surface, RED, (circ_center_x, circ_center_y), (boom_pivot_x, boom_pivot_y), 1) # Radius to pivot
+                # pygame.draw.line(surface, RED, (circ_center_x, circ_center_y), (boom_tip_x, boom_tip_y), 1) # Radius to tip
+                # pygame.draw.line(surface, RED, (mid_boom_x, mid_boom_y), (circ_center_x, circ_center_y), 1) # Line from mid-chord to center
+        return dirty
@@ -0,0 +1,84 @@
+from constants import *
+
+# World coordinates are pixels at zoom 1 with the origin at the world's top-left
+# corner; the camera maps them to the screen. With the default world (one screen)
+# and zoom 1 the mapping is the identity, as before cameras existed.
+
+
+class Camera:
+    def __init__(self, viewport=(SCREEN_WIDTH, SCREEN_HEIGHT), world_size=(WORLD_WIDTH, WORLD_HEIGHT),
+                 zoom=1.0, deadzone=CAMERA_DEADZONE):
+        self.width, self.height = viewport
+        self.world_width, self.world_height = world_size
+        self.zoom = zoom
+        self.deadzone = deadzone
+        # World point at the center of the view
+        self.x = self.width / 2 / zoom
+        self.y = self.height / 2 / zoom
+        self._clamp()
+
+    @property
+    def left(self):
+        return self.x - self.width / 2 / self.zoom
+
+    @property
+    def top(self):
+        return self.y - self.height / 2 / self.zoom
+
+    def view_rect(self, margin=0):
+        # Visible world area as (x0, y0, x1, y1), grown by margin world units
+        half_width = self.width / 2 / self.zoom + margin
+        half_height = self.height / 2 / self.zoom + margin
+        return self.x - half_width, self.y - half_height, self.x + half_width, self.y + half_height
+
+    def state(self):
+        # What the screen image depends on (the renderer redraws everything when it changes)
+        return self.x, self.y, self.zoom
+
+    def world_to_screen(self, x, y):
+        return (x - self.left) * self.zoom, (y - self.top) * self.zoom
+
+    def screen_to_world(self, sx, sy):
+        return sx / self.zoom + self.left, sy / self.zoom + self.top
+
+    def visible(self, x, y, margin=0):
+        x0, y0, x1, y1 = self.view_rect(margin)
+        return x0 <= x <= x1 and y0 <= y <= y1
+
+    def _clamp(self):
+        # Keep the view inside the world, or centered on it when the world is smaller
+        for attr, size, view in (('x', self.world_width, self.width / self.zoom),
+                                 ('y', self.world_height, self.height / self.zoom)):
+            if view >= size:
+                setattr(self, attr, size / 2)
+            else:
+                setattr(self, attr, min(max(getattr(self, attr), view / 2), size - view / 2))
+
+    def follow(self, x, y):
+        # Scroll only when the point leaves the central dead zone, so the view
+        # (and the renderer's background) stays still while the boat moves inside it
+        half_width = self.width / 2 / self.zoom * self.deadzone
+        half_height = self.height / 2 / self.zoom * self.deadzone
+        if x < self.x - half_width:
+            self.x = x + half_width
+        elif x > self.x + half_width:
+            self.x = x - half_width
+        if y < self.y - half_height:
+            self.y = y + half_height
+        elif y > self.y + half_height:
+            self.y = y - half_height
+        self._clamp()
+
+    def set_zoom(self, zoom):
+        self.zoom = zoom
+        self._clamp()
+
+    def zoom_in(self):
+        larger = [z for z in CAMERA_ZOOM_LEVELS if z > self.zoom]
+        if larger:
+            self.set_zoom(larger[0])
+
+    def zoom_out(self):
+        smaller = [z for z in CAMERA_ZOOM_LEVELS if z < self.zoom]
+        if smaller:
+            self.set_zoom(smaller[-1])
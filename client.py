@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import collections
+import math
+import random
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pygame
+
+from autopilot import Autopilot, angle_difference
+from boat import Boat
+from camera import Camera
+from constants import *
+from gate import Gate
+from hud import Hud
+from protocol import (
+    FIELD_INDEX, INPUT_MESSAGE, MAX_NAME_LENGTH, MSG_BYE, MSG_HELLO, MSG_INPUT, MSG_SNAPSHOT, MSG_WELCOME,
+    SNAPSHOT_ACK, SNAPSHOT_FIELDS, WELCOME_WIND_SHADOW, ProtocolError, decode_snapshot, decode_welcome, dequantize,
+    frame, read_frame,
+)
+from render import Renderer
+from spatial import GateIndex
+from wind import WindField
+from world import Controls
+
+# Client of server.py. The own boat is predicted: each input is applied locally
+# right away and sent to the server; when a snapshot says which input the server
+# applied last, the boat is reset to the server's state and the inputs sent since
+# are replayed on it. Other boats are shown CLIENT_INTERPOLATION_DELAY ticks in
+# the past, interpolated between the two snapshots around that time.
+#
+# A RaceClient has the attributes the Renderer and Hud read from a World (boat,
+# gates, gate_index, score, wind), so it is drawn like one.
+
+X, Y, ANGLE, SPEED, BOOM, SCORE, GATES = (FIELD_INDEX[name] for name, _, _ in SNAPSHOT_FIELDS)
+
+
+class RaceClient:
+    def __init__(self, name='player'):
+        self.name = name
+        self.slot = None
+        self.boat = Boat(INITIAL_BOAT_X, INITIAL_BOAT_Y) # Predicted own boat
+        self.gates = []
+        self.gate_index = None
+        self.world_size = (WORLD_WIDTH, WORLD_HEIGHT)
+        self.score = 0
+        self.gates_done = 0
+        self.wind_direction = WIND_DIRECTION
+        self.wind_speed = WIND_SPEED
+        self.wind_shadow = False # The server slows the wind behind boats
+        self.shadow_sources = (np.empty(0), np.empty(0)) # Other boats' positions in the last snapshot
+        self.dt = PHYSICS_DT
+        self.sequence = 0
+        self.pending = collections.deque() # (sequence, controls) not applied by the server yet
+        self.history = collections.deque(maxlen=CLIENT_SNAPSHOT_HISTORY) # (tick, arrival time, quantized table, known)
+        self.table = None # Quantized state of every slot, as last received
+        self.known = None
+        self.others = {} # slot -> Boat drawn for the other players
+        self.reader = self.writer = None
+        self.receiver = None
+        self.closed = False
+        # Statistics
+        self.snapshots = 0
+        self.bytes_received = 0
+        self.correction = 0.0 # How far the last reconciliation moved the own boat
+        self.max_gap = 0.0 # Longest time between two snapshots
+
+    # --- Connection ---
+    async def connect(self, host=SERVER_HOST, port=SERVER_PORT):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(frame(MSG_HELLO, self.name.encode('utf-8')[:MAX_NAME_LENGTH]))
+        message_type, payload = await read_frame(self.reader)
+        if message_type == MSG_BYE:
+            self.writer.close()
+            raise ConnectionError(payload.decode('utf-8', 'replace'))
+        if message_type != MSG_WELCOME:
+            raise ProtocolError(f"expected a welcome, got message type {message_type}")
+        self._welcome(payload)
+        self.receiver = asyncio.create_task(self._receive())
+
+    def _welcome(self, payload):
+        self.slot, slots, tick_rate, self.world_size, _, flags, gates = decode_welcome(payload)
+        self.dt = 1.0 / tick_rate
+        self.wind_shadow = bool(flags & WELCOME_WIND_SHADOW)
+        self.gates = [Gate(x, y, width, heading, verbose=False) for x, y, width, heading in gates.tolist()]
+        # Only used to cull the gates out of view
+        self.gate_index = GateIndex(self.gates, (0, 0) + tuple(self.world_size), lines=False)
+        self.boat.world_width, self.boat.world_height = self.world_size
+        self.table = np.zeros((slots, len(SNAPSHOT_FIELDS)), dtype=np.int64)
+        self.known = np.zeros(slots, dtype=bool)
+
+    async def _receive(self):
+        try:
+            while True:
+                message_type, payload = await read_frame(self.reader)
+                if message_type == MSG_SNAPSHOT:
+                    self.apply_snapshot(payload, time.perf_counter())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.closed = True
+
+    def close(self):
+        if self.receiver is not None:
+            self.receiver.cancel()
+        if self.writer is not None:
+            self.writer.close()
+        self.closed = True
+
+    # --- Snapshots ---
+    def apply_snapshot(self, payload, now):
+        (ack,) = SNAPSHOT_ACK.unpack_from(payload)
+        tick, self.wind_direction, self.wind_speed, _ = decode_snapshot(payload, self.table, self.known, SNAPSHOT_ACK.size)
+        if self.history:
+            self.max_gap = max(self.max_gap, now - self.history[-1][1])
+        # Kept quantized: only the rows drawn are converted, in interpolated()
+        self.history.append((tick, now, self.table.copy(), self.known.copy()))
+        self.snapshots += 1
+        self.bytes_received += len(payload)
+        if self.wind_shadow:
+            others = self.known.copy()
+            others[self.slot] = False
+            positions = dequantize(self.table[others])
+            self.shadow_sources = (positions[:, X], positions[:, Y])
+        if self.known[self.slot]:
+            own = dequantize(self.table[self.slot]).tolist()
+            self.score = int(own[SCORE])
+            self.gates_done = int(own[GATES])
+            self._reconcile(ack, own)
+
+    def _reconcile(self, ack, own):
+        while self.pending and self.pending[0][0] <= ack:
+            self.pending.popleft()
+        boat = self.boat
+        predicted = boat.x, boat.y
+        boat.x, boat.y, boat.angle, boat.speed = own[X], own[Y], own[ANGLE], own[SPEED]
+        boat.boom_deflection_from_aft = own[BOOM]
+        boat.boom_angle_relative_to_boat = (180.0 + own[BOOM]) % 360
+        for _, controls in self.pending:
+            self._step(controls)
+        self.correction = math.hypot(boat.x - predicted[0], boat.y - predicted[1])
+
+    # --- Inputs ---
+    def _step(self, controls):
+        # One server tick (self.dt), as in RaceServer.tick
+        boat = self.boat
+        ticks = self.dt / PHYSICS_DT
+        if controls.turn:
+            boat.rotate(controls.turn * BOAT_TURN_SPEED * ticks)
+        if controls.boom:
+            boat.adjust_boom(controls.boom * BOOM_ADJUST_SPEED * ticks)
+        wind_speed = self.wind_speed
+        if self.wind_shadow and len(self.shadow_sources[0]):
+            # Shadows of the other boats where the last snapshot put them (the server
+            # uses their current positions; the difference is corrected on reconciliation)
+            wind_speed *= float(WindField.shadow_factor([boat.x], [boat.y], self.wind_direction, *self.shadow_sources)[0])
+        boat.update(self.wind_direction, wind_speed, self.dt)
+
+    def send_input(self, controls):
+        # Sends one tick of controls and applies them to the predicted boat
+        self.sequence += 1
+        self.writer.write(frame(MSG_INPUT, INPUT_MESSAGE.pack(self.sequence, controls.turn, controls.boom)))
+        self.pending.append((self.sequence, controls))
+        self._step(controls)
+
+    # --- Other boats ---
+    def interpolated(self, now):
+        # (slots, values) of the other boats at the display time, between the two snapshots around it
+        if not self.history:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(SNAPSHOT_FIELDS)))
+        tick, arrival, _, _ = self.history[-1]
+        display_tick = tick + min((now - arrival) / self.dt, 1.0) - CLIENT_INTERPOLATION_DELAY
+        older = newer = self.history[-1]
+        for entry in reversed(self.history):
+            older = entry
+            if entry[0] <= display_tick:
+                break
+            newer = entry
+        (tick_a, _, a, known_a), (tick_b, _, b, known_b) = older, newer
+        t = 0.0 if tick_b == tick_a else min(max((display_tick - tick_a) / (tick_b - tick_a), 0.0), 1.0)
+        known = known_a & known_b
+        known[self.slot] = False
+        slots = np.flatnonzero(known)
+        a, b = dequantize(a[slots]), dequantize(b[slots])
+        values = a + (b - a) * t
+        values[:, ANGLE] = (a[:, ANGLE] + angle_difference(b[:, ANGLE], a[:, ANGLE]) * t) % 360
+        # Boats wrapping around the world jump instead of crossing it
+        for axis, size in ((X, self.world_size[0]), (Y, self.world_size[1])):
+            wrapped = np.abs(b[:, axis] - a[:, axis]) > size / 2
+            values[wrapped, axis] = b[wrapped, axis]
+        return slots, values
+
+    def other_boats(self, now):
+        # Boats for the Renderer, one per other player, moved to their interpolated state
+        slots, values = self.interpolated(now)
+        boats = {}
+        for slot, (x, y, angle, _, boom, _, _) in zip(slots.tolist(), values.tolist()):
+            boat = self.others.get(slot) or Boat(x, y)
+            boat.x, boat.y, boat.angle = x, y, angle
+            boat.boom_deflection_from_aft = boom
+            boat.boom_angle_relative_to_boat = (180.0 + boom) % 360
+            boat.current_aoa_boom_plane = (self.wind_direction - (angle + boat.boom_angle_relative_to_boat) + 180) % 360 - 180
+            boats[slot] = boat
+        self.others = boats
+        return list(boats.values())
+
+
+async def play(host, port, name):
+    client = RaceClient(name)
+    await client.connect(host, port)
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption(f"Simulation de Voile - {name}")
+    camera = Camera(world_size=client.world_size)
+    renderer = Renderer(screen, Hud(), camera=camera)
+    autopilot = Autopilot()
+    auto_trim = False
+
+    loop = asyncio.get_running_loop()
+    next_frame = loop.time()
+    running = True
+    while running and not client.closed:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_t:
+                    auto_trim = not auto_trim
+                if event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                    camera.zoom_in()
+                if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    camera.zoom_out()
+        keys = pygame.key.get_pressed()
+        controls = Controls(turn=keys[pygame.K_RIGHT] - keys[pygame.K_LEFT], boom=keys[pygame.K_DOWN] - keys[pygame.K_UP])
+        if auto_trim:
+            controls = controls._replace(boom=autopilot.trim_boom(client))
+        client.send_input(controls)
+
+        renderer.other_boats = client.other_boats(time.perf_counter())
+        camera.follow(client.boat.x, client.boat.y)
+        renderer.draw(client)
+        next_frame += client.dt
+        await asyncio.sleep(max(0.0, next_frame - loop.time()))
+    client.close()
+    pygame.quit()
+
+
+async def _sail_clients(host, port, names, seconds):
+    # Headless clients in this process, each sailing a random fixed heading with
+    # the autopilot's trim and sending one input per tick
+    clients = [RaceClient(name) for name in names]
+    for client in clients:
+        await client.connect(host, port)
+
+    async def sail(client, heading):
+        autopilot = Autopilot(heading=heading)
+        loop = asyncio.get_running_loop()
+        next_tick = start = loop.time()
+        while not client.closed and loop.time() - start < seconds:
+            client.send_input(autopilot(client))
+            next_tick += client.dt
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    rng = random.Random(names[0])
+    started = time.perf_counter()
+    await asyncio.gather(*(sail(client, rng.uniform(0, 360)) for client in clients))
+    elapsed = time.perf_counter() - started
+    for client in clients:
+        client.close()
+    return [(client.snapshots, elapsed, client.bytes_received, client.max_gap, client.correction) for client in clients]
+
+
+def _load_worker(job):
+    host, port, names, seconds = job
+    return asyncio.run(_sail_clients(host, port, names, seconds))
+
+
+def load_test(host, port, n, seconds, processes=1):
+    # n headless clients spread over worker processes (one asyncio loop each);
+    # returns and prints per-client snapshot rates and sizes
+    names = [f"load{i}" for i in range(n)]
+    jobs = [(host, port, names[k::processes], seconds) for k in range(processes)]
+    if processes == 1:
+        results = _load_worker(jobs[0])
+    else:
+        with Pool(processes) as pool:
+            results = [row for rows in pool.map(_load_worker, jobs) for row in rows]
+    snapshots, elapsed, received, gaps, corrections = (np.array(column) for column in zip(*results))
+    rates = snapshots / elapsed
+    print(f"{n} clients, {elapsed.max():.1f} s: {rates.mean():.1f} snapshots/s per client (min {rates.min():.1f}), "
+          f"{received.sum() / max(snapshots.sum(), 1):.0f} bytes per snapshot, "
+          f"longest gap {gaps.max() * 1000:.0f} ms, mean correction {corrections.mean():.2f} px")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Race client (see server.py)")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--name', default='player')
+    parser.add_argument('--load-test', type=int, metavar='N', help="connect N headless clients instead of playing")
+    parser.add_argument('--seconds', type=float, default=10, help="length of the load test")
+    parser.add_argument('--processes', type=int, default=1, help="worker processes sharing the load test clients")
+    args = parser.parse_args(argv)
+    try:
+        if args.load_test:
+            load_test(args.host, args.port, args.load_test, args.seconds, args.processes)
+        else:
+            asyncio.run(play(args.host, args.port, args.name))
+    except (ConnectionError, ProtocolError) as e:
+        print(f"Connection failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
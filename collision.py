@@ -0,0 +1,45 @@
+import math
+
+import numpy as np
+
+# Continuous (swept) collision tests for a boat moving in a straight line
+# from p0 to p1 during one step. Times are fractions of the step: 0 = p0, 1 = p1.
+
+
+def swept_circle_time(x0, y0, x1, y1, cx, cy, radius):
+    # First time the moving point comes closer than radius to (cx, cy).
+    # Equivalent to a boat circle swept against a buoy circle with radius = sum of radii.
+    # Returns None if it never does during the step, 0 if it starts inside.
+    fx, fy = x0 - cx, y0 - cy
+    c = fx * fx + fy * fy - radius * radius
+    if c < 0:
+        return 0.0
+    dx, dy = x1 - x0, y1 - y0
+    a = dx * dx + dy * dy
+    if a == 0:
+        return None
+    b = 2 * (fx * dx + fy * dy)
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / (2 * a)
+    return t if 0 <= t <= 1 else None
+
+
+def line_crossing_time(dist_prev, dist_curr):
+    # Time the move crosses a line, given the signed distances to it at both ends
+    return dist_prev / (dist_prev - dist_curr)
+
+
+def swept_circle_times(x0, y0, x1, y1, cx, cy, radius):
+    # Vectorized swept_circle_time; never-hit entries are +inf
+    fx, fy = x0 - cx, y0 - cy
+    c = fx * fx + fy * fy - radius * radius
+    dx, dy = x1 - x0, y1 - y0
+    a = dx * dx + dy * dy
+    b = 2 * (fx * dx + fy * dy)
+    discriminant = b * b - 4 * a * c
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (-b - np.sqrt(np.maximum(discriminant, 0))) / (2 * a)
+    t = np.where((discriminant >= 0) & (a > 0) & (t >= 0) & (t <= 1), t, np.inf)
+    return np.where(c < 0, 0.0, t)
@@ -0,0 +1 @@
+# pytest loads this file first, which puts the repository root on sys.path for the tests/
@@ -0,0 +1,131 @@
+# --- Constants ---
+# Colors
+WHITE = (255, 255, 255)
+BLUE = (0, 0, 200)  # Water
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+YELLOW = (255, 255, 0)
+
+# Screen dimensions
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+# World size (world coordinates are pixels at zoom 1; the default world is exactly one screen)
+WORLD_WIDTH = SCREEN_WIDTH
+WORLD_HEIGHT = SCREEN_HEIGHT
+
+# Camera (camera.py)
+CAMERA_ZOOM_LEVELS = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0) # Discrete zooms, so each one gets its own sprite cache
+CAMERA_DEADZONE = 0.5 # Fraction of the view the followed boat moves in freely before the camera scrolls
+
+# Simulation timing
+PHYSICS_FPS = 30 # Physics ticks per second (per-tick constants below, e.g. BOAT_TURN_SPEED, are per PHYSICS_DT)
+PHYSICS_DT = 1.0 / PHYSICS_FPS
+PHYSICS_SUBSTEPS = 1 # Boat updates and gate checks per tick (finer turns and collisions with large ticks)
+PHYSICS_MAX_FRAME_TIME = 0.25 # Longest frame time simulated at once: after a stall the game slows down instead of catching up
+RENDER_FPS = 60 # Interactive frame rate, independent of PHYSICS_FPS
+RENDER_INTERPOLATION = True # Draw the boat between its last two ticks, by the time elapsed since the last one
+
+# Session recording (replay.py)
+REPLAY_KEYFRAME_INTERVAL = 300 # Ticks between full-state keyframes (10 s at 30 FPS)
+
+# Telemetry (telemetry.py)
+TELEMETRY_BUFFER_TICKS = 4096 # Rows per ring buffer slot; a full slot is written as one batch (~2 min at 30 FPS)
+TELEMETRY_BUFFER_GATE_EVENTS = 256 # Rows per slot of the gate event stream
+TELEMETRY_BUFFER_SLOTS = 4 # Slots per ring: recording only waits when the writer thread is this many batches behind
+
+# Race server and client (server.py, client.py)
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 7770
+SERVER_SLOTS = 512 # Boats (players and bots) a server can hold
+SERVER_INPUT_QUEUE = 8 # Inputs buffered per client; older ones are dropped when it sends too fast
+SERVER_SEND_BUFFER_LIMIT = 64 * 1024 # Unsent bytes above which a slow client skips snapshots
+SERVER_MAX_CATCHUP_TICKS = 5 # Ticks run back to back after a stall before the rest are dropped
+SERVER_HELLO_TIMEOUT = 5.0 # Seconds a new connection has to say hello
+SERVER_STATS_INTERVAL = 5.0 # Seconds between server statistics lines
+SERVER_WIND_SHADOW = True # Boats slow the wind downwind of them (wind.py shadow, WIND_SHADOW_*)
+CLIENT_INTERPOLATION_DELAY = 2 # Ticks other boats are shown in the past, to interpolate between snapshots
+CLIENT_SNAPSHOT_HISTORY = 16 # Snapshots kept for interpolation
+
+# Boat properties
+BOAT_WIDTH = 20
+BOAT_LENGTH = 50
+INITIAL_BOAT_X = SCREEN_WIDTH // 2
+INITIAL_BOAT_Y = SCREEN_HEIGHT // 2
+BOAT_TURN_SPEED = 2  # degrees per frame
+BOAT_ACCELERATION = 0.02
+BOAT_MAX_SPEED = 5 # Max speed in either direction
+BOOM_MAX_ANGLE_ADJUST = 88 # Max degrees of deflection from aft centerline for the boom
+BOOM_ADJUST_SPEED = 1
+DEFAULT_BOOM_OUT_ANGLE = 15 # Default deflection when boom flips from centered position
+WATER_RESISTANCE_FACTOR = 0.01 # How much speed is lost per update due to drag
+HULL_SAIL_EFFECT_FACTOR = 0.05 # How much the hull acts like a sail (e.g., 0.1 = 10% of sail's potential area/efficiency)
+
+# Rendering
+RENDER_DIRTY_RECTS = True # Only restore and push the screen areas that changed (False = full fill + flip every frame)
+
+# Frame-time instrumentation (profiler.py)
+PROFILER_WINDOW = 120 # Frames in the rolling averages and p99 of the overlay
+PROFILER_OVERLAY_REFRESH = 15 # Frames between overlay text updates
+PROFILER_TRACE_MAX_EVENTS = 200000 # Trace events kept for export (oldest dropped first)
+
+# HUD
+HUD_FONT_NAME = 'arial'
+HUD_FONT_SIZE = 20
+HUD_TEXT_CACHE_SIZE = 256 # Rendered text surfaces kept before the least recently used is evicted
+
+# Sprite rotation cache
+SPRITE_ROTATION_RESOLUTION = 1.0 # Degrees between pre-rendered headings (e.g. 0.5 for smoother turns, at twice the memory)
+SPRITE_SMOOTH_ROTATION = False # Use anti-aliased rotozoom instead of plain rotate
+
+# Polar thrust table (polar.py)
+POLAR_WIND_STEP = 1.0 # Degrees of relative wind between table rows
+POLAR_DEFLECTION_STEP = 1.0 # Degrees of boom deflection between table columns
+
+# Autopilot (autopilot.py)
+AUTOPILOT_WIND_RESOLUTION = 1.0 # Degrees of relative wind between trim table entries
+AUTOPILOT_NO_GO = 45 # Closest angle to the wind the autopilot sails
+
+# Reinforcement-learning environments (env.py)
+ENV_MAX_STEPS = PHYSICS_FPS * 180 # Steps before an episode is truncated
+ENV_DISTANCE_SCALE = 500 # Distance to the next gate (pixels) observed as 1
+ENV_PROGRESS_REWARD = 0.0 # Reward per pixel sailed towards the next gate, on top of gate points (0 = points only)
+
+# Wind properties
+WIND_SPEED = 1  # Arbitrary units
+WIND_DIRECTION = 0  # degrees, 0 = from North (top), 90 = from East (right)
+
+# Wind field (wind.py)
+WIND_GRID_CELL_SIZE = 50 # Pixels between wind grid nodes
+WIND_GRID_UPDATE_INTERVAL = 0.5 # Seconds between grid recomputations (sampling interpolates in time)
+WIND_GUST_SPEED_AMPLITUDE = 0.3 # Gust speed variation, as a fraction of the base speed
+WIND_GUST_DIRECTION_AMPLITUDE = 15 # Gust direction variation in degrees
+WIND_GUST_SCALE = 250 # Typical gust size in pixels
+WIND_GUST_PERIOD = 20 # Typical gust duration in seconds
+WIND_SHADOW_LENGTH = 150 # How far downwind a boat slows the wind, in pixels
+WIND_SHADOW_WIDTH = 30 # Half-width of the shadow behind a boat, in pixels
+WIND_SHADOW_STRENGTH = 0.4 # Speed reduction right behind a boat
+
+# Sail properties (arc)
+SAIL_COLOR = WHITE
+SAIL_ARC_MAX_SAGITTA_RATIO = 0.25 # Max sagitta as a ratio of boom length (e.g., 0.2 means 20% bulge)
+MIN_AOA_FOR_ARC_DRAW = 1.0 # Minimum Angle of Attack (degrees) to draw an arc instead of a line
+MIN_SAGITTA_FOR_ARC_DRAW = 0.5 # Minimum sagitta in pixels to draw an arc
+
+# Rudder properties
+RUDDER_VISUAL_EXTENSION_RATIO = 0.15 # How much the rudder extends past the hull, as a ratio of BOAT_LENGTH
+RUDDER_WIDTH_RATIO = 0.3 # Width of the rudder as a ratio of BOAT_WIDTH
+RUDDER_COLOR = BLACK
+
+# Gate properties
+GATE_BUOY_RADIUS = 7
+POINTS_VALID_PASSAGE = 10
+POINTS_HIT_BUOY = -5
+POINTS_PASSED_OUTSIDE = -2 # Passed in correct direction but outside buoys
+POINTS_WRONG_DIRECTION = -3 # Passed between buoys but wrong direction
+# Continuous collision along the boat's move, so large steps cannot tunnel through buoys. Opt-in
+# (main.py --swept-collision): it scores differently from the end-position test, as buoys count
+# anywhere along the move and between-buoys is judged where the move crosses the gate line.
+GATE_SWEPT_COLLISION = False
+GATE_GRID_CELL_SIZE = 100 # Cell size in pixels of the spatial index used for gate checks
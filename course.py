@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from constants import *
+from gate import Gate
+
+try:
+    import tomllib # Python 3.11+
+except ImportError:
+    tomllib = None
+
+# Course files (JSON, or TOML on Python 3.11+):
+#
+#   {
+#     "name": "Default",
+#     "world": {"width": 800, "height": 600},            optional, default WORLD_WIDTH x WORLD_HEIGHT
+#     "start": {"x": 400, "y": 300, "heading": 0},       optional boat start
+#     "laps": 1,
+#     "gates": [{"id": "north", "x": 400, "y": 100, "width": 100, "heading": 0}, ...],
+#     "sequence": ["north", ["east", "east-bis"], ...],  optional, default: the gates in order;
+#                                                       a list is a choice of alternative gates
+#     "start_line": {"x": ..., "y": ..., "width": ..., "heading": ...},   optional
+#     "finish_line": {...}                                                optional
+#   }
+#
+# heading is the direction of valid passage (0 = North, 90 = East), as for Gate.
+# The loader validates the file and precomputes the gate geometry into arrays.
+# The sequence is expanded into legs (start line, the sequence once per lap,
+# finish line); each leg is a set of alternative gates and only the current
+# leg's gates are tested for passage (see CourseSequence and World.from_course).
+
+START_GATE_ID = 'start'
+FINISH_GATE_ID = 'finish'
+
+
+class CourseError(ValueError):
+    pass
+
+
+def _number(value, where, positive=False):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise CourseError(f"{where}: expected a number, got {value!r}")
+    if positive and value <= 0:
+        raise CourseError(f"{where}: must be positive, got {value!r}")
+    return float(value)
+
+
+def _gate_spec(spec, where):
+    if not isinstance(spec, dict):
+        raise CourseError(f"{where}: expected an object, got {spec!r}")
+    missing = [key for key in ('x', 'y', 'width', 'heading') if key not in spec]
+    if missing:
+        raise CourseError(f"{where}: missing {', '.join(missing)}")
+    return (_number(spec['x'], f"{where}.x"), _number(spec['y'], f"{where}.y"),
+            _number(spec['width'], f"{where}.width", positive=True), _number(spec['heading'], f"{where}.heading") % 360)
+
+
+def _check_inside(x, y, world_size, where, what='center'):
+    if not (0 <= x <= world_size[0] and 0 <= y <= world_size[1]):
+        raise CourseError(f"{where}: {what} ({x:g}, {y:g}) outside the {world_size[0]:g}x{world_size[1]:g} world")
+
+
+class Course:
+    # A validated course: gate geometry as arrays (one row per gate, start and
+    # finish lines included) and the legs of the race as tuples of gate rows
+    def __init__(self, name, gate_ids, specs, legs, laps=1, world_size=(WORLD_WIDTH, WORLD_HEIGHT), start=None):
+        self.name = name
+        self.gate_ids = gate_ids
+        self.legs = legs
+        self.laps = laps
+        self.world_size = world_size
+        self.start = start # (x, y, heading) or None for the default boat start
+
+        specs = np.array(specs, dtype=float).reshape(-1, 4)
+        self.center = specs[:, :2]
+        self.width = specs[:, 2]
+        self.heading = specs[:, 3]
+        # Same geometry as Gate.__init__, for every gate at once
+        rad = np.radians(self.heading)
+        self.passage = np.stack([np.sin(rad), -np.cos(rad)], axis=1)
+        self.line = np.stack([self.passage[:, 1], -self.passage[:, 0]], axis=1)
+        half_width = (self.width / 2)[:, None]
+        self.port = self.center - self.line * half_width
+        self.starboard = self.center + self.line * half_width
+        self._rows = None
+
+    def __len__(self):
+        return len(self.gate_ids)
+
+    def gates(self, verbose=False):
+        # One Gate per leg (a gate sailed on every lap scores once per lap), built
+        # from the precomputed geometry. Returns (gates, legs as tuples of indices into gates).
+        if self._rows is None:
+            self._rows = (self.center.tolist(), self.width.tolist(), self.heading.tolist(),
+                          self.passage.tolist(), self.line.tolist())
+        centers, widths, headings, passages, lines = self._rows
+        gates, legs = [], []
+        for leg in self.legs:
+            indices = []
+            for row in leg:
+                gate = Gate(centers[row][0], centers[row][1], widths[row], headings[row], verbose,
+                            geometry=(passages[row], lines[row]))
+                if self.gate_ids[row] in (START_GATE_ID, FINISH_GATE_ID):
+                    gate.port_color = gate.starboard_color = YELLOW
+                indices.append(len(gates))
+                gates.append(gate)
+            legs.append(tuple(indices))
+        return gates, legs
+
+
+def parse_course(data, source='<course>'):
+    if not isinstance(data, dict):
+        raise CourseError(f"{source}: expected an object at the top level")
+    world = data.get('world', {})
+    if not isinstance(world, dict):
+        raise CourseError(f"{source}: world: expected an object, got {world!r}")
+    world_size = (_number(world.get('width', WORLD_WIDTH), f"{source}: world.width", positive=True),
+                  _number(world.get('height', WORLD_HEIGHT), f"{source}: world.height", positive=True))
+    laps = data.get('laps', 1)
+    if isinstance(laps, bool) or not isinstance(laps, int) or laps < 1:
+        raise CourseError(f"{source}: laps must be a positive integer, got {laps!r}")
+
+    gates = data.get('gates')
+    if not isinstance(gates, list) or not gates:
+        raise CourseError(f"{source}: 'gates' must be a non-empty list")
+    gate_ids, specs, rows = [], [], {}
+    for i, spec in enumerate(gates):
+        where = f"{source}: gates[{i}]"
+        gate_id = str(spec.get('id', i)) if isinstance(spec, dict) else None
+        specs.append(_gate_spec(spec, where))
+        if gate_id in rows or gate_id in (START_GATE_ID, FINISH_GATE_ID):
+            raise CourseError(f"{where}: duplicate or reserved id {gate_id!r}")
+        rows[gate_id] = i
+        gate_ids.append(gate_id)
+        _check_inside(*specs[-1][:2], world_size, where)
+
+    sequence = data.get('sequence', gate_ids)
+    if not isinstance(sequence, list) or not sequence:
+        raise CourseError(f"{source}: 'sequence' must be a non-empty list")
+    lap_legs = []
+    for i, step in enumerate(sequence):
+        alternatives = step if isinstance(step, list) else [step]
+        if not alternatives:
+            raise CourseError(f"{source}: sequence[{i}] is empty")
+        for gate_id in alternatives:
+            if str(gate_id) not in rows:
+                raise CourseError(f"{source}: sequence[{i}] refers to unknown gate {gate_id!r}")
+        lap_legs.append(tuple(rows[str(gate_id)] for gate_id in alternatives))
+    legs = lap_legs * laps
+
+    for key, gate_id, first in (('start_line', START_GATE_ID, True), ('finish_line', FINISH_GATE_ID, False)):
+        if key in data:
+            specs.append(_gate_spec(data[key], f"{source}: {key}"))
+            _check_inside(*specs[-1][:2], world_size, f"{source}: {key}")
+            gate_ids.append(gate_id)
+            legs = [(len(specs) - 1,)] + legs if first else legs + [(len(specs) - 1,)]
+
+    start = None
+    if 'start' in data:
+        spec = data['start']
+        if not isinstance(spec, dict):
+            raise CourseError(f"{source}: start must be an object")
+        start = (_number(spec.get('x'), f"{source}: start.x"), _number(spec.get('y'), f"{source}: start.y"),
+                 _number(spec.get('heading', 0), f"{source}: start.heading") % 360)
+        _check_inside(*start[:2], world_size, f"{source}: start", 'position')
+    return Course(str(data.get('name', os.path.basename(source))), gate_ids, specs, legs, laps, world_size, start)
+
+
+def load_course(path):
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise CourseError(f"{path}: TOML courses need Python 3.11 or later")
+        with open(path, 'rb') as f:
+            try:
+                data = tomllib.load(f)
+            except (tomllib.TOMLDecodeError, UnicodeDecodeError) as e:
+                raise CourseError(f"{path}: {e}") from None
+    else:
+        with open(path, encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                raise CourseError(f"{path}: {e}") from None
+    return parse_course(data, path)
+
+
+class CourseSequence:
+    # Progress along the legs: which gates may score next. Only the current leg's
+    # gates are tested; once one of them scores, the leg's other alternatives are
+    # marked as done (0 points) and the next leg becomes current.
+    def __init__(self, legs):
+        self.legs = legs
+        self.leg = 0
+
+    @property
+    def finished(self):
+        return self.leg >= len(self.legs)
+
+    def active(self):
+        return self.legs[self.leg] if self.leg < len(self.legs) else ()
+
+    def advance(self, gates):
+        for i in self.legs[self.leg]:
+            gates[i].attempted_or_scored = True
+        self.leg += 1
+
+
+def random_course(n, width=WORLD_WIDTH * 10, height=WORLD_HEIGHT * 10, seed=0, laps=1):
+    # A course dict with n random gates, for tests and benchmarks
+    rng = random.Random(seed)
+    return {
+        'name': f"Random {n}",
+        'world': {'width': width, 'height': height},
+        'laps': laps,
+        'gates': [{'id': f"g{i}", 'x': round(rng.uniform(50, width - 50), 1), 'y': round(rng.uniform(50, height - 50), 1),
+                   'width': round(rng.uniform(80, 150), 1), 'heading': rng.choice((0, 90, 180, 270))}
+                  for i in range(n)],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate course files, or generate a random one")
+    parser.add_argument('courses', nargs='*')
+    parser.add_argument('--random', type=int, metavar='N', help="write a random N-gate course to --out")
+    parser.add_argument('--out', default='course.json')
+    args = parser.parse_args(argv)
+
+    if args.random:
+        with open(args.out, 'w') as f:
+            json.dump(random_course(args.random), f, indent=1)
+        print(f"{args.random} gates written to {args.out}")
+    status = 0
+    for path in args.courses:
+        start = time.perf_counter()
+        try:
+            course = load_course(path)
+        except (CourseError, OSError) as e:
+            print(e)
+            status = 1
+            continue
+        print(f"{path}: '{course.name}', {len(course)} gates, {len(course.legs)} legs, {course.laps} lap(s), "
+              f"world {course.world_size[0]:g}x{course.world_size[1]:g}, loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
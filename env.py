@@ -0,0 +1,285 @@
+import argparse
+import time
+
+import numpy as np
+
+from constants import *
+from fleet import Fleet
+from spatial import GateIndex
+from world import Controls, World, default_gates
+
+# Reinforcement-learning environments with the Gymnasium API (reset/step,
+# terminated/truncated), without depending on Gymnasium.
+#
+# Actions are one of 9 integers: (turn, boom) controls in {-1, 0, 1}^2, the
+# keys of the interactive mode (see ACTIONS). The reward is the gate points
+# scored during the step (plus an optional shaping term, ENV_PROGRESS_REWARD
+# per pixel sailed towards the next gate). An episode terminates once every
+# gate is done and is truncated after ENV_MAX_STEPS steps.
+#
+# SailingEnv wraps a World (one Boat and its Gates). VecSailingEnv steps n
+# environments in lockstep as one Fleet, with the gates scored for every boat
+# by GateIndex.check_passages; given the same actions, both produce the same
+# episodes (up to floating-point rounding). On a course, both only test the
+# gate of each boat's current leg, as World does with a CourseSequence.
+
+ACTIONS = tuple((turn, boom) for turn in (-1, 0, 1) for boom in (-1, 0, 1))
+_ACTION_TURN = np.array([turn for turn, _ in ACTIONS])
+_ACTION_BOOM = np.array([boom for _, boom in ACTIONS])
+
+OBSERVATION_FIELDS = (
+    'wind_sin', 'wind_cos', # Relative wind (wind direction - heading)
+    'speed', # Speed / BOAT_MAX_SPEED
+    'boom', # Boom deflection / BOOM_MAX_ANGLE_ADJUST (positive = port)
+    'gate_forward', 'gate_right', # Next gate center in the boat's frame / ENV_DISTANCE_SCALE
+    'gate_sin', 'gate_cos', # Next gate passage direction relative to the heading
+    'gates_left', # Fraction of the gates not done yet
+)
+
+
+def observe(x, y, angle, speed, boom, wind_direction, gate_x, gate_y, gate_heading, gates_left):
+    # Observation rows (float32, OBSERVATION_FIELDS order) from per-boat arrays
+    heading = np.radians(angle)
+    sin_h, cos_h = np.sin(heading), np.cos(heading)
+    dx, dy = gate_x - x, gate_y - y
+    wind = np.radians(wind_direction - angle)
+    gate = np.radians(gate_heading - angle)
+    return np.stack([
+        np.sin(wind), np.cos(wind),
+        speed / BOAT_MAX_SPEED,
+        boom / BOOM_MAX_ANGLE_ADJUST,
+        (dx * sin_h - dy * cos_h) / ENV_DISTANCE_SCALE,
+        (dx * cos_h + dy * sin_h) / ENV_DISTANCE_SCALE,
+        np.sin(gate), np.cos(gate),
+        gates_left,
+    ], axis=-1).astype(np.float32)
+
+
+class SailingEnv:
+    # One boat on the course of main_simulation() (or on a course.Course)
+    n_actions = len(ACTIONS)
+    observation_size = len(OBSERVATION_FIELDS)
+
+    def __init__(self, course=None, wind_direction=WIND_DIRECTION, wind_speed=WIND_SPEED, random_wind=False,
+                 max_steps=ENV_MAX_STEPS, progress_reward=ENV_PROGRESS_REWARD):
+        self.course = course
+        self.wind_direction = wind_direction
+        self.wind_speed = wind_speed
+        self.random_wind = random_wind # Draw the wind direction at every reset
+        self.max_steps = max_steps
+        self.progress_reward = progress_reward
+        self.rng = np.random.default_rng()
+        self.world = None
+        self.steps = 0
+
+    def _next_gate(self):
+        world = self.world
+        if world.sequence is not None:
+            active = world.sequence.active()
+            return world.gates[active[0]] if active else None
+        for gate in world.gates:
+            if not gate.attempted_or_scored:
+                return gate
+        return None
+
+    def _distance_to_gate(self, gate):
+        return 0.0 if gate is None else gate.center.distance_to((self.world.boat.x, self.world.boat.y))
+
+    def _observation(self):
+        boat = self.world.boat
+        gate = self._next_gate()
+        left = sum(not g.attempted_or_scored for g in self.world.gates) / len(self.world.gates)
+        if gate is None:
+            gate_x, gate_y, gate_heading = boat.x, boat.y, boat.angle
+        else:
+            gate_x, gate_y, gate_heading = gate.center.x, gate.center.y, gate.orientation_deg
+        return observe(boat.x, boat.y, boat.angle, boat.speed, boat.boom_deflection_from_aft,
+                       self.world.wind_direction, gate_x, gate_y, gate_heading, left)
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        wind_direction = self.rng.uniform(0, 360) if self.random_wind else self.wind_direction
+        if self.course is not None:
+            self.world = World.from_course(self.course)
+            self.world.wind_direction, self.world.wind_speed = wind_direction, self.wind_speed
+        else:
+            self.world = World(wind_direction=wind_direction, wind_speed=self.wind_speed)
+        self.steps = 0
+        return self._observation(), {}
+
+    def step(self, action):
+        turn, boom = ACTIONS[action]
+        world = self.world
+        gate = self._next_gate()
+        distance = self._distance_to_gate(gate)
+        score = world.score
+        world.tick(Controls(turn=turn, boom=boom))
+        self.steps += 1
+
+        reward = float(world.score - score)
+        if self.progress_reward and gate is not None and not gate.attempted_or_scored:
+            reward += self.progress_reward * (distance - self._distance_to_gate(gate))
+        terminated = all(g.attempted_or_scored for g in world.gates)
+        truncated = not terminated and self.steps >= self.max_steps
+        return self._observation(), reward, terminated, truncated, {'score': world.score}
+
+
+class VecSailingEnv:
+    # n SailingEnvs stepped together with array operations. step() takes one
+    # action per environment and returns batched results; environments whose
+    # episode ended are reset automatically (their last observation is in
+    # info['final_observation'], as with Gymnasium's vector environments).
+    n_actions = len(ACTIONS)
+    observation_size = len(OBSERVATION_FIELDS)
+
+    def __init__(self, n, course=None, wind_direction=WIND_DIRECTION, wind_speed=WIND_SPEED, random_wind=False,
+                 max_steps=ENV_MAX_STEPS, progress_reward=ENV_PROGRESS_REWARD, seed=None):
+        if course is not None:
+            gates, legs = course.gates()
+            if any(len(leg) > 1 for leg in legs):
+                raise ValueError("VecSailingEnv needs a course without alternative gates")
+            world_size, start = course.world_size, course.start
+            # Gate of each leg, sailed in order (None: any gate at any time, as without a course)
+            self.leg_gate = np.array([leg[0] for leg in legs])
+        else:
+            gates, world_size, start = default_gates(False), (WORLD_WIDTH, WORLD_HEIGHT), None
+            self.leg_gate = None
+        self.n = n
+        self.gate_index = GateIndex(gates, (0, 0) + tuple(world_size))
+        self.n_gates = len(gates)
+        self.gate_heading = np.array([gate.orientation_deg for gate in gates], dtype=float)
+        self.start = start if start is not None else (INITIAL_BOAT_X, INITIAL_BOAT_Y, 0)
+        self.default_wind = wind_direction
+        self.wind_speed = wind_speed
+        self.random_wind = random_wind
+        self.max_steps = max_steps
+        self.progress_reward = progress_reward
+        self.rng = np.random.default_rng(seed)
+
+        self.fleet = Fleet(n)
+        self.fleet.world_width, self.fleet.world_height = world_size
+        self.attempted = np.zeros((n, self.n_gates), dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.leg = np.zeros(n, dtype=np.int64) # Current leg of each boat (with a course)
+        self.wind_direction = np.full(n, float(wind_direction))
+        self._rows = np.arange(n)
+
+    def _reset_rows(self, rows):
+        fleet = self.fleet
+        x, y, heading = self.start
+        fleet.x[rows] = fleet.x_prev[rows] = x
+        fleet.y[rows] = fleet.y_prev[rows] = y
+        fleet.angle[rows] = heading
+        fleet.speed[rows] = 0
+        fleet.current_aoa_boom_plane[rows] = 0
+        fleet.boom_deflection_from_aft[rows] = 0
+        fleet.boom_angle_relative_to_boat[rows] = 180.0
+        self.attempted[rows] = False
+        self.score[rows] = 0
+        self.steps[rows] = 0
+        self.leg[rows] = 0
+        if self.random_wind:
+            self.wind_direction[rows] = self.rng.uniform(0, 360, len(rows))
+
+    def _next_gates(self):
+        # Index of each boat's next gate (in course order) and whether all are done
+        done = self.attempted.all(axis=1)
+        if self.leg_gate is not None:
+            return self.leg_gate[np.minimum(self.leg, len(self.leg_gate) - 1)], done
+        return np.argmin(self.attempted, axis=1), done
+
+    def _distances(self, gate):
+        center = self.gate_index.center[gate]
+        return np.hypot(center[:, 0] - self.fleet.x, center[:, 1] - self.fleet.y)
+
+    def _observations(self):
+        fleet = self.fleet
+        gate, done = self._next_gates()
+        center = self.gate_index.center[gate]
+        gate_x = np.where(done, fleet.x, center[:, 0])
+        gate_y = np.where(done, fleet.y, center[:, 1])
+        gate_heading = np.where(done, fleet.angle, self.gate_heading[gate])
+        left = 1 - self.attempted.sum(axis=1) / self.n_gates
+        return observe(fleet.x, fleet.y, fleet.angle, fleet.speed, fleet.boom_deflection_from_aft,
+                       self.wind_direction, gate_x, gate_y, gate_heading, left)
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.wind_direction[:] = self.default_wind
+        self._reset_rows(self._rows)
+        return self._observations(), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        fleet = self.fleet
+        gate, _ = self._next_gates()
+        if self.progress_reward:
+            distance = self._distances(gate)
+
+        # Same order as World.tick: controls, physics, gates
+        fleet.rotate(_ACTION_TURN[actions] * BOAT_TURN_SPEED)
+        fleet.adjust_boom(_ACTION_BOOM[actions] * BOOM_ADJUST_SPEED)
+        fleet.update(self.wind_direction, self.wind_speed)
+        x0, y0 = fleet.move_start()
+        if self.leg_gate is None:
+            score_change, _ = self.gate_index.check_passages(x0, y0, fleet.x, fleet.y, self.attempted)
+        else:
+            # Only the current leg's gate can score: every other gate is passed in as attempted
+            attempted = np.ones_like(self.attempted)
+            attempted[self._rows, gate] = self.attempted[self._rows, gate]
+            score_change, _ = self.gate_index.check_passages(x0, y0, fleet.x, fleet.y, attempted)
+            self.attempted[self._rows, gate] = attempted[self._rows, gate]
+            self.leg += attempted[self._rows, gate]
+        self.score += score_change
+        self.steps += 1
+
+        rewards = score_change.astype(float)
+        if self.progress_reward:
+            still_next = ~self.attempted[self._rows, gate]
+            rewards += np.where(still_next, self.progress_reward * (distance - self._distances(gate)), 0)
+        terminated = self.attempted.all(axis=1)
+        truncated = ~terminated & (self.steps >= self.max_steps)
+        observations = self._observations()
+        info = {'score': self.score.copy()}
+        ended = np.flatnonzero(terminated | truncated)
+        if len(ended):
+            info['final_observation'] = observations[ended]
+            info['final_score'] = self.score[ended]
+            info['ended'] = ended
+            self._reset_rows(ended)
+            observations[ended] = self._observations()[ended]
+        return observations, rewards, terminated, truncated, info
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the throughput of the environments with random actions")
+    parser.add_argument('--envs', type=int, default=4096, help="environments in the vectorized env")
+    parser.add_argument('--steps', type=int, default=300)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    env = SailingEnv()
+    env.reset(seed=0)
+    start = time.perf_counter()
+    for action in rng.integers(0, len(ACTIONS), args.steps * 10):
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+    elapsed = time.perf_counter() - start
+    print(f"SailingEnv: {args.steps * 10 / elapsed:,.0f} steps/s")
+
+    env = VecSailingEnv(args.envs, random_wind=True, seed=0)
+    env.reset()
+    actions = rng.integers(0, len(ACTIONS), (args.steps, args.envs))
+    start = time.perf_counter()
+    for step_actions in actions:
+        env.step(step_actions)
+    elapsed = time.perf_counter() - start
+    print(f"VecSailingEnv ({args.envs} envs): {args.steps * args.envs / elapsed:,.0f} steps/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+from multiprocessing import Pool
+
+import boat as boat_module
+from autopilot import Autopilot, angle_difference, get_trim_table
+from constants import *
+from world import World
+
+# Batch evaluation of boat constants and trim strategies on the course of
+# main_simulation(): every run sails one lap headless in a worker process and
+# its result is appended to a CSV file as soon as it is done.
+#
+#   python evaluator.py --grid BOAT_ACCELERATION=0.01,0.02,0.03 --grid wind_direction=0,45,90 --out runs.csv
+#   python evaluator.py --random 500 --range WATER_RESISTANCE_FACTOR=0.005:0.02 --range wind_direction=0:360 --out runs.csv
+#
+# Re-running with the same arguments and output file resumes: runs already in the file are skipped.
+
+# Constants read by Boat.update that a run may override (patched in the boat module;
+# the policy is given the boom range explicitly, see CoursePolicy)
+PHYSICS_PARAMETERS = (
+    'BOAT_ACCELERATION', 'BOAT_MAX_SPEED', 'WATER_RESISTANCE_FACTOR',
+    'HULL_SAIL_EFFECT_FACTOR', 'BOOM_MAX_ANGLE_ADJUST', 'DEFAULT_BOOM_OUT_ANGLE',
+)
+# Other per-run settings and their defaults
+RUN_DEFAULTS = {
+    'wind_direction': WIND_DIRECTION,
+    'wind_speed': WIND_SPEED,
+    'trim': 'half_wind', # 'half_wind' (boom at half the relative wind angle), 'optimal' (autopilot trim table) or 'fixed'
+    'trim_deflection': 30, # Boom deflection used by the 'fixed' trim
+    'no_go': 45, # Closest angle to the wind the pilot will sail
+}
+EVALUATOR_MAX_SECONDS = 180 # A lap not finished by then is recorded as unfinished
+RESULT_FIELDS = ['run_id', 'parameters', 'finished', 'lap_time', 'score', 'gates', 'ticks']
+
+
+class CoursePolicy(Autopilot):
+    # The autopilot sailing the course, with the boom trimmed by strategy.
+    # max_deflection: the boom range of the boats it sails (BOOM_MAX_ANGLE_ADJUST of the run)
+    def __init__(self, trim='half_wind', trim_deflection=30, no_go=45, max_deflection=BOOM_MAX_ANGLE_ADJUST):
+        super().__init__(no_go=no_go, trim_table=get_trim_table(max_deflection=max_deflection))
+        self.trim = trim
+        self.trim_deflection = trim_deflection
+        self.max_deflection = max_deflection
+
+    def trim_boom(self, world):
+        if self.trim == 'optimal':
+            return super().trim_boom(world)
+        boat = world.boat
+        if self.trim == 'fixed':
+            wanted = self.trim_deflection
+        else:
+            relative_wind = abs(angle_difference(world.wind_direction, boat.angle))
+            wanted = relative_wind / 2
+        wanted = min(wanted, self.max_deflection)
+        magnitude = abs(boat.boom_deflection_from_aft)
+        if abs(wanted - magnitude) < BOOM_ADJUST_SPEED / 2 or boat.boom_deflection_from_aft == 0:
+            return 0
+        side = 1 if boat.boom_deflection_from_aft > 0 else -1
+        return side if wanted > magnitude else -side
+
+
+def run_lap(parameters, max_seconds=EVALUATOR_MAX_SECONDS):
+    # Sails one lap with the given parameters in this process and returns its result
+    settings = dict(RUN_DEFAULTS)
+    settings.update({k: v for k, v in parameters.items() if k in RUN_DEFAULTS})
+    overrides = {k: v for k, v in parameters.items() if k in PHYSICS_PARAMETERS}
+    saved = {name: getattr(boat_module, name) for name in overrides}
+    try:
+        for name, value in overrides.items():
+            setattr(boat_module, name, value)
+        world = World(wind_direction=settings['wind_direction'], wind_speed=settings['wind_speed'])
+        policy = CoursePolicy(settings['trim'], settings['trim_deflection'], settings['no_go'],
+                              overrides.get('BOOM_MAX_ANGLE_ADJUST', BOOM_MAX_ANGLE_ADJUST))
+        lap_time = None
+        for _ in range(int(max_seconds * PHYSICS_FPS)):
+            world.tick(policy(world))
+            if sum(gate.attempted_or_scored for gate in world.gates) == len(world.gates):
+                lap_time = world.time
+                break
+    finally:
+        for name, value in saved.items():
+            setattr(boat_module, name, value)
+    return {
+        'finished': lap_time is not None,
+        'lap_time': lap_time,
+        'score': world.score,
+        'gates': ' '.join(str(gate.points) for gate in world.gates),
+        'ticks': world.tick_count,
+    }
+
+
+def _run_job(job):
+    run_id, parameters, max_seconds = job
+    result = run_lap(parameters, max_seconds)
+    result['run_id'] = run_id
+    result['parameters'] = format_parameters(parameters)
+    return result
+
+
+def format_parameters(parameters):
+    return ';'.join(f"{k}={v}" for k, v in sorted(parameters.items()))
+
+
+def parse_value(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def grid(axes):
+    # axes: {name: [values]} -> every combination, in a stable order
+    names = sorted(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+def random_sample(ranges, n, seed=0, fixed=None):
+    # ranges: {name: (low, high)} sampled uniformly; fixed: {name: value} copied into every run
+    rng = random.Random(seed)
+    runs = []
+    for _ in range(n):
+        parameters = dict(fixed or {})
+        for name in sorted(ranges):
+            low, high = ranges[name]
+            parameters[name] = rng.uniform(low, high)
+        runs.append(parameters)
+    return runs
+
+
+def completed_runs(path):
+    # run_id -> parameters of runs already in the output file
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline='') as f:
+        return {int(row['run_id']): row['parameters'] for row in csv.DictReader(f)}
+
+
+def evaluate(runs, out_path, workers=None, max_seconds=EVALUATOR_MAX_SECONDS, chunksize=1):
+    # Runs every parameter set on a process pool and streams the results to out_path.
+    # Returns the number of runs executed (runs already in the file are skipped).
+    done = completed_runs(out_path)
+    jobs = []
+    for run_id, parameters in enumerate(runs):
+        if run_id in done:
+            if done[run_id] != format_parameters(parameters):
+                raise ValueError(f"{out_path} was written for different runs (run {run_id}: {done[run_id]})")
+            continue
+        jobs.append((run_id, parameters, max_seconds))
+    if not jobs:
+        return 0
+
+    new_file = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    with open(out_path, 'a', newline='') as f, Pool(workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if new_file:
+            writer.writeheader()
+        for result in pool.imap_unordered(_run_job, jobs, chunksize):
+            writer.writerow(result)
+            f.flush() # Every finished run survives an interruption
+    return len(jobs)
+
+
+def _parse_axis(text, separator):
+    name, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUES, got {text!r}")
+    return name, [parse_value(v) for v in values.split(separator)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch lap evaluation of boat parameters")
+    parser.add_argument('--grid', action='append', default=[], metavar='NAME=V1,V2,...',
+                        help="values of one parameter; all combinations are run")
+    parser.add_argument('--random', type=int, metavar='N', help="sample N runs from the --range parameters")
+    parser.add_argument('--range', action='append', default=[], metavar='NAME=LOW:HIGH')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='evaluation.csv')
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--max-seconds', type=float, default=EVALUATOR_MAX_SECONDS)
+    args = parser.parse_args(argv)
+
+    axes = dict(_parse_axis(text, ',') for text in args.grid)
+    for name in list(axes) + [text.partition('=')[0] for text in args.range]:
+        if name not in PHYSICS_PARAMETERS and name not in RUN_DEFAULTS:
+            parser.error(f"unknown parameter {name}")
+    if args.random:
+        ranges = {name: tuple(values) for name, values in (_parse_axis(t, ':') for t in args.range)}
+        runs = [dict(fixed, **sampled)
+                for fixed in grid(axes)
+                for sampled in random_sample(ranges, args.random, args.seed)]
+    else:
+        runs = grid(axes)
+
+    executed = evaluate(runs, args.out, args.workers, args.max_seconds)
+    print(f"{executed} runs evaluated, {len(runs) - executed} already in {args.out}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import numpy as np
+
+from boat import BOAT_STATE_FIELDS, Boat
+from constants import (
+    BOAT_LENGTH,
+    WORLD_WIDTH, WORLD_HEIGHT,
+    INITIAL_BOAT_X, INITIAL_BOAT_Y,
+    BOAT_ACCELERATION, BOAT_MAX_SPEED,
+    BOOM_MAX_ANGLE_ADJUST, DEFAULT_BOOM_OUT_ANGLE,
+    WATER_RESISTANCE_FACTOR, HULL_SAIL_EFFECT_FACTOR,
+    PHYSICS_DT,
+)
+
+# Per-boat state stored as one array per field (struct-of-arrays).
+# Names match the Boat attributes so a FleetBoat can expose a row as a Boat.
+FLEET_FIELDS = BOAT_STATE_FIELDS
+
+
+def speeds_over_ticks(speed, acceleration, ticks):
+    # boat.speed_over_ticks for arrays of boats
+    q = 1 - WATER_RESISTANCE_FACTOR
+    terminal = acceleration * q / WATER_RESISTANCE_FACTOR
+    limit = np.where(terminal < 0, -BOAT_MAX_SPEED, BOAT_MAX_SPEED)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        capped_after = np.floor(np.log((limit - terminal) / (speed - terminal)) / np.log(q))
+    free = np.where(np.abs(terminal) > BOAT_MAX_SPEED, np.clip(capped_after, 0, ticks), ticks)
+    decay = q ** free
+    distance = free * terminal + (speed - terminal) * q * (1 - decay) / WATER_RESISTANCE_FACTOR
+    capped = free < ticks
+    return (np.where(capped, limit, terminal + (speed - terminal) * decay),
+            distance + np.where(capped, (ticks - free) * limit, 0))
+
+
+class Fleet:
+    thrust_table = None # Optional polar.PolarTable used as the thrust source, like Boat.thrust_table
+    world_width = WORLD_WIDTH # Wrap-around size, like Boat.world_width
+    world_height = WORLD_HEIGHT
+
+    def __init__(self, n, x=INITIAL_BOAT_X, y=INITIAL_BOAT_Y):
+        self.n = n
+        self.x = np.zeros(n) + x
+        self.y = np.zeros(n) + y
+        self.angle = np.zeros(n)  # Headings in degrees (0 = North, 90 = East)
+        self.speed = np.zeros(n)
+        self.x_prev = self.x.copy()
+        self.y_prev = self.y.copy()
+        self.current_aoa_boom_plane = np.zeros(n)
+        self.boom_deflection_from_aft = np.zeros(n)  # Positive=Port, Negative=Starboard
+        self.boom_angle_relative_to_boat = np.full(n, 180.0)
+        self._views = {}
+
+    @classmethod
+    def from_boats(cls, boats):
+        fleet = cls(len(boats))
+        for i, boat in enumerate(boats):
+            for name in FLEET_FIELDS:
+                getattr(fleet, name)[i] = getattr(boat, name)
+        return fleet
+
+    def __len__(self):
+        return self.n
+
+    def boat(self, index):
+        # Views are cached so their sprite is only built once per boat
+        view = self._views.get(index)
+        if view is None:
+            view = self._views[index] = FleetBoat(self, index)
+        return view
+
+    def in_rect(self, x0, y0, x1, y1, margin=BOAT_LENGTH):
+        # Indices of the boats inside a world rect (e.g. Camera.view_rect()), for culling
+        inside = (self.x >= x0 - margin) & (self.x <= x1 + margin) & (self.y >= y0 - margin) & (self.y <= y1 + margin)
+        return np.flatnonzero(inside)
+
+    def move_start(self):
+        # Start of each boat's last move for gate checks (same as Boat.move_start):
+        # boats that wrapped around the world edge did not cross it, so their move starts where they are
+        wrapped = (np.abs(self.x - self.x_prev) > self.world_width / 2) | (np.abs(self.y - self.y_prev) > self.world_height / 2)
+        return np.where(wrapped, self.x, self.x_prev), np.where(wrapped, self.y, self.y_prev)
+
+    def rotate(self, degrees):
+        # degrees may be a scalar or one value per boat
+        self.angle = (self.angle + degrees) % 360
+
+    def adjust_boom(self, amount):
+        self.boom_deflection_from_aft = np.clip(
+            self.boom_deflection_from_aft + amount, -BOOM_MAX_ANGLE_ADJUST, BOOM_MAX_ANGLE_ADJUST)
+
+    def update(self, wind_direction_global, wind_speed_global, dt=PHYSICS_DT):
+        # Same model as Boat.update, one array operation per step for the whole fleet.
+        # Wind direction/speed may be scalars or one value per boat.
+        ticks = dt / PHYSICS_DT
+        self.x_prev = self.x.copy()
+        self.y_prev = self.y.copy()
+
+        # --- Automatic boom passage (gybe/tack) ---
+        wind_angle_rel_boat_zero_bow = (wind_direction_global - self.angle + 360) % 360
+        wind_favors_port_boom = (0 < wind_angle_rel_boat_zero_bow) & (wind_angle_rel_boat_zero_bow < 180)
+        wind_favors_starboard_boom = (180 < wind_angle_rel_boat_zero_bow) & (wind_angle_rel_boat_zero_bow < 360)
+
+        deflection = self.boom_deflection_from_aft
+        current_deflection_magnitude = np.abs(deflection)
+        default_out = min(DEFAULT_BOOM_OUT_ANGLE, BOOM_MAX_ANGLE_ADJUST) if BOOM_MAX_ANGLE_ADJUST > 0 else 0
+        # Centered booms get the default deflection, otherwise the magnitude is kept and the side flips
+        flipped_magnitude = np.where(current_deflection_magnitude == 0, default_out, current_deflection_magnitude)
+
+        to_port = wind_favors_port_boom & (deflection <= 0)
+        to_starboard = wind_favors_starboard_boom & (deflection >= 0)
+        deflection = np.where(to_port, flipped_magnitude, deflection)
+        deflection = np.where(to_starboard, -flipped_magnitude, deflection)
+        self.boom_deflection_from_aft = deflection
+
+        self.boom_angle_relative_to_boat = (180.0 + deflection + 360) % 360
+
+        # --- Physics Calculation ---
+        effective_boom_angle_global = (self.angle + self.boom_angle_relative_to_boat) % 360
+        angle_of_attack_on_boom = (wind_direction_global - effective_boom_angle_global + 180) % 360 - 180
+        self.current_aoa_boom_plane = angle_of_attack_on_boom
+
+        if self.thrust_table is not None:
+            total_thrust_coefficient = self.thrust_table.lookup_many(wind_angle_rel_boat_zero_bow, deflection)
+        else:
+            force_on_boom_plane_coeff = np.sin(np.radians(angle_of_attack_on_boom))
+            thrust_factor = force_on_boom_plane_coeff * np.sin(np.radians(self.boom_angle_relative_to_boat))
+
+            angle_for_hull_cosine = (wind_direction_global - self.angle + 180) % 360
+            hull_thrust_component = np.cos(np.radians(angle_for_hull_cosine)) * HULL_SAIL_EFFECT_FACTOR
+            total_thrust_coefficient = thrust_factor + hull_thrust_component
+
+        acceleration = total_thrust_coefficient * wind_speed_global * BOAT_ACCELERATION
+        if ticks == 1:
+            speed = self.speed + acceleration
+            speed -= speed * WATER_RESISTANCE_FACTOR
+            self.speed = distance = np.clip(speed, -BOAT_MAX_SPEED, BOAT_MAX_SPEED)
+        else:
+            self.speed, distance = speeds_over_ticks(self.speed, acceleration, ticks)
+
+        # Movement
+        heading_rad = np.radians(self.angle)
+        x = self.x + distance * np.sin(heading_rad)
+        y = self.y - distance * np.cos(heading_rad)  # Subtract because Pygame Y is inverted
+
+        # Keep boats in the world (same wrap-around as Boat.update)
+        x = np.where(x > self.world_width, 0, x)
+        x = np.where(x < 0, self.world_width, x)
+        y = np.where(y > self.world_height, 0, y)
+        y = np.where(y < 0, self.world_height, y)
+        self.x = x
+        self.y = y
+
+
+def _row_property(name):
+    def fget(self):
+        return float(getattr(self.fleet, name)[self.index])
+
+    def fset(self, value):
+        getattr(self.fleet, name)[self.index] = value
+
+    return property(fget, fset)
+
+
+class FleetBoat(Boat):
+    # A Boat whose state lives in one row of a Fleet. Reads and writes go
+    # straight to the fleet arrays, so Boat.rotate/adjust_boom/update/draw
+    # keep working on it and stay in sync with Fleet.update.
+    x = _row_property('x')
+    y = _row_property('y')
+    angle = _row_property('angle')
+    speed = _row_property('speed')
+    x_prev = _row_property('x_prev')
+    y_prev = _row_property('y_prev')
+    current_aoa_boom_plane = _row_property('current_aoa_boom_plane')
+    boom_deflection_from_aft = _row_property('boom_deflection_from_aft')
+    boom_angle_relative_to_boat = _row_property('boom_angle_relative_to_boat')
+
+    def __init__(self, fleet, index):
+        self.fleet = fleet
+        self.index = index
+        self.boom_pivot_offset_y = BOAT_LENGTH * 0.4 # Same pivot as Boat: 40% from bow
+        self._build_image()
@@ -0,0 +1,140 @@
+import pygame
+import math
+
+from collision import line_crossing_time, swept_circle_time
+from constants import *
+
+
+class Gate:
+    # geometry: optional precomputed ((passage_x, passage_y), (line_x, line_y)) unit
+    # vectors, as stored by course files, to skip deriving them from the angle
+    def __init__(self, center_x, center_y, width, orientation_angle_deg, verbose=True, swept=GATE_SWEPT_COLLISION, geometry=None):
+        self.center = pygame.math.Vector2(center_x, center_y)
+        self.width = width
+        self.orientation_deg = orientation_angle_deg # 0=North, 90=East (direction of valid passage)
+        self.buoy_radius = GATE_BUOY_RADIUS
+        self.passed_successfully = False
+        self.attempted_or_scored = False # Flag to ensure gate is scored/penalized only once
+        self.verbose = verbose # Print passage results (disabled for headless runs)
+        self.swept = swept # Test the whole move instead of the end position only
+        self.impact_time = None # Fraction of the step at which the gate was scored
+        self.points = 0 # Points given when the gate was scored
+
+        if geometry is not None:
+            self.passage_direction_vec = pygame.math.Vector2(geometry[0])
+            self.gate_line_vec_ps = pygame.math.Vector2(geometry[1])
+        else:
+            # Passage direction vector (normalized)
+            self.passage_direction_vec = pygame.math.Vector2(
+                math.sin(math.radians(self.orientation_deg)),
+                -math.cos(math.radians(self.orientation_deg)) # Pygame Y is inverted, -cos for North=0deg up
+            ).normalize()
+
+            # Vector along the gate line (perpendicular to passage direction), from port to starboard buoy
+            self.gate_line_vec_ps = pygame.math.Vector2(
+                self.passage_direction_vec.y,
+                -self.passage_direction_vec.x
+            ).normalize()
+
+        half_width = self.width / 2
+        self.port_buoy_pos = self.center - self.gate_line_vec_ps * half_width
+        self.starboard_buoy_pos = self.center + self.gate_line_vec_ps * half_width
+
+        self.port_color = RED
+        self.starboard_color = GREEN
+
+    def draw(self, surface, camera=None):
+        # Returns the bounding rect of both buoys (for dirty-rect rendering).
+        # Without a camera, world coordinates are screen pixels.
+        if camera is None:
+            port, starboard, radius = self.port_buoy_pos, self.starboard_buoy_pos, self.buoy_radius
+        else:
+            port = pygame.math.Vector2(camera.world_to_screen(self.port_buoy_pos.x, self.port_buoy_pos.y))
+            starboard = pygame.math.Vector2(camera.world_to_screen(self.starboard_buoy_pos.x, self.starboard_buoy_pos.y))
+            radius = max(1, round(self.buoy_radius * camera.zoom))
+        dirty = pygame.draw.circle(surface, self.port_color, (int(port.x), int(port.y)), radius)
+        dirty.union_ip(pygame.draw.circle(surface, self.starboard_color, (int(starboard.x), int(starboard.y)), radius))
+        # Optional: Draw line indicating passage direction
+        # end_line = self.center + self.passage_direction_vec * (self.width / 2)
+        # pygame.draw.line(surface, WHITE, self.center, end_line, 1)
+        return dirty
+
+    def _record(self, points, impact_time, message):
+        self.attempted_or_scored = True
+        self.impact_time = impact_time
+        self.points = points
+        if points == POINTS_VALID_PASSAGE:
+            self.passed_successfully = True
+        if self.verbose: print(f"Gate {self.center}: {message}")
+        return points
+
+    def check_passage(self, boat_pos_prev_tuple, boat_pos_curr_tuple):
+        if self.attempted_or_scored:
+            return 0
+        if self.swept:
+            return self._check_passage_swept(boat_pos_prev_tuple, boat_pos_curr_tuple)
+
+        boat_pos_curr = pygame.math.Vector2(boat_pos_curr_tuple)
+        boat_pos_prev = pygame.math.Vector2(boat_pos_prev_tuple)
+
+        # 1. Check for collision with buoys
+        # Using BOAT_WIDTH/2 as an approximate radius for the boat for collision
+        if boat_pos_curr.distance_to(self.port_buoy_pos) < self.buoy_radius + BOAT_WIDTH / 2:
+            return self._record(POINTS_HIT_BUOY, 1.0, "Hit port buoy!")
+        if boat_pos_curr.distance_to(self.starboard_buoy_pos) < self.buoy_radius + BOAT_WIDTH / 2:
+            return self._record(POINTS_HIT_BUOY, 1.0, "Hit starboard buoy!")
+
+        # 2. Check for crossing the gate line
+        dist_prev = (boat_pos_prev - self.port_buoy_pos).dot(self.passage_direction_vec)
+        dist_curr = (boat_pos_curr - self.port_buoy_pos).dot(self.passage_direction_vec)
+
+        if (dist_prev < 0 and dist_curr >= 0): # Crossed from "behind" to "in front" (correct direction)
+            projection_on_gate_line = (boat_pos_curr - self.center).dot(self.gate_line_vec_ps)
+            if abs(projection_on_gate_line) < self.width / 2: # Crossed between buoys
+                return self._record(POINTS_VALID_PASSAGE, 1.0, "Passed successfully!")
+            else: # Crossed outside buoys but in correct direction through the line
+                return self._record(POINTS_PASSED_OUTSIDE, 1.0, "Passed outside buoys (correct direction).")
+        elif (dist_prev >= 0 and dist_curr < 0): # Crossed from "in front" to "behind" (wrong direction)
+            projection_on_gate_line = (boat_pos_curr - self.center).dot(self.gate_line_vec_ps)
+            if abs(projection_on_gate_line) < self.width / 2: # Crossed between buoys but wrong way
+                return self._record(POINTS_WRONG_DIRECTION, 1.0, "Passed in wrong direction.")
+        return 0
+
+    def _check_passage_swept(self, boat_pos_prev_tuple, boat_pos_curr_tuple):
+        # Same rules as the discrete test, but applied to the whole move prev -> curr
+        # so fast boats (or large time steps) cannot tunnel through buoys or gates.
+        # self.impact_time gets the fraction of the step at which the event happened.
+        # The move is a straight segment: callers pass Boat.move_start() as prev, so a
+        # wrap around the world edge is not swept across the whole world.
+        (x0, y0), (x1, y1) = boat_pos_prev_tuple, boat_pos_curr_tuple
+        hit_radius = self.buoy_radius + BOAT_WIDTH / 2
+
+        # 1. Buoy contact anywhere along the move (buoy hits take precedence, as above)
+        t_port = swept_circle_time(x0, y0, x1, y1, self.port_buoy_pos.x, self.port_buoy_pos.y, hit_radius)
+        t_starboard = swept_circle_time(x0, y0, x1, y1, self.starboard_buoy_pos.x, self.starboard_buoy_pos.y, hit_radius)
+        if t_port is not None and (t_starboard is None or t_port <= t_starboard):
+            return self._record(POINTS_HIT_BUOY, t_port, f"Hit port buoy! (t={t_port:.2f})")
+        if t_starboard is not None:
+            return self._record(POINTS_HIT_BUOY, t_starboard, f"Hit starboard buoy! (t={t_starboard:.2f})")
+
+        # 2. Crossing the gate line, judged at the point where the move crosses it
+        passage = self.passage_direction_vec
+        dist_prev = (x0 - self.port_buoy_pos.x) * passage.x + (y0 - self.port_buoy_pos.y) * passage.y
+        dist_curr = (x1 - self.port_buoy_pos.x) * passage.x + (y1 - self.port_buoy_pos.y) * passage.y
+        forward = dist_prev < 0 and dist_curr >= 0
+        backward = dist_prev >= 0 and dist_curr < 0
+        if not (forward or backward):
+            return 0
+
+        t = line_crossing_time(dist_prev, dist_curr)
+        cross_x = x0 + (x1 - x0) * t
+        cross_y = y0 + (y1 - y0) * t
+        projection_on_gate_line = (cross_x - self.center.x) * self.gate_line_vec_ps.x + (cross_y - self.center.y) * self.gate_line_vec_ps.y
+        between_buoys = abs(projection_on_gate_line) < self.width / 2
+        if forward and between_buoys:
+            return self._record(POINTS_VALID_PASSAGE, t, f"Passed successfully! (t={t:.2f})")
+        if forward:
+            return self._record(POINTS_PASSED_OUTSIDE, t, f"Passed outside buoys (correct direction). (t={t:.2f})")
+        if between_buoys:
+            return self._record(POINTS_WRONG_DIRECTION, t, f"Passed in wrong direction. (t={t:.2f})")
+        return 0
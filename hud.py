@@ -0,0 +1,192 @@
+import math
+from collections import OrderedDict
+
+import pygame
+
+from constants import *
+
+# Fonts are looked up once per (name, size) instead of every frame
+_fonts = {}
+
+
+def get_font(size, name=HUD_FONT_NAME):
+    font = _fonts.get((name, size))
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _fonts[(name, size)] = pygame.font.SysFont(name, size)
+    return font
+
+
+class TextCache:
+    # Rendered text surfaces keyed by (text, color, size), least recently used evicted first
+    def __init__(self, max_entries=HUD_TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, color=WHITE, size=HUD_FONT_SIZE):
+        key = (text, color, size)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self._surfaces[key] = get_font(size).render(text, True, color)
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def __len__(self):
+        return len(self._surfaces)
+
+
+class TextWidget:
+    # One line of text at a fixed position, only re-rendered when its text changes
+    def __init__(self, text_cache, pos, template, size=HUD_FONT_SIZE, color=WHITE):
+        self.text_cache = text_cache
+        self.pos = pos
+        self.template = template
+        self.size = size
+        self.color = color
+        self.text = None
+        self.surface = None
+        self.rect = None
+
+    def set(self, *values):
+        text = self.template.format(*values)
+        if text == self.text:
+            return False
+        self.text = text
+        self.surface = self.text_cache.render(text, self.color, self.size)
+        self.rect = self.surface.get_rect(topleft=self.pos)
+        return True
+
+    def draw(self, surface):
+        surface.blit(self.surface, self.rect)
+        return self.rect
+
+
+class WindIndicator:
+    # Wind and heading dial. The static ring is pre-rendered once; the arrows are
+    # redrawn on the indicator's own surface only when wind or heading change.
+    def __init__(self, center=(SCREEN_WIDTH - 50, 50), radius=30):
+        self.center = center
+        self.radius = radius
+        half_size = radius + 10 # Room for the arrowheads
+        self.local_center = (half_size, half_size)
+        self.dial = pygame.Surface((2 * half_size, 2 * half_size), pygame.SRCALPHA)
+        pygame.draw.circle(self.dial, WHITE, self.local_center, radius, 1)
+        self.surface = self.dial.copy()
+        self.rect = self.surface.get_rect(center=center)
+        self.state = None
+
+    def set(self, wind_dir, boat_angle):
+        state = (wind_dir, boat_angle)
+        if state == self.state:
+            return False
+        self.state = state
+        self.surface.fill((0, 0, 0, 0))
+        self.surface.blit(self.dial, (0, 0))
+        self._draw_arrows(self.surface, wind_dir, boat_angle)
+        return True
+
+    def _draw_arrows(self, surface, wind_dir, boat_angle):
+        center_x, center_y = self.local_center
+        radius = self.radius
+
+        # --- Wind Arrow ---
+        wind_arrow_len = radius * 0.8
+        end_x = center_x - wind_arrow_len * math.sin(math.radians(wind_dir))
+        end_y = center_y + wind_arrow_len * math.cos(math.radians(wind_dir))
+        pygame.draw.line(surface, YELLOW, (center_x, center_y), (end_x, end_y), 2)
+
+        # Arrowhead for wind (points towards the center, as wind comes FROM this direction)
+        arrow_angle = math.radians(wind_dir) # Angle of the line itself
+        arrow_head_len = 8
+        arrow_head_angle_offset = math.pi / 6 # 30 degrees
+
+        # Point 1 of arrowhead (on the line, slightly back from the end)
+        # For wind, the arrow "points" from the end towards the center
+        p1_x = end_x + arrow_head_len * 0.3 * math.sin(arrow_angle)
+        p1_y = end_y - arrow_head_len * 0.3 * math.cos(arrow_angle)
+
+        p2_x = end_x + arrow_head_len * math.sin(arrow_angle - arrow_head_angle_offset)
+        p2_y = end_y - arrow_head_len * math.cos(arrow_angle - arrow_head_angle_offset)
+        p3_x = end_x + arrow_head_len * math.sin(arrow_angle + arrow_head_angle_offset)
+        p3_y = end_y - arrow_head_len * math.cos(arrow_angle + arrow_head_angle_offset)
+        pygame.draw.polygon(surface, YELLOW, [(p1_x, p1_y), (p2_x, p2_y), (p3_x, p3_y)])
+
+        # --- Boat Arrow ---
+        boat_arrow_len = radius * 0.7
+        boat_end_x = center_x + boat_arrow_len * math.sin(math.radians(boat_angle))
+        boat_end_y = center_y - boat_arrow_len * math.cos(math.radians(boat_angle))
+        pygame.draw.line(surface, GREEN, (center_x, center_y), (boat_end_x, boat_end_y), 2)
+
+        # Arrowhead for boat (points away from the center, indicating boat's heading)
+        boat_arrow_angle = math.radians(boat_angle)
+        bp1_x = boat_end_x - arrow_head_len * math.sin(boat_arrow_angle - arrow_head_angle_offset)
+        bp1_y = boat_end_y + arrow_head_len * math.cos(boat_arrow_angle - arrow_head_angle_offset)
+        bp2_x = boat_end_x - arrow_head_len * math.sin(boat_arrow_angle + arrow_head_angle_offset)
+        bp2_y = boat_end_y + arrow_head_len * math.cos(boat_arrow_angle + arrow_head_angle_offset)
+        pygame.draw.polygon(surface, GREEN, [(boat_end_x, boat_end_y), (bp1_x, bp1_y), (bp2_x, bp2_y)])
+
+    def draw(self, surface):
+        surface.blit(self.surface, self.rect)
+        return self.rect
+
+
+class Hud:
+    # Boat info, score and wind indicator for the interactive view
+    def __init__(self):
+        self.text_cache = TextCache()
+        self.wind_indicator = WindIndicator()
+        self.texts = {
+            'speed': TextWidget(self.text_cache, (10, 10), "Speed: {:.2f}"),
+            'heading': TextWidget(self.text_cache, (10, 30), "Heading: {:.0f}°"),
+            'boom': TextWidget(self.text_cache, (10, 50), "Boom Angle: {:.0f}°"),
+            'aoa': TextWidget(self.text_cache, (10, 70), "Sail AoA: {:.0f}°"),
+            'score': TextWidget(self.text_cache, (10, 90), "Score: {}"),
+            'wind': TextWidget(self.text_cache, (SCREEN_WIDTH - 150, 80), "Wind: {:.1f} @ {:.0f}°", size=18),
+        }
+        self.widgets = [self.wind_indicator] + list(self.texts.values())
+
+    def update(self, world):
+        # Refresh widget values; returns the widgets whose content changed
+        boat = world.boat
+        changed = []
+        for widget, values in (
+            (self.wind_indicator, (world.wind_direction, boat.angle)),
+            (self.texts['speed'], (boat.speed,)),
+            (self.texts['heading'], (boat.angle,)),
+            (self.texts['boom'], (boat.boom_angle_relative_to_boat,)),
+            (self.texts['aoa'], (boat.current_aoa_boom_plane,)),
+            (self.texts['score'], (world.score,)),
+            (self.texts['wind'], (world.wind_speed, world.wind_direction)),
+        ):
+            if widget.set(*values):
+                changed.append(widget)
+        return changed
+
+    def draw(self, surface, widgets=None):
+        # Draws all widgets (or only the given ones) and returns their rects
+        return [widget.draw(surface) for widget in (self.widgets if widgets is None else widgets)]
+
+
+_default_wind_indicator = None
+_default_text_cache = TextCache()
+
+
+def draw_wind_indicator(surface, wind_dir, wind_spd, boat_angle):
+    # Stand-alone wind indicator (dial + wind text) sharing the HUD caches
+    global _default_wind_indicator
+    if _default_wind_indicator is None:
+        _default_wind_indicator = WindIndicator()
+    # Returns the dirty rect covering the dial and the text
+    _default_wind_indicator.set(wind_dir, boat_angle)
+    dirty = _default_wind_indicator.draw(surface).copy()
+    text = _default_text_cache.render(f"Wind: {wind_spd:.1f} @ {wind_dir:.0f}°", WHITE, 18)
+    dirty.union_ip(surface.blit(text, (SCREEN_WIDTH - 150, 80)))
+    return dirty
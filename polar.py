@@ -0,0 +1,165 @@
+import argparse
+import csv
+import math
+import sys
+
+import numpy as np
+
+from constants import *
+
+# Sail and hull thrust only depend on the wind angle relative to the bow and on
+# the boom deflection (once the automatic gybe has picked its side), so the
+# whole model fits in a 2D table:
+#   relative wind angle 0..360 (0 = wind from the bow, clockwise)
+#   boom deflection -BOOM_MAX_ANGLE_ADJUST..+BOOM_MAX_ANGLE_ADJUST
+
+
+def thrust_coefficient(relative_wind, deflection):
+    # Boat.update's total thrust coefficient, vectorized over NumPy arrays
+    boom_angle_relative_to_boat = (180.0 + deflection + 360) % 360
+    angle_of_attack_on_boom = (relative_wind - boom_angle_relative_to_boat + 180) % 360 - 180
+    thrust_factor = np.sin(np.radians(angle_of_attack_on_boom)) * np.sin(np.radians(boom_angle_relative_to_boat))
+    hull_thrust_component = np.cos(np.radians((relative_wind + 180) % 360)) * HULL_SAIL_EFFECT_FACTOR
+    return thrust_factor + hull_thrust_component
+
+
+class PolarTable:
+    # Thrust coefficient sampled on a regular (relative wind, deflection) grid with
+    # bilinear interpolation. Set Boat.thrust_table / Fleet.thrust_table to use it
+    # as the physics thrust source.
+    def __init__(self, wind_step=POLAR_WIND_STEP, deflection_step=POLAR_DEFLECTION_STEP):
+        self.wind_step = wind_step
+        self.deflection_step = deflection_step
+        self.wind_angles = np.linspace(0, 360, int(round(360 / wind_step)) + 1)
+        n_deflections = int(math.ceil(2 * BOOM_MAX_ANGLE_ADJUST / deflection_step)) + 1
+        self.deflections = np.linspace(-BOOM_MAX_ANGLE_ADJUST, BOOM_MAX_ANGLE_ADJUST, n_deflections)
+        self.wind_step = float(self.wind_angles[1] - self.wind_angles[0])
+        self.deflection_step = float(self.deflections[1] - self.deflections[0])
+        self.thrust = thrust_coefficient(self.wind_angles[:, None], self.deflections[None, :])
+        # Flat Python list copy for the scalar lookup (much faster than indexing NumPy per value)
+        self._columns = len(self.deflections)
+        self._flat = self.thrust.ravel().tolist()
+
+        # Best deflection per table wind angle, restricted to the side the automatic gybe allows
+        usable = np.where(self._allowed_side(self.wind_angles[:, None], self.deflections[None, :]), self.thrust, -np.inf)
+        best = np.argmax(usable, axis=1)
+        self.best_deflections = self.deflections[best]
+        self.best_thrust = self.thrust[np.arange(len(self.wind_angles)), best]
+
+    @staticmethod
+    def _allowed_side(relative_wind, deflection):
+        # Wind from starboard (0..180) puts the boom to port (positive), and vice versa
+        return np.where((relative_wind > 0) & (relative_wind < 180), deflection >= 0,
+                        np.where(relative_wind > 180, deflection <= 0, True))
+
+    def _cell(self, relative_wind, deflection):
+        u = (relative_wind % 360) / self.wind_step
+        v = (deflection + BOOM_MAX_ANGLE_ADJUST) / self.deflection_step
+        return u, v
+
+    def lookup(self, relative_wind, deflection):
+        # Scalar bilinear interpolation
+        u, v = self._cell(relative_wind, deflection)
+        i = min(int(u), len(self.wind_angles) - 2)
+        j = min(max(int(v), 0), self._columns - 2)
+        fu, fv = u - i, v - j
+        k = i * self._columns + j
+        t = self._flat
+        top = t[k] + (t[k + 1] - t[k]) * fv
+        bottom = t[k + self._columns] + (t[k + self._columns + 1] - t[k + self._columns]) * fv
+        return top + (bottom - top) * fu
+
+    def lookup_many(self, relative_wind, deflection):
+        # Vectorized bilinear interpolation
+        u, v = self._cell(np.asarray(relative_wind, dtype=float), np.asarray(deflection, dtype=float))
+        i = np.minimum(u.astype(np.int64), len(self.wind_angles) - 2)
+        j = np.clip(v.astype(np.int64), 0, self._columns - 2)
+        fu, fv = u - i, v - j
+        t = self.thrust
+        top = t[i, j] + (t[i, j + 1] - t[i, j]) * fv
+        bottom = t[i + 1, j] + (t[i + 1, j + 1] - t[i + 1, j]) * fv
+        return top + (bottom - top) * fu
+
+    def best_deflection(self, relative_wind):
+        # Thrust-maximizing boom deflection at the nearest tabulated wind angle
+        i = int(round((relative_wind % 360) / self.wind_step))
+        return float(self.best_deflections[i])
+
+
+def steady_state_polar(wind_angles=None, wind_speed=WIND_SPEED, deflection_step=1.0, max_seconds=120):
+    # Boat polar by brute force: one Fleet boat per (true wind angle, boom deflection)
+    # pair, sailed at a fixed heading until its speed settles. Returns, for each true
+    # wind angle, the best steady speed and the deflection that gives it.
+    from fleet import Fleet
+
+    if wind_angles is None:
+        wind_angles = np.arange(0, 181, 5)
+    wind_angles = np.asarray(wind_angles, dtype=float)
+    magnitudes = np.arange(0, BOOM_MAX_ANGLE_ADJUST + deflection_step / 2, deflection_step)
+    twa, magnitude = (a.ravel() for a in np.meshgrid(wind_angles, magnitudes, indexing='ij'))
+
+    fleet = Fleet(len(twa))
+    # Heading chosen so that the wind (from WIND_DIRECTION) is at the given true wind angle
+    fleet.angle = (WIND_DIRECTION - twa) % 360
+    # Start on the side the automatic gybe will pick so the trim is kept as given
+    side = np.where((twa > 0) & (twa < 180), 1.0, -1.0)
+    fleet.boom_deflection_from_aft = side * magnitude
+    for _ in range(int(max_seconds * PHYSICS_FPS)):
+        fleet.update(WIND_DIRECTION, wind_speed)
+        fleet.x[:] = INITIAL_BOAT_X # Stay put: only the speed matters here
+        fleet.y[:] = INITIAL_BOAT_Y
+        # Keep the requested trim against the automatic boom passage
+        fleet.boom_deflection_from_aft = np.sign(fleet.boom_deflection_from_aft) * magnitude
+
+    speeds = fleet.speed.reshape(len(wind_angles), len(magnitudes))
+    best = np.argmax(speeds, axis=1)
+    return wind_angles, speeds[np.arange(len(wind_angles)), best], magnitudes[best]
+
+
+def draw_polar(wind_angles, speeds, size=500):
+    # Classic polar diagram: wind from the top, speed as the distance from the center,
+    # mirrored for both tacks. Returns a Pygame surface.
+    import pygame
+
+    surface = pygame.Surface((size, size))
+    surface.fill(BLUE)
+    center = (size // 2, size // 2)
+    max_speed = max(float(np.max(speeds)), 1e-9)
+    scale = (size / 2 - 20) / max_speed
+    for ring in range(1, 5):
+        pygame.draw.circle(surface, WHITE, center, int(ring * max_speed / 4 * scale), 1)
+    for angle in range(0, 360, 30):
+        end = (center[0] + (size / 2 - 10) * math.sin(math.radians(angle)),
+               center[1] - (size / 2 - 10) * math.cos(math.radians(angle)))
+        pygame.draw.line(surface, WHITE, center, end, 1)
+    for side in (1, -1):
+        points = [(center[0] + side * max(s, 0) * scale * math.sin(math.radians(a)),
+                   center[1] - max(s, 0) * scale * math.cos(math.radians(a)))
+                  for a, s in zip(wind_angles, speeds)]
+        if len(points) > 1:
+            pygame.draw.lines(surface, YELLOW, False, points, 2)
+    return surface
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Steady-state boat polar (speed vs true wind angle, optimal trim)")
+    parser.add_argument('--wind-speed', type=float, default=WIND_SPEED)
+    parser.add_argument('--step', type=float, default=5, help="true wind angle step in degrees")
+    parser.add_argument('--csv', default='polar.csv')
+    parser.add_argument('--image', default='polar.png')
+    args = parser.parse_args(argv)
+
+    wind_angles, speeds, deflections = steady_state_polar(np.arange(0, 180 + args.step / 2, args.step), args.wind_speed)
+    with open(args.csv, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['true_wind_angle', 'speed', 'boom_deflection'])
+        for row in zip(wind_angles, speeds, deflections):
+            writer.writerow([f"{v:.4f}" for v in row])
+    if args.image:
+        import pygame
+        pygame.image.save(draw_polar(wind_angles, speeds), args.image)
+    print(f"Polar written to {args.csv}" + (f" and {args.image}" if args.image else ""))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
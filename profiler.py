@@ -0,0 +1,124 @@
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+
+from constants import *
+from hud import TextCache
+
+# Frame-time instrumentation for the interactive loop. Phases are timed as laps:
+# begin_frame() starts the clock and every lap(name) charges the time since the
+# previous lap to that phase, so the phases of a frame add up to the frame time.
+# When disabled, lap() returns immediately; headless worlds have no profiler at all.
+
+PROFILER_PHASES = ('events', 'physics', 'gates', 'draw', 'flip')
+
+
+class FrameProfiler:
+    def __init__(self, enabled=False, window=PROFILER_WINDOW, max_trace_events=PROFILER_TRACE_MAX_EVENTS):
+        self.enabled = enabled
+        self.history = {name: deque(maxlen=window) for name in PROFILER_PHASES + ('frame',)}
+        self.trace_events = deque(maxlen=max_trace_events)
+        self.frames = 0
+        self.origin = time.perf_counter()
+        self._frame_start = None
+        self._last = None
+        self._current = {}
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._frame_start = self._last = time.perf_counter()
+        self._current = dict.fromkeys(PROFILER_PHASES, 0.0)
+
+    def lap(self, name):
+        if not self.enabled or self._last is None:
+            return
+        now = time.perf_counter()
+        self._current[name] = self._current.get(name, 0.0) + now - self._last
+        self._trace(name, self._last, now)
+        self._last = now
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        now = time.perf_counter()
+        for name, duration in self._current.items():
+            self.history.setdefault(name, deque(maxlen=self.history['frame'].maxlen)).append(duration)
+        self.history['frame'].append(now - self._frame_start)
+        self._trace('frame', self._frame_start, now, tid=0)
+        self.frames += 1
+        self._frame_start = self._last = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self._frame_start = self._last = None
+
+    def _trace(self, name, start, end, tid=1):
+        # Chrome trace-event "complete" event, times in microseconds since the profiler started
+        self.trace_events.append({
+            'name': name, 'cat': 'frame', 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+            'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6,
+        })
+
+    def stats(self):
+        # name -> (rolling average, p99) in milliseconds, over the last `window` frames
+        result = {}
+        for name, durations in self.history.items():
+            if not durations:
+                continue
+            ordered = sorted(durations)
+            p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+            result[name] = (sum(ordered) / len(ordered) * 1000, p99 * 1000)
+        return result
+
+    def export_chrome_trace(self, path):
+        # Open with chrome://tracing or https://ui.perfetto.dev
+        with open(path, 'w') as f:
+            json.dump({
+                'traceEvents': list(self.trace_events),
+                'displayTimeUnit': 'ms',
+                'otherData': {'frames': self.frames},
+            }, f)
+        return len(self.trace_events)
+
+
+class ProfilerOverlay:
+    # Rolling average and p99 of every phase, bottom left. The text is only
+    # re-rendered every PROFILER_OVERLAY_REFRESH frames to keep its own cost low.
+    def __init__(self, profiler, pos=(10, SCREEN_HEIGHT - 10), size=16, refresh=PROFILER_OVERLAY_REFRESH):
+        self.profiler = profiler
+        self.pos = pos
+        self.size = size
+        self.refresh = refresh
+        self.text_cache = TextCache()
+        self.surface = None
+        self.rect = None
+        self._frames_at_render = None
+
+    @property
+    def visible(self):
+        return self.profiler.enabled
+
+    def _render(self):
+        stats = self.profiler.stats()
+        lines = [f"{'phase':<8}{'avg ms':>8}{'p99 ms':>8}"]
+        for name in PROFILER_PHASES + ('frame',):
+            if name in stats:
+                average, p99 = stats[name]
+                lines.append(f"{name:<8}{average:>8.2f}{p99:>8.2f}")
+        texts = [self.text_cache.render(line, YELLOW, self.size) for line in lines]
+        line_height = max(text.get_height() for text in texts)
+        self.surface = pygame.Surface((max(text.get_width() for text in texts) + 8, line_height * len(texts) + 8))
+        self.surface.fill(BLACK)
+        for i, text in enumerate(texts):
+            self.surface.blit(text, (4, 4 + i * line_height))
+        self.rect = self.surface.get_rect(bottomleft=self.pos)
+        self._frames_at_render = self.profiler.frames
+
+    def draw(self, surface):
+        if self.surface is None or self.profiler.frames - self._frames_at_render >= self.refresh:
+            self._render()
+        return surface.blit(self.surface, self.rect)
@@ -0,0 +1,152 @@
+import struct
+
+import numpy as np
+
+# Binary protocol between server.py and client.py (over TCP, little-endian).
+# Every message is a frame: uint32 payload length, uint8 type, payload.
+#
+#   HELLO     client -> server  player name (UTF-8)
+#   WELCOME   server -> client  boat slot, slot count, tick rate, world size, tick, flags, gates
+#   INPUT     client -> server  input sequence number, turn, boom (one per client tick)
+#   SNAPSHOT  server -> client  last applied input, tick, wind, removed slots, changed fields
+#   BYE       server -> client  reason the connection is refused (UTF-8)
+#
+# Snapshots are deltas against the previous snapshot sent to the same client
+# (TCP delivers them all, in order). Boat state is quantized to integers and
+# stored field by field: the slots whose value changed by a little, with the
+# int8 difference, then the other changed slots with their new value (boats the
+# client does not know yet, wrap-arounds, big changes). Each set of slots is a
+# list of slot numbers or a bitmask over all slots, whichever is shorter.
+
+MSG_HELLO = 1
+MSG_WELCOME = 2
+MSG_INPUT = 3
+MSG_SNAPSHOT = 4
+MSG_BYE = 5
+
+FRAME_HEADER = struct.Struct('<IB')
+WELCOME_HEADER = struct.Struct('<HHHffIBH') # slot, slots, tick rate, world width, height, tick, flags, gate count
+WELCOME_WIND_SHADOW = 1 # Flag: boats slow the wind downwind of them (WindField.shadow_factor)
+INPUT_MESSAGE = struct.Struct('<Ibb') # sequence, turn, boom
+SNAPSHOT_ACK = struct.Struct('<I') # Per-client part of a snapshot: last applied input sequence
+SNAPSHOT_HEADER = struct.Struct('<IffH') # tick, wind direction, wind speed, removed slot count
+FIELD_COUNT = struct.Struct('<H')
+SLOT_BITMASK = 0xFFFF # FIELD_COUNT value announcing a bitmask instead of a slot list
+
+MAX_FRAME_SIZE = 1 << 24 # Larger frames are a protocol error
+MAX_NAME_LENGTH = 32
+
+# (name, wire dtype, scale): the wire value is round(value * scale)
+SNAPSHOT_FIELDS = (
+    ('x', '<i4', 16),
+    ('y', '<i4', 16),
+    ('angle', '<u2', 100),
+    ('speed', '<i2', 1000),
+    ('boom', '<i2', 100),
+    ('score', '<i2', 1),
+    ('gates', '<u2', 1), # Gates done (scored or penalized)
+)
+FIELD_INDEX = {name: i for i, (name, _, _) in enumerate(SNAPSHOT_FIELDS)}
+_SCALES = np.array([scale for _, _, scale in SNAPSHOT_FIELDS], dtype=float)
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def frame(message_type, payload=b''):
+    return FRAME_HEADER.pack(len(payload), message_type) + payload
+
+
+async def read_frame(reader):
+    # (type, payload) of the next frame; raises asyncio.IncompleteReadError at EOF
+    length, message_type = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if length > MAX_FRAME_SIZE:
+        raise ProtocolError(f"frame of {length} bytes")
+    return message_type, await reader.readexactly(length)
+
+
+def encode_welcome(slot, slots, tick_rate, world_size, tick, gates, flags=0):
+    table = np.array([(g.center.x, g.center.y, g.width, g.orientation_deg) for g in gates], dtype='<f4').reshape(-1, 4)
+    return WELCOME_HEADER.pack(slot, slots, tick_rate, world_size[0], world_size[1], tick, flags, len(gates)) + table.tobytes()
+
+
+def decode_welcome(payload):
+    slot, slots, tick_rate, width, height, tick, flags, n_gates = WELCOME_HEADER.unpack_from(payload)
+    gates = np.frombuffer(payload, dtype='<f4', count=n_gates * 4, offset=WELCOME_HEADER.size).reshape(-1, 4)
+    return slot, slots, tick_rate, (width, height), tick, flags, gates.astype(float)
+
+
+def quantize(x, y, angle, speed, boom, score, gates):
+    # One int64 row per slot, one column per SNAPSHOT_FIELDS entry
+    table = np.column_stack([x, y, np.asarray(angle) % 360, speed, boom, score, gates]) * _SCALES
+    return np.rint(table).astype(np.int64)
+
+
+def dequantize(table):
+    # Float values of a quantized table (same layout)
+    return table / _SCALES
+
+
+def _encode_slots(mask):
+    slots = np.flatnonzero(mask)
+    bitmask = np.packbits(mask, bitorder='little').tobytes()
+    if 2 * len(slots) > len(bitmask):
+        return slots, FIELD_COUNT.pack(SLOT_BITMASK) + bitmask
+    return slots, FIELD_COUNT.pack(len(slots)) + slots.astype('<u2').tobytes()
+
+
+def _decode_slots(payload, offset, n_slots):
+    (count,) = FIELD_COUNT.unpack_from(payload, offset)
+    offset += FIELD_COUNT.size
+    if count == SLOT_BITMASK:
+        size = (n_slots + 7) // 8
+        bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8, count=size, offset=offset), count=n_slots, bitorder='little')
+        return np.flatnonzero(bits), offset + size
+    slots = np.frombuffer(payload, dtype='<u2', count=count, offset=offset).astype(np.int64)
+    return slots, offset + 2 * count
+
+
+def encode_snapshot(tick, wind_direction, wind_speed, current, active, baseline=None, baseline_active=None):
+    # Snapshot body (everything but the per-client ack) taking a client from
+    # (baseline, baseline_active) to (current, active); no baseline = full state
+    if baseline is None:
+        changed = np.broadcast_to(active[:, None], current.shape)
+        small = np.zeros(current.shape, dtype=bool)
+        removed = np.empty(0, dtype=np.int64)
+    else:
+        known = (active & baseline_active)[:, None]
+        difference = current - baseline
+        changed = active[:, None] & ((difference != 0) | ~known)
+        small = changed & known & (np.abs(difference) <= 127)
+        removed = np.flatnonzero(baseline_active & ~active)
+    parts = [SNAPSHOT_HEADER.pack(tick, wind_direction, wind_speed, len(removed)), removed.astype('<u2').tobytes()]
+    for f, (_, dtype, _) in enumerate(SNAPSHOT_FIELDS):
+        slots, header = _encode_slots(small[:, f])
+        parts += [header, difference[slots, f].astype(np.int8).tobytes()] if len(slots) else [header]
+        slots, header = _encode_slots(changed[:, f] & ~small[:, f])
+        parts += [header, current[slots, f].astype(dtype).tobytes()]
+    return b''.join(parts)
+
+
+def decode_snapshot(payload, table, known, offset=0):
+    # Applies a snapshot body to the client's table/known arrays in place.
+    # Returns (tick, wind direction, wind speed, removed slots).
+    tick, wind_direction, wind_speed, n_removed = SNAPSHOT_HEADER.unpack_from(payload, offset)
+    offset += SNAPSHOT_HEADER.size
+    removed = np.frombuffer(payload, dtype='<u2', count=n_removed, offset=offset).astype(np.int64)
+    offset += 2 * n_removed
+    known[removed] = False
+    n_slots = len(table)
+    for f, (_, dtype, _) in enumerate(SNAPSHOT_FIELDS):
+        slots, offset = _decode_slots(payload, offset, n_slots)
+        table[slots, f] += np.frombuffer(payload, dtype=np.int8, count=len(slots), offset=offset)
+        offset += len(slots)
+        slots, offset = _decode_slots(payload, offset, n_slots)
+        values = np.frombuffer(payload, dtype=dtype, count=len(slots), offset=offset)
+        offset += values.nbytes
+        table[slots, f] = values
+        known[slots] = True
+    if offset != len(payload):
+        raise ProtocolError(f"snapshot of {len(payload)} bytes, {offset} decoded")
+    return tick, wind_direction, wind_speed, removed
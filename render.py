@@ -0,0 +1,140 @@
+import pygame
+
+from constants import *
+
+
+class Renderer:
+    # Draws the world and HUD to the screen.
+    # Full mode fills and flips the whole window every frame. Dirty-rect mode keeps
+    # the water and the (static) gates in a background surface, restores it only
+    # under what was drawn last frame, and pushes just those rects to the display.
+    # With a camera, only the gates and boat inside the view are drawn (gates found
+    # with the world's GateIndex), and the background is rebuilt when the view moves.
+    def __init__(self, screen, hud, dirty_rects=RENDER_DIRTY_RECTS, camera=None):
+        self.screen = screen
+        self.hud = hud
+        self.dirty_rects = dirty_rects
+        self.camera = camera
+        self.background = None
+        self.background_view = None
+        self.previous_rects = []
+        self.profiler = None # Optional FrameProfiler timing the draw and flip phases
+        self.overlay = None # Optional overlay drawn on top of everything while visible
+        self.other_boats = None # Optional extra Boats (e.g. other players) drawn under world.boat
+        self.interpolate = False # Draw world.boat at world.interpolated_pose() (rendering between physics ticks)
+
+    def invalidate(self):
+        # Call when the gates change: the background is rebuilt and the next frame is a full one
+        self.background = None
+
+    def _visible_gates(self, world):
+        if self.camera is None:
+            return world.gates
+        return [world.gates[i] for i in world.gate_index.gates_in_rect(*self.camera.view_rect())]
+
+    def _draw_gates(self, world, surface):
+        for gate in self._visible_gates(world):
+            gate.draw(surface, self.camera)
+
+    def _draw_boats(self, world, surface):
+        # Rects of the boats drawn (the ones in view), world.boat last so it stays on top
+        rects = []
+        for boat in self.other_boats or ():
+            if self.camera is None or self.camera.visible(boat.x, boat.y, margin=BOAT_LENGTH):
+                rects.append(boat.draw(surface, self.camera))
+        pose = world.interpolated_pose() if self.interpolate else None
+        x, y = pose[:2] if pose else (world.boat.x, world.boat.y)
+        if self.camera is None or self.camera.visible(x, y, margin=BOAT_LENGTH):
+            rects.append(world.boat.draw(surface, self.camera, pose))
+        return rects
+
+    def _build_background(self, world):
+        self.background = pygame.Surface(self.screen.get_size())
+        self.background.fill(BLUE)  # Water
+        self._draw_gates(world, self.background)
+        self.background_view = self.camera.state() if self.camera is not None else None
+
+    def draw(self, world):
+        # Draw phase returns the rects to push, or None for a full flip
+        if self.camera is not None and self.camera.state() != self.background_view:
+            self.background = None # The view moved: everything is redrawn
+        if self.dirty_rects:
+            rects = self._draw_dirty(world)
+        else:
+            rects = self._draw_full(world)
+        if self.profiler:
+            self.profiler.lap('draw')
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        if self.profiler:
+            self.profiler.lap('flip')
+
+    def _draw_overlay(self):
+        if self.overlay is not None and self.overlay.visible:
+            return [self.overlay.draw(self.screen)]
+        return []
+
+    def _draw_full(self, world):
+        self.screen.fill(BLUE)  # Water
+        self._draw_gates(world, self.screen)
+        self._draw_boats(world, self.screen)
+        self.hud.update(world)
+        self.hud.draw(self.screen)
+        self._draw_overlay()
+        return None
+
+    def _collect_widgets(self, widgets, seeds, rects):
+        # Adds to `widgets` the seeds and every HUD widget overlapping the rects or an
+        # added widget. Returns the rects of the added widgets (to erase before redrawing).
+        rects = list(rects)
+        added = []
+        growing = True
+        while growing:
+            growing = False
+            for widget in self.hud.widgets:
+                if widget not in widgets and (widget in seeds or widget.rect.collidelist(rects) != -1):
+                    widgets.append(widget)
+                    rects.append(widget.rect)
+                    added.append(widget.rect)
+                    growing = True
+        return added
+
+    def _draw_dirty(self, world):
+        screen = self.screen
+        if self.background is None:
+            self._build_background(world)
+            screen.blit(self.background, (0, 0))
+            self.previous_rects = self._draw_boats(world, screen)
+            self.hud.update(world)
+            self.hud.draw(screen)
+            self.previous_rects += self._draw_overlay()
+            return None
+
+        # Erase last frame's moving parts, and the old text of HUD widgets whose value changed
+        old_widget_rects = {widget: widget.rect for widget in self.hud.widgets}
+        changed = self.hud.update(world)
+        restored = self.previous_rects + [old_widget_rects[widget] for widget in changed]
+        # HUD widgets stay on top: redraw the changed ones and any the erased areas overlap.
+        # Their own area is erased too, as antialiased text blended twice gets darker edges.
+        widgets = []
+        restored += self._collect_widgets(widgets, changed, restored)
+        for rect in restored:
+            screen.blit(self.background, rect, rect)
+
+        boat_rects = self._draw_boats(world, screen)
+        # Widgets under the boats' new positions: erase them with the boats and draw those again
+        extra = self._collect_widgets(widgets, [], boat_rects)
+        if extra:
+            for rect in extra + boat_rects:
+                screen.blit(self.background, rect, rect)
+            self._draw_boats(world, screen)
+            restored += extra
+
+        widgets = [widget for widget in self.hud.widgets if widget in widgets] # Same order as a full redraw
+        hud_rects = self.hud.draw(screen, widgets)
+        overlay_rects = self._draw_overlay()
+
+        self.previous_rects = boat_rects + overlay_rects
+        return restored + boat_rects + hud_rects + overlay_rects
@@ -0,0 +1,216 @@
+import argparse
+import math
+import struct
+import sys
+
+from boat import BOAT_STATE_FIELDS
+from constants import *
+from gate import Gate
+from world import Controls, World
+
+# Session recording: the Controls of every tick plus a keyframe of the full world
+# state every REPLAY_KEYFRAME_INTERVAL ticks, so any frame can be reached by
+# restoring the keyframe before it and re-simulating at most one interval.
+#
+# File layout (little endian):
+#   header   magic, version, keyframe interval, gate count, wind at start, world
+#            size, tick duration and substeps (World.dt, World.substeps),
+#            then (center x, center y, width, orientation) for each gate
+#   blocks   keyframe (state before the block's first tick) followed by up to
+#            `interval` ticks of controls (turn, boom, wind_shift as 3 signed bytes)
+# Every block but the last has the same size, so seeking is plain arithmetic.
+
+REPLAY_MAGIC = b'VOILEREC'
+REPLAY_VERSION = 3 # 2: keyframes hold the frame-time accumulator (ignored), 1: also no world size and tick
+_HEADER = struct.Struct('<8sHIIdddddI') # Version 1 ended after the wind (default world size and tick)
+_HEADER_V1 = struct.Struct('<8sHIIdd')
+_GATE = struct.Struct('<dddd')
+_CONTROLS = struct.Struct('<bbb')
+_GATE_STATE = 'BBbd' # attempted, passed, points, impact time (NaN when unset)
+
+
+def _keyframe_struct(n_gates, version=REPLAY_VERSION):
+    world = 'ddqq' if version >= 3 else 'ddqqd'
+    return struct.Struct('<' + 'd' * len(BOAT_STATE_FIELDS) + world + _GATE_STATE * n_gates)
+
+
+def _pack_keyframe(keyframe_struct, snapshot):
+    gates = []
+    for attempted, passed, points, impact_time in snapshot['gates']:
+        gates += [attempted, passed, points, math.nan if impact_time is None else impact_time]
+    return keyframe_struct.pack(
+        *snapshot['boat'],
+        snapshot['wind_direction'], snapshot['wind_speed'],
+        snapshot['score'], snapshot['tick_count'],
+        *gates)
+
+
+def _unpack_keyframe(keyframe_struct, data, offset, version=REPLAY_VERSION):
+    values = keyframe_struct.unpack_from(data, offset)
+    n = len(BOAT_STATE_FIELDS)
+    wind_direction, wind_speed, score, tick_count = values[n:n + 4]
+    gates = []
+    # Older versions have the frame-time accumulator after the tick count
+    for i in range(n + (4 if version >= 3 else 5), len(values), 4):
+        attempted, passed, points, impact_time = values[i:i + 4]
+        gates.append((bool(attempted), bool(passed), points, None if math.isnan(impact_time) else impact_time))
+    return {
+        'boat': values[:n],
+        'wind_direction': wind_direction,
+        'wind_speed': wind_speed,
+        'score': score,
+        'tick_count': tick_count,
+        'gates': gates,
+    }
+
+
+class RecordingError(ValueError):
+    pass
+
+
+class Recorder:
+    # Wraps a World: call recorder.tick(controls) instead of world.tick(controls)
+    def __init__(self, path, world, keyframe_interval=REPLAY_KEYFRAME_INTERVAL):
+        if world.wind_field is not None:
+            raise RecordingError("recordings only support the uniform wind (no WindField)")
+        if world.sequence is not None:
+            raise RecordingError("recordings only support worlds without a course sequence")
+        if any(gate.swept != GATE_SWEPT_COLLISION for gate in world.gates):
+            raise RecordingError("recordings only support the default gate collision test (GATE_SWEPT_COLLISION)")
+        self.world = world
+        self.keyframe_interval = keyframe_interval
+        self.keyframe_struct = _keyframe_struct(len(world.gates))
+        self.frames = 0
+        self.file = open(path, 'wb')
+        self.file.write(_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, keyframe_interval, len(world.gates),
+                                     world.wind_direction, world.wind_speed, world.size[0], world.size[1],
+                                     world.dt, world.substeps))
+        for gate in world.gates:
+            self.file.write(_GATE.pack(gate.center.x, gate.center.y, gate.width, gate.orientation_deg))
+
+    def tick(self, controls=Controls()):
+        if self.frames % self.keyframe_interval == 0:
+            self.file.write(_pack_keyframe(self.keyframe_struct, self.world.snapshot()))
+        self.file.write(_CONTROLS.pack(controls.turn, controls.boom, controls.wind_shift))
+        self.frames += 1
+        return self.world.tick(controls)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Replayer:
+    # Loads a recording and rebuilds the world at any frame, headless
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        magic, self.version, self.keyframe_interval, n_gates, self.wind_direction, self.wind_speed = \
+            _HEADER_V1.unpack_from(self.data, 0)
+        if magic != REPLAY_MAGIC:
+            raise ValueError(f"{path} is not a recording")
+        version = self.version
+        if version == 1:
+            self.size, self.dt, self.substeps = (WORLD_WIDTH, WORLD_HEIGHT), PHYSICS_DT, PHYSICS_SUBSTEPS
+            offset = _HEADER_V1.size
+        elif version in (2, REPLAY_VERSION):
+            width, height, self.dt, self.substeps = _HEADER.unpack_from(self.data, 0)[6:]
+            self.size = (width, height)
+            offset = _HEADER.size
+        else:
+            raise ValueError(f"{path}: unsupported recording version {version}")
+        self.gate_specs = [_GATE.unpack_from(self.data, offset + i * _GATE.size) for i in range(n_gates)]
+        self.blocks_offset = offset + n_gates * _GATE.size
+        self.keyframe_struct = _keyframe_struct(n_gates, version)
+        self.block_size = self.keyframe_struct.size + self.keyframe_interval * _CONTROLS.size
+
+        # Frame count from the file size: full blocks plus the partial last one
+        body = len(self.data) - self.blocks_offset
+        full_blocks, rest = divmod(body, self.block_size)
+        self.frames = full_blocks * self.keyframe_interval
+        if rest:
+            self.frames += (rest - self.keyframe_struct.size) // _CONTROLS.size
+
+    def new_world(self):
+        gates = [Gate(x, y, width, orientation, verbose=False) for x, y, width, orientation in self.gate_specs]
+        world = World(gates, self.wind_direction, self.wind_speed, size=self.size)
+        world.dt, world.substeps = self.dt, self.substeps
+        return world
+
+    def _frame_offset(self, frame):
+        block, index = divmod(frame, self.keyframe_interval)
+        return self.blocks_offset + block * self.block_size + self.keyframe_struct.size + index * _CONTROLS.size
+
+    def controls(self, frame):
+        return Controls(*_CONTROLS.unpack_from(self.data, self._frame_offset(frame)))
+
+    def keyframe(self, block):
+        return _unpack_keyframe(self.keyframe_struct, self.data, self.blocks_offset + block * self.block_size, self.version)
+
+    def seek(self, frame, world=None):
+        # World state after `frame` ticks (0 = start of the session)
+        if not 0 <= frame <= self.frames:
+            raise IndexError(f"frame {frame} outside recording (0..{self.frames})")
+        world = world or self.new_world()
+        if self.frames == 0:
+            return world
+        # The keyframe at the start of the last block is only written once that block has a tick
+        block = min(frame // self.keyframe_interval, max(self.frames - 1, 0) // self.keyframe_interval)
+        world.restore(self.keyframe(block))
+        for f in range(block * self.keyframe_interval, frame):
+            world.tick(self.controls(f))
+        return world
+
+    def replay(self, world=None, start=0, stop=None):
+        # Re-simulates every tick from start to stop, yielding the world after each one
+        stop = self.frames if stop is None else stop
+        world = self.seek(start, world)
+        for f in range(start, stop):
+            world.tick(self.controls(f))
+            yield world
+
+    def verify(self):
+        # Re-simulates the whole session and checks it against every keyframe.
+        # Returns the first frame that diverges, or None.
+        world = self.new_world()
+        n_blocks = (self.frames + self.keyframe_interval - 1) // self.keyframe_interval
+        for block in range(n_blocks):
+            expected = self.keyframe(block)
+            if block == 0:
+                world.restore(expected)
+            elif world.snapshot() != expected:
+                return block * self.keyframe_interval
+            start = block * self.keyframe_interval
+            for f in range(start, min(start + self.keyframe_interval, self.frames)):
+                world.tick(self.controls(f))
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect a recorded session")
+    parser.add_argument('recording')
+    parser.add_argument('--seek', type=int, help="print the state after this many ticks (default: end)")
+    parser.add_argument('--verify', action='store_true', help="re-simulate everything and check every keyframe")
+    args = parser.parse_args(argv)
+
+    replayer = Replayer(args.recording)
+    print(f"{replayer.frames} ticks ({replayer.frames * replayer.dt:.1f} s), keyframe every {replayer.keyframe_interval}")
+    if args.verify:
+        diverged = replayer.verify()
+        print("Replay matches every keyframe" if diverged is None else f"Replay diverges before frame {diverged}")
+    frame = replayer.frames if args.seek is None else args.seek
+    world = replayer.seek(frame)
+    boat = world.boat
+    print(f"Frame {frame}: x={boat.x:.2f} y={boat.y:.2f} heading={boat.angle:.1f} speed={boat.speed:.3f} "
+          f"boom={boat.boom_deflection_from_aft:.1f} wind={world.wind_direction:.0f} score={world.score}")
+    print("Gates: " + ' '.join(str(gate.points) if gate.attempted_or_scored else '-' for gate in world.gates))
+    return 1 if args.verify and diverged is not None else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
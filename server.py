@@ -0,0 +1,358 @@
+import argparse
+import asyncio
+import collections
+import struct
+import time
+
+import numpy as np
+
+from autopilot import Autopilot, FleetAutopilot
+from constants import *
+from course import CourseError, load_course
+from fleet import Fleet
+from protocol import (
+    FRAME_HEADER, INPUT_MESSAGE, MAX_NAME_LENGTH, MSG_BYE, MSG_HELLO, MSG_INPUT, MSG_SNAPSHOT, MSG_WELCOME,
+    SNAPSHOT_ACK, WELCOME_WIND_SHADOW, ProtocolError, encode_snapshot, encode_welcome, frame, quantize, read_frame,
+)
+from spatial import GateIndex
+from wind import WindField
+from world import default_gates, random_gates
+
+# Authoritative race server. The boats of every player and bot live in one
+# Fleet (one row per slot) advanced at a fixed tick rate with the same physics
+# and gate scoring as World.tick, whatever the clients send and however fast.
+# Clients only send their controls, one input per tick; each tick every client
+# gets a delta snapshot (see protocol.py). Clients that received the previous
+# snapshot share one encoded body, so a tick costs one simulation step and one
+# encoding whatever the number of clients; a client that falls behind (full
+# send buffer) skips snapshots and later gets a delta from the last one it got.
+# With wind_shadow, every boat sails in the wind left by the boats upwind of it.
+
+
+class ClientConnection:
+    def __init__(self, slot, name, writer):
+        self.slot = slot
+        self.name = name
+        self.writer = writer
+        self.inputs = collections.deque(maxlen=SERVER_INPUT_QUEUE) # (sequence, turn, boom)
+        self.ack = 0 # Sequence of the last input applied
+        self.held = 0 # Ticks run on the held controls since the last input arrived
+        # What the client was last sent, the baseline of its next delta
+        self.baseline = None
+        self.baseline_active = None
+        self.baseline_tick = -1
+        self.skipped = 0
+
+
+class RaceServer:
+    def __init__(self, gates=None, world_size=(WORLD_WIDTH, WORLD_HEIGHT), slots=SERVER_SLOTS, tick_rate=PHYSICS_FPS,
+                 start=None, wind_direction=WIND_DIRECTION, wind_speed=WIND_SPEED, wind_shadow=SERVER_WIND_SHADOW,
+                 ordered=False, verbose=False):
+        self.gates = gates if gates is not None else default_gates(False)
+        self.gate_index = GateIndex(self.gates, (0, 0) + tuple(world_size))
+        self.world_size = world_size
+        self.slots = slots
+        self.tick_rate = tick_rate
+        self.start = start if start is not None else (INITIAL_BOAT_X, INITIAL_BOAT_Y, 0)
+        self.wind_direction = wind_direction
+        self.wind_speed = wind_speed
+        self.wind_shadow = wind_shadow
+        self.ordered = ordered # Gates are raced in list order (course legs), not in any order
+        self.verbose = verbose
+
+        self.fleet = Fleet(slots)
+        self.fleet.world_width, self.fleet.world_height = world_size
+        self.active = np.zeros(slots, dtype=bool)
+        self.is_bot = np.zeros(slots, dtype=bool)
+        self.attempted = np.zeros((slots, len(self.gates)), dtype=bool)
+        self.score = np.zeros(slots, dtype=np.int64)
+        self.turn = np.zeros(slots, dtype=np.int64) # Controls held until the next input
+        self.boom = np.zeros(slots, dtype=np.int64)
+        self.clients = {} # slot -> ClientConnection
+        self.names = {}
+        self.tick_count = 0
+        self._next_slot = 0
+
+        # Bots sail the course with the fleet autopilot (approach point, then through the gate)
+        self.autopilot = FleetAutopilot(slots)
+        self.bot_gate = np.full(slots, -1)
+        self.bot_through = np.zeros(slots, dtype=bool)
+
+        self.tick_times = collections.deque(maxlen=int(SERVER_STATS_INTERVAL * tick_rate))
+        self.bytes_sent = 0
+        self.dropped_ticks = 0
+        self.port = None
+        self.connections = set() # Connection handler tasks
+
+    # --- Slots ---
+    def join(self, name, bot=False):
+        # Slot for a new boat, or None when the server is full. Slots are handed
+        # out round-robin so a freed slot is not reused right away.
+        for k in range(self.slots):
+            slot = (self._next_slot + k) % self.slots
+            if not self.active[slot]:
+                break
+        else:
+            return None
+        self._next_slot = slot + 1
+        fleet = self.fleet
+        x, y, heading = self.start
+        # Boats start side by side across the start heading
+        offset = ((slot % 16) - 7.5) * BOAT_WIDTH * 1.5
+        across = np.radians(heading + 90)
+        fleet.x[slot] = fleet.x_prev[slot] = (x + offset * np.sin(across)) % self.world_size[0]
+        fleet.y[slot] = fleet.y_prev[slot] = (y - offset * np.cos(across)) % self.world_size[1]
+        fleet.angle[slot] = heading
+        fleet.speed[slot] = 0
+        fleet.current_aoa_boom_plane[slot] = 0
+        fleet.boom_deflection_from_aft[slot] = 0
+        fleet.boom_angle_relative_to_boat[slot] = 180.0
+        self.attempted[slot] = False
+        self.score[slot] = 0
+        self.turn[slot] = self.boom[slot] = 0
+        self.bot_gate[slot] = -1
+        self.bot_through[slot] = False
+        self.active[slot] = True
+        self.is_bot[slot] = bot
+        self.names[slot] = name
+        return slot
+
+    def leave(self, slot):
+        self.active[slot] = False
+        self.is_bot[slot] = False
+        self.clients.pop(slot, None)
+        self.names.pop(slot, None)
+
+    def add_bots(self, n):
+        return [self.join(f"bot{i}", bot=True) for i in range(n)]
+
+    # --- Simulation ---
+    def _bot_controls(self):
+        bots = np.flatnonzero(self.active & self.is_bot)
+        if len(bots) == 0:
+            return
+        attempted = self.attempted[bots]
+        done = attempted.all(axis=1)
+        gate = np.argmin(attempted, axis=1) # First gate not done yet
+        self.bot_through[bots] &= gate == self.bot_gate[bots]
+        self.bot_gate[bots] = gate
+
+        fleet = self.fleet
+        center, passage = self.gate_index.center[gate], self.gate_index.passage[gate]
+        approach = center - passage * Autopilot.APPROACH_DISTANCE
+        reached = np.hypot(approach[:, 0] - fleet.x[bots], approach[:, 1] - fleet.y[bots]) <= Autopilot.WAYPOINT_REACHED
+        through = self.bot_through[bots] | reached
+        self.bot_through[bots] = through
+        target = np.where(through[:, None], center + passage * Autopilot.APPROACH_DISTANCE, approach)
+
+        target_x, target_y = fleet.x.copy(), fleet.y.copy()
+        target_x[bots], target_y[bots] = target[:, 0], target[:, 1]
+        headings = self.autopilot.headings_to(fleet, target_x, target_y)
+        turn = self.autopilot.steer_controls(fleet, self.wind_direction, headings)
+        boom = self.autopilot.trim_controls(fleet, self.wind_direction)
+        self.turn[bots] = np.where(done, 0, turn[bots])
+        self.boom[bots] = boom[bots]
+
+    def tick(self):
+        start = time.perf_counter()
+        for client in self.clients.values():
+            if client.inputs:
+                client.ack, self.turn[client.slot], self.boom[client.slot] = client.inputs.popleft()
+            elif client.held < SERVER_INPUT_QUEUE:
+                client.held += 1
+        self._bot_controls()
+
+        # Same order as World.tick: controls, physics, gates
+        # (turning and boom rates are per PHYSICS_DT, scaled to the server's tick)
+        fleet = self.fleet
+        ticks = PHYSICS_FPS / self.tick_rate
+        fleet.rotate(self.turn * BOAT_TURN_SPEED * ticks)
+        fleet.adjust_boom(self.boom * BOOM_ADJUST_SPEED * ticks)
+        wind_speed = self.wind_speed
+        if self.wind_shadow:
+            # Per-boat wind, each active boat in the shadow of the others
+            active = np.flatnonzero(self.active)
+            x, y = fleet.x[active], fleet.y[active]
+            wind_speed = np.full(self.slots, float(self.wind_speed))
+            wind_speed[active] *= WindField.shadow_factor(x, y, self.wind_direction, x, y)
+        fleet.update(self.wind_direction, wind_speed, 1.0 / self.tick_rate)
+        x0, y0 = fleet.move_start()
+        if self.ordered:
+            # Only each boat's next gate can score: every other gate is passed in as attempted
+            rows = np.arange(self.slots)
+            gate = np.argmin(self.attempted, axis=1)
+            attempted = np.ones_like(self.attempted)
+            attempted[rows, gate] = self.attempted[rows, gate]
+            score_change, _ = self.gate_index.check_passages(x0, y0, fleet.x, fleet.y, attempted)
+            self.attempted[rows, gate] = attempted[rows, gate]
+        else:
+            score_change, _ = self.gate_index.check_passages(x0, y0, fleet.x, fleet.y, self.attempted)
+        self.score += score_change
+        self.tick_count += 1
+
+        self.broadcast()
+        self.tick_times.append(time.perf_counter() - start)
+
+    def receive_input(self, client, sequence, turn, boom):
+        turn, boom = max(-1, min(1, turn)), max(-1, min(1, boom))
+        if client.held:
+            # Late: the tick it was sent for already ran on the held controls. It
+            # becomes the held controls (applied from the next tick, as the client
+            # will see when it replays its inputs from this ack) and the debt is
+            # cleared, so a client that paused is back in step with its first input.
+            client.held = 0
+            client.ack, self.turn[client.slot], self.boom[client.slot] = sequence, turn, boom
+        else:
+            client.inputs.append((sequence, turn, boom))
+
+    def broadcast(self):
+        fleet = self.fleet
+        current = quantize(fleet.x, fleet.y, fleet.angle, fleet.speed, fleet.boom_deflection_from_aft,
+                           self.score, self.attempted.sum(axis=1))
+        active = self.active.copy()
+        bodies = {} # baseline tick -> encoded body, shared by the clients at that baseline
+        for client in self.clients.values():
+            transport = client.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > SERVER_SEND_BUFFER_LIMIT:
+                client.skipped += 1
+                continue
+            body = bodies.get(client.baseline_tick)
+            if body is None:
+                body = bodies[client.baseline_tick] = encode_snapshot(
+                    self.tick_count, self.wind_direction, self.wind_speed, current, active,
+                    client.baseline, client.baseline_active)
+            ack = SNAPSHOT_ACK.pack(client.ack)
+            message = FRAME_HEADER.pack(len(ack) + len(body), MSG_SNAPSHOT) + ack + body
+            client.writer.write(message) # One write, so one send per client per tick
+            self.bytes_sent += len(message)
+            client.baseline, client.baseline_active, client.baseline_tick = current, active, self.tick_count
+
+    # --- Networking ---
+    async def handle_connection(self, reader, writer):
+        slot = None
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            message_type, payload = await asyncio.wait_for(read_frame(reader), SERVER_HELLO_TIMEOUT)
+            if message_type != MSG_HELLO:
+                return
+            name = payload[:MAX_NAME_LENGTH].decode('utf-8', 'replace')
+            slot = self.join(name)
+            if slot is None:
+                writer.write(frame(MSG_BYE, b"server full"))
+                await writer.drain()
+                return
+            client = self.clients[slot] = ClientConnection(slot, name, writer)
+            flags = WELCOME_WIND_SHADOW if self.wind_shadow else 0
+            writer.write(frame(MSG_WELCOME, encode_welcome(slot, self.slots, self.tick_rate, self.world_size,
+                                                           self.tick_count, self.gates, flags)))
+            if self.verbose:
+                print(f"{name} joined (slot {slot})")
+            while True:
+                message_type, payload = await read_frame(reader)
+                if message_type == MSG_INPUT:
+                    self.receive_input(client, *INPUT_MESSAGE.unpack(payload))
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, ProtocolError, struct.error):
+            pass
+        finally:
+            if slot is not None:
+                if self.verbose:
+                    print(f"{self.names.get(slot)} left (slot {slot})")
+                self.leave(slot)
+            writer.close()
+            self.connections.discard(task)
+
+    def stats(self):
+        times = np.array(self.tick_times) * 1000 if self.tick_times else np.zeros(1)
+        return {
+            'clients': len(self.clients),
+            'bots': int((self.active & self.is_bot).sum()),
+            'tick_p50_ms': float(np.percentile(times, 50)),
+            'tick_p99_ms': float(np.percentile(times, 99)),
+            'tick_max_ms': float(times.max()),
+            'bytes_sent': self.bytes_sent,
+            'dropped_ticks': self.dropped_ticks,
+            'skipped_snapshots': sum(client.skipped for client in self.clients.values()),
+        }
+
+    async def run(self, duration=None):
+        # Fixed-tick loop. After a stall, up to SERVER_MAX_CATCHUP_TICKS ticks run
+        # back to back and the rest are dropped, so ticks stay evenly spaced.
+        loop = asyncio.get_running_loop()
+        dt = 1.0 / self.tick_rate
+        next_tick = started = loop.time()
+        next_stats = started + SERVER_STATS_INTERVAL
+        while duration is None or loop.time() - started < duration:
+            now = loop.time()
+            if now < next_tick:
+                await asyncio.sleep(next_tick - now)
+                continue
+            late = int((now - next_tick) / dt)
+            if late > SERVER_MAX_CATCHUP_TICKS:
+                self.dropped_ticks += late
+                next_tick = now
+            self.tick()
+            next_tick += dt
+            if self.verbose and now >= next_stats:
+                next_stats = now + SERVER_STATS_INTERVAL
+                s = self.stats()
+                print(f"tick {self.tick_count}: {s['clients']} clients, {s['bots']} bots, "
+                      f"tick p50 {s['tick_p50_ms']:.2f} ms p99 {s['tick_p99_ms']:.2f} ms max {s['tick_max_ms']:.2f} ms, "
+                      f"{s['bytes_sent'] / 1e6:.1f} MB sent, {s['skipped_snapshots']} snapshots skipped, "
+                      f"{s['dropped_ticks']} ticks dropped")
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT, duration=None):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        self.port = server.sockets[0].getsockname()[1]
+        if self.verbose:
+            print(f"Race server on {host}:{self.port}, {len(self.gates)} gates, {self.tick_rate} ticks/s")
+        async with server:
+            await self.run(duration)
+            # Hang up on everyone and let the handlers return before the loop closes
+            for client in list(self.clients.values()):
+                client.writer.close()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Authoritative race server (see client.py)")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--slots', type=int, default=SERVER_SLOTS, help="maximum number of boats")
+    parser.add_argument('--bots', type=int, default=0, help="boats sailed by the server's autopilot")
+    parser.add_argument('--course', metavar='FILE', help="course file (.json or .toml, see course.py)")
+    parser.add_argument('--world', metavar='WIDTHxHEIGHT', help="world size in pixels (default: one screen)")
+    parser.add_argument('--random-gates', type=int, metavar='N', help="scatter N gates over the world")
+    parser.add_argument('--duration', type=float, help="stop after this many seconds")
+    parser.add_argument('--no-wind-shadow', action='store_true', help="boats do not slow the wind behind them")
+    args = parser.parse_args(argv)
+
+    world_size = (WORLD_WIDTH, WORLD_HEIGHT)
+    if args.world:
+        world_size = tuple(int(v) for v in args.world.lower().split('x'))
+    gates, start, ordered = None, None, False
+    if args.random_gates:
+        gates = random_gates(args.random_gates, *world_size)
+    if args.course:
+        try:
+            course = load_course(args.course)
+        except (CourseError, OSError) as e:
+            parser.error(str(e))
+        # One gate per leg (a gate sailed on every lap is raced once per lap), in course order
+        gates, legs = course.gates()
+        if any(len(leg) > 1 for leg in legs):
+            parser.error(f"{args.course}: the server does not support alternative gates")
+        world_size, start, ordered = course.world_size, course.start, True
+    server = RaceServer(gates, world_size, args.slots, start=start, wind_shadow=not args.no_wind_shadow, ordered=ordered,
+                        verbose=True)
+    server.add_bots(args.bots)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.duration))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
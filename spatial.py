@@ -0,0 +1,304 @@
+import math
+
+import numpy as np
+
+from collision import line_crossing_time, swept_circle_times
+from constants import *
+
+# Gate.check_passage scores a crossing of the gate line anywhere along the
+# (infinite) line: between the buoys is a valid passage, elsewhere it is
+# "passed outside". Boats never leave the world rectangle, so each gate line
+# is clipped to it and rasterized into the grid with its buoys. A boat only
+# needs to test the gates registered in the cells its last move touched, and
+# gets exactly the same outcomes as looping over every gate.
+
+BOAT_HIT_RADIUS = BOAT_WIDTH / 2 # Same approximate boat radius as Gate.check_passage
+_CELL_EPSILON = 1e-6 # Padding so items lying exactly on a cell border land in both cells
+
+
+def neighbour_pairs(x, y, px, py, cell_size):
+    # (sample, point) index pairs of the points within one cell_size (a number, or
+    # (width, height)) of each sample (x, y) along both axes, and maybe a bit
+    # further: the points are bucketed into a grid of such cells and each sample
+    # gathers the 3x3 cells around its own. Memory and time grow with the number
+    # of close pairs rather than samples x points.
+    cell_w, cell_h = (cell_size, cell_size) if np.ndim(cell_size) == 0 else cell_size
+    x, y, px, py = (np.asarray(a, dtype=float) for a in (x, y, px, py))
+    keys = _cell_keys(np.floor(px / cell_w).astype(np.int64), np.floor(py / cell_h).astype(np.int64))
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    sample_col, sample_row = np.floor(x / cell_w).astype(np.int64), np.floor(y / cell_h).astype(np.int64)
+    samples, points = [], []
+    for dc in (-1, 0, 1):
+        for dr in (-1, 0, 1):
+            cells = _cell_keys(sample_col + dc, sample_row + dr)
+            starts = np.searchsorted(keys, cells, side='left')
+            counts = np.searchsorted(keys, cells, side='right') - starts
+            total = int(counts.sum())
+            offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+            samples.append(np.repeat(np.arange(len(x)), counts))
+            points.append(order[offsets])
+    return np.concatenate(samples), np.concatenate(points)
+
+
+def _cell_keys(col, row):
+    # One int64 per (col, row) cell of an unbounded grid
+    return (col << 32) + (row + (1 << 31))
+
+
+class GateIndex:
+    # lines=False only indexes the buoys: enough for culling, and much faster to
+    # build on large worlds, but candidates() may then miss gate line crossings
+    # (worlds following a course sequence only test the next gates anyway).
+    def __init__(self, gates, bounds=(0, 0, WORLD_WIDTH, WORLD_HEIGHT), cell_size=GATE_GRID_CELL_SIZE, lines=True):
+        self.gates = gates
+        self.cell_size = cell_size
+        self.lines = lines
+        # Grid covers the world plus a margin for buoys sitting on its edge
+        margin = GATE_BUOY_RADIUS + BOAT_HIT_RADIUS + cell_size
+        self.min_x = bounds[0] - margin
+        self.min_y = bounds[1] - margin
+        self.max_x = bounds[2] + margin
+        self.max_y = bounds[3] + margin
+        self.cols = int(math.ceil((self.max_x - self.min_x) / cell_size))
+        self.rows = int(math.ceil((self.max_y - self.min_y) / cell_size))
+
+        # Precomputed gate geometry, one row per gate, for the batched test
+        self.port = np.array([(g.port_buoy_pos.x, g.port_buoy_pos.y) for g in gates], dtype=float).reshape(-1, 2)
+        self.starboard = np.array([(g.starboard_buoy_pos.x, g.starboard_buoy_pos.y) for g in gates], dtype=float).reshape(-1, 2)
+        self.center = np.array([(g.center.x, g.center.y) for g in gates], dtype=float).reshape(-1, 2)
+        self.passage = np.array([(g.passage_direction_vec.x, g.passage_direction_vec.y) for g in gates], dtype=float).reshape(-1, 2)
+        self.line = np.array([(g.gate_line_vec_ps.x, g.gate_line_vec_ps.y) for g in gates], dtype=float).reshape(-1, 2)
+        self.half_width = np.array([g.width / 2 for g in gates], dtype=float)
+        self.hit_radius = np.array([g.buoy_radius + BOAT_HIT_RADIUS for g in gates], dtype=float)
+
+        # Both cell tables are built on first use: a world following a course
+        # sequence never asks for candidates, a headless one never culls
+        self._cell_lists = None
+        self._buoy_cell_lists = None
+
+    @property
+    def cell_lists(self):
+        if self._cell_lists is None:
+            self._build_cells()
+        return self._cell_lists
+
+    @property
+    def cell_start(self):
+        if self._cell_lists is None:
+            self._build_cells()
+        return self._cell_start
+
+    @property
+    def cell_gates(self):
+        if self._cell_lists is None:
+            self._build_cells()
+        return self._cell_gates
+
+    @property
+    def buoy_cell_lists(self):
+        # Second grid with only the buoys, for drawing: gate lines span the whole
+        # world and would put every gate in the view of any camera
+        if self._buoy_cell_lists is None:
+            self._buoy_cell_lists = self._fill_cells(self._rect_cells(*self._buoy_bounds(i)) for i in range(len(self.gates)))
+        return self._buoy_cell_lists
+
+    # --- Building ---
+    def _fill_cells(self, gate_cells):
+        # Cell -> gates lists; gates are added in order, so each list is sorted
+        cells = [[] for _ in range(self.cols * self.rows)]
+        for i, gate_cell_set in enumerate(gate_cells):
+            for cell in gate_cell_set:
+                cells[cell].append(i)
+        return cells
+
+    def _build_cells(self):
+        self._cell_lists = self._fill_cells(self._gate_cells(i) for i in range(len(self.gates)))
+        # Compact cell -> gates table (CSR layout)
+        counts = np.fromiter((len(c) for c in self._cell_lists), dtype=np.int64, count=len(self._cell_lists))
+        self._cell_start = np.concatenate(([0], np.cumsum(counts)))
+        self._cell_gates = np.fromiter((i for c in self._cell_lists for i in c), dtype=np.int64, count=int(counts.sum()))
+
+    def _cell_range(self, lo, hi, origin, count):
+        first = int((lo - _CELL_EPSILON - origin) // self.cell_size)
+        last = int((hi + _CELL_EPSILON - origin) // self.cell_size)
+        return max(first, 0), min(last, count - 1)
+
+    def _rect_cells(self, x0, y0, x1, y1):
+        c0, c1 = self._cell_range(min(x0, x1), max(x0, x1), self.min_x, self.cols)
+        r0, r1 = self._cell_range(min(y0, y1), max(y0, y1), self.min_y, self.rows)
+        return {r * self.cols + c for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)}
+
+    def _segment_cells(self, x0, y0, x1, y1):
+        # Every cell the segment passes through, swept one grid column at a time
+        if x1 < x0:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        if x1 - x0 < _CELL_EPSILON:
+            return self._rect_cells(x0, y0, x1, y1)
+        cells = set()
+        slope = (y1 - y0) / (x1 - x0)
+        c0, c1 = self._cell_range(x0, x1, self.min_x, self.cols)
+        for c in range(c0, c1 + 1):
+            xa = max(x0, self.min_x + c * self.cell_size)
+            xb = min(x1, self.min_x + (c + 1) * self.cell_size)
+            ya = y0 + (xa - x0) * slope
+            yb = y0 + (xb - x0) * slope
+            r0, r1 = self._cell_range(min(ya, yb), max(ya, yb), self.min_y, self.rows)
+            cells.update(r * self.cols + c for r in range(r0, r1 + 1))
+        return cells
+
+    def _clipped_gate_line(self, i):
+        # Gate line clipped to the grid rectangle (Liang-Barsky on an infinite line)
+        px, py = self.port[i]
+        dx, dy = self.line[i]
+        t_min, t_max = -math.inf, math.inf
+        for p, d, lo, hi in ((px, dx, self.min_x, self.max_x), (py, dy, self.min_y, self.max_y)):
+            if abs(d) < 1e-12:
+                if not lo <= p <= hi:
+                    return None
+                continue
+            ta, tb = (lo - p) / d, (hi - p) / d
+            t_min, t_max = max(t_min, min(ta, tb)), min(t_max, max(ta, tb))
+        if t_min > t_max:
+            return None
+        return px + dx * t_min, py + dy * t_min, px + dx * t_max, py + dy * t_max
+
+    def _buoy_bounds(self, i):
+        # Box around both buoys as drawn
+        r = self.gates[i].buoy_radius
+        (px, py), (sx, sy) = self.port[i], self.starboard[i]
+        return min(px, sx) - r, min(py, sy) - r, max(px, sx) + r, max(py, sy) + r
+
+    def _gate_cells(self, i):
+        cells = set()
+        for bx, by in (self.port[i], self.starboard[i]):
+            r = self.hit_radius[i]
+            cells |= self._rect_cells(bx - r, by - r, bx + r, by + r)
+        line = self._clipped_gate_line(i) if self.lines else None
+        if line is not None:
+            cells |= self._segment_cells(*line)
+        return cells
+
+    # --- Queries ---
+    def _inside(self, x, y):
+        return self.min_x <= x <= self.max_x and self.min_y <= y <= self.max_y
+
+    def candidates(self, boat_pos_prev, boat_pos_curr):
+        # Indices (in course order) of the gates the move prev -> curr could score
+        (x0, y0), (x1, y1) = boat_pos_prev, boat_pos_curr
+        if not (self._inside(x0, y0) and self._inside(x1, y1)):
+            return range(len(self.gates)) # Off the grid: fall back to testing everything
+        c0, r0 = int((x0 - self.min_x) // self.cell_size), int((y0 - self.min_y) // self.cell_size)
+        c1, r1 = int((x1 - self.min_x) // self.cell_size), int((y1 - self.min_y) // self.cell_size)
+        if c0 == c1 and r0 == r1 and c0 < self.cols and r0 < self.rows:
+            return self.cell_lists[r0 * self.cols + c0] # Usual case: the move stays in one cell
+        found = set()
+        for cell in self._rect_cells(x0, y0, x1, y1):
+            found.update(self.cell_lists[cell])
+        return sorted(found)
+
+    def gates_in_rect(self, x0, y0, x1, y1):
+        # Indices (in course order) of the gates whose buoys overlap the world rect, for culling
+        found = set()
+        for cell in self._rect_cells(x0, y0, x1, y1):
+            found.update(self.buoy_cell_lists[cell])
+        visible = []
+        for i in sorted(found):
+            bx0, by0, bx1, by1 = self._buoy_bounds(i)
+            if bx0 <= x1 and bx1 >= x0 and by0 <= y1 and by1 >= y0:
+                visible.append(i)
+        return visible
+
+    def check_passage(self, boat_pos_prev, boat_pos_curr):
+        # Drop-in for "for gate in gates: gate.check_passage(...)", summing the score changes
+        score_change = 0
+        for i in self.candidates(boat_pos_prev, boat_pos_curr):
+            score_change += self.gates[i].check_passage(boat_pos_prev, boat_pos_curr)
+        return score_change
+
+    def candidate_pairs(self, x_prev, y_prev, x_curr, y_curr):
+        # (boat, gate) index pairs to test for a whole fleet of moves at once
+        x_prev, y_prev, x_curr, y_curr = (np.asarray(a, dtype=float) for a in (x_prev, y_prev, x_curr, y_curr))
+        cs = self.cell_size
+        c0 = np.floor((np.minimum(x_prev, x_curr) - self.min_x) / cs).astype(np.int64)
+        c1 = np.floor((np.maximum(x_prev, x_curr) - self.min_x) / cs).astype(np.int64)
+        r0 = np.floor((np.minimum(y_prev, y_curr) - self.min_y) / cs).astype(np.int64)
+        r1 = np.floor((np.maximum(y_prev, y_curr) - self.min_y) / cs).astype(np.int64)
+        inside = (c0 >= 0) & (r0 >= 0) & (c1 < self.cols) & (r1 < self.rows)
+        single = inside & (c0 == c1) & (r0 == r1)
+
+        # Common case: the move stays inside one cell, gather its gates without a Python loop
+        boats = np.nonzero(single)[0]
+        cells = r0[boats] * self.cols + c0[boats]
+        starts = self.cell_start[cells]
+        counts = self.cell_start[cells + 1] - starts
+        total = int(counts.sum())
+        pair_boats = [np.repeat(boats, counts)]
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        pair_gates = [self.cell_gates[offsets]]
+
+        # Moves spanning several cells (or leaving the grid, e.g. screen wrap) take the slow path
+        for b in np.nonzero(~single)[0]:
+            gates = list(self.candidates((x_prev[b], y_prev[b]), (x_curr[b], y_curr[b])))
+            pair_boats.append(np.full(len(gates), b, dtype=np.int64))
+            pair_gates.append(np.array(gates, dtype=np.int64))
+        return np.concatenate(pair_boats), np.concatenate(pair_gates)
+
+    def check_passages(self, x_prev, y_prev, x_curr, y_curr, attempted, passed=None, swept=GATE_SWEPT_COLLISION):
+        # Batched Gate.check_passage for many boats.
+        # attempted (and optionally passed) are (n_boats, n_gates) bool arrays holding
+        # each boat's own gate flags; they are updated in place.
+        # Returns the per-boat score change and the (boat, gate, points, impact_time)
+        # of every scoring event.
+        # Moves are straight segments: pass Fleet.move_start() as the previous positions,
+        # so that boats wrapping around the world edge are not swept across it.
+        x_prev, y_prev, x_curr, y_curr = (np.asarray(a, dtype=float) for a in (x_prev, y_prev, x_curr, y_curr))
+        b, g = self.candidate_pairs(x_prev, y_prev, x_curr, y_curr)
+        keep = ~attempted[b, g]
+        b, g = b[keep], g[keep]
+
+        x0, y0, x1, y1 = x_prev[b], y_prev[b], x_curr[b], y_curr[b]
+        port, starboard = self.port[g], self.starboard[g]
+        ones = np.ones(len(b))
+
+        # 1. Collision with buoys
+        if swept:
+            t_hit = np.minimum(
+                swept_circle_times(x0, y0, x1, y1, port[:, 0], port[:, 1], self.hit_radius[g]),
+                swept_circle_times(x0, y0, x1, y1, starboard[:, 0], starboard[:, 1], self.hit_radius[g]))
+            hit = np.isfinite(t_hit)
+        else:
+            hit = np.sqrt((x1 - port[:, 0]) ** 2 + (y1 - port[:, 1]) ** 2) < self.hit_radius[g]
+            hit |= np.sqrt((x1 - starboard[:, 0]) ** 2 + (y1 - starboard[:, 1]) ** 2) < self.hit_radius[g]
+            t_hit = ones
+
+        # 2. Crossing the gate line
+        passage, line = self.passage[g], self.line[g]
+        dist_prev = (x0 - port[:, 0]) * passage[:, 0] + (y0 - port[:, 1]) * passage[:, 1]
+        dist_curr = (x1 - port[:, 0]) * passage[:, 0] + (y1 - port[:, 1]) * passage[:, 1]
+        forward = (dist_prev < 0) & (dist_curr >= 0)
+        backward = (dist_prev >= 0) & (dist_curr < 0)
+        if swept:
+            # Judge the crossing where it happens rather than at the end position
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t_cross = np.where(forward | backward, line_crossing_time(dist_prev, dist_curr), 1.0)
+        else:
+            t_cross = ones
+        cross_x = x0 + (x1 - x0) * t_cross
+        cross_y = y0 + (y1 - y0) * t_cross
+        center = self.center[g]
+        between = np.abs((cross_x - center[:, 0]) * line[:, 0] + (cross_y - center[:, 1]) * line[:, 1]) < self.half_width[g]
+
+        points = np.select(
+            [hit, forward & between, forward, backward & between],
+            [POINTS_HIT_BUOY, POINTS_VALID_PASSAGE, POINTS_PASSED_OUTSIDE, POINTS_WRONG_DIRECTION],
+            0)
+        impact_time = np.where(hit, t_hit, t_cross)
+        scored = points != 0
+        attempted[b[scored], g[scored]] = True
+        if passed is not None:
+            valid = points == POINTS_VALID_PASSAGE
+            passed[b[valid], g[valid]] = True
+
+        score_change = np.bincount(b[scored], weights=points[scored], minlength=len(x_curr)).astype(int)
+        return score_change, (b[scored], g[scored], points[scored], impact_time[scored])
@@ -0,0 +1,79 @@
+import pygame
+
+from constants import SPRITE_ROTATION_RESOLUTION, SPRITE_SMOOTH_ROTATION
+
+
+class RotationCache:
+    # Rotated copies of one sprite, one per quantized heading.
+    # Each heading is rendered the first time it is asked for and kept, so memory
+    # is bounded by 360 / resolution_deg surfaces and rotation costs nothing afterwards.
+    def __init__(self, original_image, resolution_deg=SPRITE_ROTATION_RESOLUTION, smooth=SPRITE_SMOOTH_ROTATION):
+        if resolution_deg <= 0:
+            raise ValueError(f"resolution_deg must be positive, got {resolution_deg}")
+        self.original = original_image
+        self.resolution_deg = resolution_deg
+        self.smooth = smooth # Use rotozoom (anti-aliased) instead of rotate
+        self.steps = int(round(360 / resolution_deg))
+        self._sprites = [None] * self.steps
+        self.rendered = 0
+        self.memory_bytes = 0
+
+    def index(self, angle):
+        return int(round(angle / self.resolution_deg)) % self.steps
+
+    def get(self, angle):
+        # angle is the boat heading in degrees (0 = North, clockwise)
+        i = self.index(angle)
+        sprite = self._sprites[i]
+        if sprite is None:
+            heading = i * 360 / self.steps
+            # Pygame rotates counter-clockwise, so negative angle
+            if self.smooth:
+                sprite = pygame.transform.rotozoom(self.original, -heading, 1)
+            else:
+                sprite = pygame.transform.rotate(self.original, -heading)
+            self._sprites[i] = sprite
+            self.rendered += 1
+            self.memory_bytes += sprite.get_width() * sprite.get_height() * sprite.get_bytesize()
+        return sprite
+
+    def prerender(self):
+        for i in range(self.steps):
+            self.get(i * 360 / self.steps)
+        return self
+
+    def report(self):
+        return {
+            'resolution_deg': self.resolution_deg,
+            'smooth': self.smooth,
+            'rendered': self.rendered,
+            'steps': self.steps,
+            'memory_bytes': self.memory_bytes,
+        }
+
+
+# Caches shared by every sprite of the same design, keyed by (design, resolution, smooth)
+_caches = {}
+
+
+def get_rotation_cache(design, build_image, resolution_deg=SPRITE_ROTATION_RESOLUTION, smooth=SPRITE_SMOOTH_ROTATION):
+    # build_image() is only called the first time a design is requested
+    key = (design, resolution_deg, smooth)
+    cache = _caches.get(key)
+    if cache is None:
+        cache = _caches[key] = RotationCache(build_image(), resolution_deg, smooth)
+    return cache
+
+
+def sprite_cache_report():
+    # Per-cache stats plus the total memory held by all rotation caches
+    caches = {f"{design}@{resolution}{' smooth' if smooth else ''}": cache.report()
+              for (design, resolution, smooth), cache in _caches.items()}
+    return {
+        'caches': caches,
+        'total_memory_bytes': sum(cache.memory_bytes for cache in _caches.values()),
+    }
+
+
+def clear_sprite_caches():
+    _caches.clear()
@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+from constants import *
+
+# Telemetry of a World: the boat state of every tick and the gate events, logged
+# for analysis after the run (instead of print() calls).
+#
+# Rows are written into preallocated ring buffers (no allocation while sailing).
+# A full slot is handed to a background thread, which appends each column to its
+# own .npy file while the next slot fills. A log is a directory:
+#
+#   meta.json            tick duration and the columns of each stream
+#   ticks.<column>.npy   one row per tick (TICK_COLUMNS)
+#   gates.<column>.npy   one row per scored or penalized gate (GATE_COLUMNS)
+#
+# Every column file is a valid .npy at all times: numpy leaves room in the
+# header for the length to grow, and it is rewritten after each batch. Columns
+# are memory-mapped by TelemetryReader, so hours of log open instantly, even
+# while still being written.
+
+# (name, dtype on disk)
+TICK_COLUMNS = (
+    ('tick', '<u4'),
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('angle', '<f4'),
+    ('speed', '<f4'),
+    ('aoa', '<f4'), # Angle of attack of the wind on the boom plane
+    ('boom', '<f4'), # Boom deflection from aft (positive = port)
+    ('wind_direction', '<f4'),
+    ('wind_speed', '<f4'),
+    ('thrust', '<f4'), # Thrust coefficient, sail + hull (last boat update of the tick)
+    ('hull_thrust', '<f4'), # Hull part of it (NaN with a polar table)
+    ('drag', '<f4'), # Speed lost to water resistance (last boat update of the tick)
+    ('score', '<i4'),
+)
+GATE_COLUMNS = (
+    ('tick', '<u4'),
+    ('gate', '<u4'), # Index in world.gates
+    ('points', '<i2'),
+)
+
+
+class _ColumnFile:
+    # One growing .npy file
+    def __init__(self, path, dtype):
+        self.file = open(path, 'wb')
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self._write_header()
+
+    def _write_header(self):
+        self.file.seek(0)
+        npy_format.write_array_header_1_0(self.file, {
+            'descr': npy_format.dtype_to_descr(self.dtype), 'fortran_order': False, 'shape': (self.length,)})
+        self.file.flush()
+
+    def append(self, values):
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(values.astype(self.dtype).tobytes())
+        self.length += len(values)
+        self._write_header()
+
+    def close(self):
+        self.file.close()
+
+
+class _Stream:
+    # Ring of preallocated (rows, columns) float64 slots: the one being filled,
+    # and the full ones waiting for the writer, which returns them to `free`.
+    def __init__(self, directory, name, columns, rows, slots):
+        self.columns = columns
+        self.files = [_ColumnFile(os.path.join(directory, f"{name}.{column}.npy"), dtype) for column, dtype in columns]
+        self.free = queue.Queue()
+        for _ in range(slots):
+            self.free.put(np.empty((rows, len(columns))))
+        self.slot = self.free.get()
+        self.n = 0
+        self.written = 0 # Rows on disk
+
+    def write(self, rows):
+        # Writer thread
+        for j, file in enumerate(self.files):
+            file.append(rows[:, j])
+        self.written += len(rows)
+
+
+class TelemetryLog:
+    # World hook: world.telemetry = TelemetryLog(path, world.dt); close() when done
+    def __init__(self, path, dt=PHYSICS_DT, tick_rows=TELEMETRY_BUFFER_TICKS, gate_rows=TELEMETRY_BUFFER_GATE_EVENTS,
+                 slots=TELEMETRY_BUFFER_SLOTS):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'dt': dt, 'streams': {'ticks': TICK_COLUMNS, 'gates': GATE_COLUMNS}}, f)
+        self.ticks = _Stream(path, 'ticks', TICK_COLUMNS, tick_rows, slots)
+        self.gates = _Stream(path, 'gates', GATE_COLUMNS, gate_rows, slots)
+        self.error = None # First exception of the writer thread, raised in the recording thread
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self._writer, name='telemetry-writer', daemon=True)
+        self.thread.start()
+
+    def _writer(self):
+        while True:
+            batch = self.pending.get()
+            if batch is None:
+                return
+            stream, slot, n = batch
+            if self.error is None:
+                try:
+                    stream.write(slot[:n])
+                except Exception as e:
+                    self.error = e
+            stream.free.put(slot)
+
+    def _append(self, stream, row):
+        stream.slot[stream.n] = row
+        stream.n += 1
+        if stream.n == len(stream.slot):
+            self._flush(stream)
+
+    def _flush(self, stream):
+        if self.error is not None:
+            raise self.error
+        if stream.n:
+            self.pending.put((stream, stream.slot, stream.n))
+            stream.slot = stream.free.get() # Only waits if every slot is queued
+            stream.n = 0
+
+    def record_tick(self, world):
+        boat = world.boat
+        self._append(self.ticks, (world.tick_count, boat.x, boat.y, boat.angle, boat.speed, boat.current_aoa_boom_plane,
+                                  boat.boom_deflection_from_aft, world.wind_direction, world.wind_speed,
+                                  boat.thrust_coefficient, boat.hull_thrust, boat.drag, world.score))
+
+    def gate_event(self, tick, gate, points):
+        self._append(self.gates, (tick, gate, points))
+
+    def flush(self):
+        # Hands the partly filled slots to the writer (they are on disk once it gets to them)
+        self._flush(self.ticks)
+        self._flush(self.gates)
+
+    def close(self):
+        # Writes everything recorded and returns the number of ticks logged. The
+        # writer thread is stopped and the files closed even after a write error.
+        try:
+            self.flush()
+        finally:
+            self.pending.put(None)
+            self.thread.join()
+            for stream in (self.ticks, self.gates):
+                for file in stream.files:
+                    file.close()
+        if self.error is not None:
+            raise self.error
+        return self.ticks.written
+
+
+class TelemetryReader:
+    # Memory-maps the columns of a log: reader.ticks['speed'], reader.gates['points'], ...
+    # Nothing is read from disk until used. A log still being written is cut at
+    # the last batch every column of a stream has.
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.path = path
+        self.dt = meta['dt']
+        streams = {}
+        for name, columns in meta['streams'].items():
+            arrays = {column: np.load(os.path.join(path, f"{name}.{column}.npy"), mmap_mode='r') for column, _ in columns}
+            n = min(len(a) for a in arrays.values())
+            streams[name] = {column: a[:n] for column, a in arrays.items()}
+        self.ticks = streams['ticks']
+        self.gates = streams['gates']
+
+    def __len__(self):
+        return len(self.ticks['tick'])
+
+    def time(self):
+        return self.ticks['tick'] * self.dt
+
+    def between(self, start, end):
+        # Tick rows from start to end seconds (slices of the memory maps)
+        first, last = np.searchsorted(self.ticks['tick'], (start / self.dt, end / self.dt))
+        return {column: a[first:last] for column, a in self.ticks.items()}
+
+    def summary(self):
+        speed = self.ticks['speed']
+        points = self.gates['points']
+        return {
+            'ticks': len(self),
+            'duration': len(self) * self.dt,
+            'mean_speed': float(np.mean(speed)) if len(speed) else 0.0,
+            'max_speed': float(np.max(np.abs(speed))) if len(speed) else 0.0,
+            'gate_events': len(points),
+            'valid_passages': int(np.sum(points == POINTS_VALID_PASSAGE)),
+            'score': int(self.ticks['score'][-1]) if len(self) else 0,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summary of a telemetry log (see main.py --telemetry)")
+    parser.add_argument('path')
+    args = parser.parse_args(argv)
+    reader = TelemetryReader(args.path)
+    for key, value in reader.summary().items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
+    gates = reader.gates
+    for tick, gate, points in zip(gates['tick'], gates['gate'], gates['points']):
+        print(f"  {tick * reader.dt:8.2f} s  gate {gate}: {points:+d}")
+
+
+if __name__ == '__main__':
+    main()
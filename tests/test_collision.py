@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+import pytest
+
+from collision import line_crossing_time, swept_circle_time, swept_circle_times
+from constants import *
+from gate import Gate
+
+# North-bound gate: port buoy at (450, 300), starboard buoy at (350, 300)
+HIT_RADIUS = GATE_BUOY_RADIUS + BOAT_WIDTH / 2
+
+
+def gate(swept):
+    return Gate(400, 300, 100, 0, verbose=False, swept=swept)
+
+
+def test_fast_boat_tunnelling_through_buoy():
+    # One step from below the port buoy to above it, past the hit radius
+    move = (450, 400), (450, 200)
+    assert gate(False).check_passage(*move) == POINTS_PASSED_OUTSIDE
+    swept = gate(True)
+    assert swept.check_passage(*move) == POINTS_HIT_BUOY
+    assert swept.impact_time == pytest.approx((100 - HIT_RADIUS) / 200)
+
+
+def test_fast_boat_crossing_between_buoys():
+    # Crosses the line between the buoys but ends the step beyond the port buoy
+    move = (380, 400), (480, 100)
+    assert gate(False).check_passage(*move) == POINTS_PASSED_OUTSIDE
+    swept = gate(True)
+    assert swept.check_passage(*move) == POINTS_VALID_PASSAGE
+    assert swept.impact_time == pytest.approx(1 / 3)
+
+
+def test_wrong_direction_between_buoys():
+    assert gate(True).check_passage((400, 200), (400, 400)) == POINTS_WRONG_DIRECTION
+
+
+def both(x0, y0, x1, y1, cx, cy, radius):
+    # Scalar and vectorized results (the vectorized one uses inf for None)
+    t = swept_circle_time(x0, y0, x1, y1, cx, cy, radius)
+    ts = swept_circle_times(*(np.array([v], dtype=float) for v in (x0, y0, x1, y1, cx, cy, radius)))[0]
+    assert (math.inf if t is None else t) == ts
+    return t
+
+
+def test_swept_circle_tangent():
+    # Grazes the circle at its top at half the step
+    assert both(-10, 5, 10, 5, 0, 0, 5) == 0.5
+
+
+def test_swept_circle_starting_inside():
+    assert both(1, 1, 50, 50, 0, 0, 5) == 0.0
+    assert both(1, 1, 1, 1, 0, 0, 5) == 0.0
+
+
+def test_swept_circle_zero_motion_outside():
+    assert both(10, 10, 10, 10, 0, 0, 5) is None
+
+
+def test_swept_circle_misses():
+    assert both(-10, 6, 10, 6, 0, 0, 5) is None # Passes beside it
+    assert both(-20, 0, -10, 0, 0, 0, 5) is None # Stops short of it
+    assert both(10, 0, 20, 0, 0, 0, 5) is None # Moves away from it
+
+
+def test_swept_circle_entry_time():
+    assert both(-10, 0, 10, 0, 0, 0, 5) == 0.25
+    assert both(-10, 0, -5, 0, 0, 0, 5) == 1.0 # Touches it at the end of the step
+
+
+def test_line_crossing_time():
+    assert line_crossing_time(-1.0, 3.0) == 0.25
+    assert line_crossing_time(2.0, -2.0) == 0.5
+    assert line_crossing_time(-1.0, 0.0) == 1.0 # Ends on the line
+    assert line_crossing_time(0.0, -1.0) == 0.0 # Starts on the line
@@ -0,0 +1,110 @@
+import json
+import os
+
+import pytest
+
+from constants import *
+from course import CourseError, CourseSequence, load_course, parse_course
+from world import World
+
+GATES = [{'id': 'a', 'x': 400, 'y': 100, 'width': 100, 'heading': 0},
+         {'id': 'b', 'x': 400, 'y': 500, 'width': 100, 'heading': 180},
+         {'id': 'c', 'x': 600, 'y': 500, 'width': 100, 'heading': 180}]
+
+
+def course(**fields):
+    return parse_course(dict({'gates': GATES}, **fields))
+
+
+def test_legs_repeat_per_lap_between_start_and_finish():
+    line = {'x': 400, 'y': 300, 'width': 200, 'heading': 0}
+    c = course(laps=2, sequence=['a', ['b', 'c']], start_line=line, finish_line=line)
+    start, finish = c.gate_ids.index('start'), c.gate_ids.index('finish')
+    assert c.legs == [(start,), (0,), (1, 2), (0,), (1, 2), (finish,)]
+    gates, legs = c.gates()
+    # One Gate per leg entry, so a gate sailed every lap scores once per lap
+    assert legs == [(0,), (1,), (2, 3), (4,), (5, 6), (7,)]
+    assert len(gates) == 8
+    assert gates[1] is not gates[4] and gates[1].center == gates[4].center
+
+
+def test_sequence_advances_through_laps():
+    # After the last leg of a lap the sequence wraps to the first gate of the next lap
+    gates, legs = course(laps=2).gates()
+    sequence = CourseSequence(legs)
+    order = []
+    while not sequence.finished:
+        order.append(sequence.active())
+        sequence.advance(gates)
+    assert order == [(0,), (1,), (2,), (3,), (4,), (5,)]
+    assert sequence.active() == ()
+    assert all(gate.attempted_or_scored for gate in gates)
+
+
+def test_alternative_gates_close_together():
+    gates, legs = course(sequence=['a', ['b', 'c']]).gates()
+    sequence = CourseSequence(legs)
+    sequence.advance(gates)
+    sequence.advance(gates)
+    assert gates[1].attempted_or_scored and gates[2].attempted_or_scored
+    assert sequence.finished
+
+
+def cross(world, x, y_from, y_to):
+    boat = world.boat
+    boat.x_prev, boat.y_prev, boat.x, boat.y = x, y_from, x, y_to
+    return world._check_gates()
+
+
+def test_world_only_scores_current_leg():
+    world = World.from_course(course(laps=2))
+    # Gate b (southwards at y=500) before gate a: not the current leg, no points
+    assert cross(world, 400, 490, 510) == 0
+    assert world.sequence.leg == 0
+    assert cross(world, 400, 110, 90) == POINTS_VALID_PASSAGE
+    assert cross(world, 400, 490, 510) == POINTS_VALID_PASSAGE
+    assert cross(world, 600, 490, 510) == POINTS_VALID_PASSAGE
+    # Second lap: gate a scores again, as its own leg
+    assert world.sequence.leg == 3
+    assert cross(world, 400, 110, 90) == POINTS_VALID_PASSAGE
+    assert world.score == 4 * POINTS_VALID_PASSAGE
+
+
+@pytest.mark.parametrize('data, message', [
+    ([], "top level"),
+    ({'gates': []}, "non-empty"),
+    ({'gates': GATES, 'world': 5}, "world: expected an object"),
+    ({'gates': GATES, 'world': {'width': -1}}, "world.width"),
+    ({'gates': GATES, 'laps': 0}, "laps"),
+    ({'gates': GATES, 'laps': True}, "laps"),
+    ({'gates': GATES + [dict(GATES[0])]}, "duplicate"),
+    ({'gates': [{'id': 'a', 'x': 400, 'y': 100}]}, "missing width, heading"),
+    ({'gates': [dict(GATES[0], x='400')]}, "expected a number"),
+    ({'gates': [dict(GATES[0], x=900)]}, "outside"),
+    ({'gates': GATES, 'sequence': ['a', 'z']}, "unknown gate"),
+    ({'gates': GATES, 'sequence': ['a', []]}, "empty"),
+    ({'gates': GATES, 'start': {'x': -5, 'y': 300}}, "start: position"),
+    ({'gates': GATES, 'start': 'north'}, "start must be an object"),
+    ({'gates': GATES, 'start_line': {'x': 400, 'y': 700, 'width': 100, 'heading': 0}}, "start_line: center"),
+    ({'gates': GATES, 'finish_line': {'x': 900, 'y': 300, 'width': 100, 'heading': 0}}, "finish_line: center"),
+])
+def test_invalid_courses(data, message):
+    with pytest.raises(CourseError, match=message):
+        parse_course(data)
+
+
+def test_load_course_errors(tmp_path):
+    bad_json = tmp_path / 'bad.json'
+    bad_json.write_text('{"gates": [')
+    undecodable = tmp_path / 'latin1.json'
+    undecodable.write_bytes(json.dumps({'name': 'x', 'gates': GATES}).replace('x', '\xe9').encode('latin-1'))
+    undecodable_toml = tmp_path / 'latin1.toml'
+    undecodable_toml.write_bytes('name = "\xe9"\n'.encode('latin-1'))
+    for path in (bad_json, undecodable, undecodable_toml):
+        with pytest.raises(CourseError, match=path.name):
+            load_course(str(path))
+
+
+def test_load_default_course():
+    c = load_course(os.path.join(os.path.dirname(__file__), '..', 'courses', 'default.json'))
+    assert c.laps >= 1 and len(c.legs) >= len(c)
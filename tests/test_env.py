@@ -0,0 +1,45 @@
+import numpy as np
+
+from course import parse_course
+from env import SailingEnv, VecSailingEnv
+
+TWO_LAPS = {
+    'laps': 2,
+    'gates': [{'id': 'north', 'x': 400, 'y': 100, 'width': 100, 'heading': 0},
+              {'id': 'east', 'x': 600, 'y': 300, 'width': 100, 'heading': 90},
+              {'id': 'south', 'x': 400, 'y': 500, 'width': 100, 'heading': 180},
+              {'id': 'west', 'x': 200, 'y': 300, 'width': 100, 'heading': 270}],
+}
+
+
+def run_both(course, n=16, steps=3000):
+    # Same random actions in n SailingEnvs and one VecSailingEnv of n; returns the rewards of both
+    rng = np.random.default_rng(0)
+    singles = [SailingEnv(course=course) for _ in range(n)]
+    for env in singles:
+        env.reset()
+    vec = VecSailingEnv(n, course=course)
+    vec.reset()
+    single_rewards, vec_rewards = np.zeros((steps, n)), np.zeros((steps, n))
+    for t in range(steps):
+        actions = rng.integers(0, VecSailingEnv.n_actions, n)
+        _, vec_rewards[t], terminated, _, _ = vec.step(actions)
+        for i, env in enumerate(singles):
+            _, single_rewards[t, i], single_terminated, truncated, _ = env.step(actions[i])
+            assert single_terminated == terminated[i]
+            if single_terminated or truncated:
+                env.reset()
+    return single_rewards, vec_rewards
+
+
+def test_vec_env_matches_single_env():
+    single, vec = run_both(None)
+    np.testing.assert_allclose(vec, single, atol=1e-6)
+
+
+def test_vec_env_matches_single_env_on_multi_lap_course():
+    course = parse_course(TWO_LAPS)
+    single, vec = run_both(course)
+    # Gates are only scored on their own leg, lap after lap
+    assert np.count_nonzero(np.round(single)) > 0
+    np.testing.assert_allclose(vec, single, atol=1e-6)
@@ -0,0 +1,36 @@
+import numpy as np
+
+import evaluator
+from autopilot import optimal_deflection
+from constants import *
+from evaluator import CoursePolicy, run_lap
+from world import World
+
+
+def test_optimal_trim_clamped_to_boom_range():
+    policy = CoursePolicy('optimal', max_deflection=20)
+    assert np.abs(policy.trim_table.table).max() == 20
+    assert np.abs(CoursePolicy('optimal').trim_table.table).max() == BOOM_MAX_ANGLE_ADJUST
+    assert optimal_deflection(120, 20) == 20
+
+
+def test_fixed_trim_clamped_to_boom_range():
+    # A boom already at the limit of a 20 degree range is held, not eased further
+    world = World()
+    world.boat.boom_deflection_from_aft = 20
+    assert CoursePolicy('fixed', trim_deflection=30, max_deflection=20).trim_boom(world) == 0
+    assert CoursePolicy('fixed', trim_deflection=30).trim_boom(world) == 1
+
+
+def test_run_lap_gives_override_to_policy(monkeypatch):
+    ranges = []
+
+    class Policy(CoursePolicy):
+        def __init__(self, *args):
+            super().__init__(*args)
+            ranges.append(self.max_deflection)
+
+    monkeypatch.setattr(evaluator, 'CoursePolicy', Policy)
+    run_lap({'BOOM_MAX_ANGLE_ADJUST': 20, 'trim': 'optimal'}, max_seconds=1)
+    run_lap({}, max_seconds=1)
+    assert ranges == [20, BOOM_MAX_ANGLE_ADJUST]
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from boat import Boat
+from constants import *
+from fleet import Fleet, FleetBoat
+
+FIELDS = ('x', 'y', 'angle', 'speed', 'boom_deflection_from_aft', 'boom_angle_relative_to_boat', 'current_aoa_boom_plane')
+
+
+def random_fleet(rng, n):
+    fleet = Fleet(n)
+    fleet.x = rng.uniform(0, WORLD_WIDTH, n)
+    fleet.y = rng.uniform(0, WORLD_HEIGHT, n)
+    fleet.angle = rng.uniform(0, 360, n)
+    fleet.speed = rng.uniform(-1, BOAT_MAX_SPEED, n)
+    fleet.boom_deflection_from_aft = rng.choice([0.0, 15.0, -40.0, 88.0], n)
+    return fleet
+
+
+def boats_of(fleet):
+    boats = []
+    for i in range(fleet.n):
+        boat = Boat(fleet.x[i], fleet.y[i])
+        for name in ('angle', 'speed', 'boom_deflection_from_aft'):
+            setattr(boat, name, float(getattr(fleet, name)[i]))
+        boats.append(boat)
+    return boats
+
+
+@pytest.mark.parametrize('ticks', [0.5, 1, 7.3])
+def test_fleet_matches_boats(ticks):
+    # Random states, controls and per-boat wind: Fleet.update against Boat.update for every boat
+    rng = np.random.default_rng(int(ticks * 10))
+    n = 64
+    fleet = random_fleet(rng, n)
+    boats = boats_of(fleet)
+    dt = PHYSICS_DT * ticks
+    for _ in range(200):
+        turn = rng.integers(-1, 2, n) * BOAT_TURN_SPEED * ticks
+        boom = rng.integers(-1, 2, n) * BOOM_ADJUST_SPEED * ticks
+        wind_direction = rng.uniform(0, 360, n)
+        wind_speed = rng.uniform(0.5, 2, n)
+        fleet.rotate(turn)
+        fleet.adjust_boom(boom)
+        fleet.update(wind_direction, wind_speed, dt)
+        for i, boat in enumerate(boats):
+            boat.rotate(turn[i])
+            boat.adjust_boom(boom[i])
+            boat.update(wind_direction[i], wind_speed[i], dt)
+    for name in FIELDS:
+        expected = np.array([getattr(boat, name) for boat in boats])
+        np.testing.assert_allclose(getattr(fleet, name), expected, atol=1e-6, err_msg=name)
+
+
+def test_fleet_boat_row_view():
+    # A FleetBoat reads and writes its fleet row, and Boat.update on it agrees with Fleet.update
+    rng = np.random.default_rng(0)
+    fleet = random_fleet(rng, 4)
+    other = random_fleet(np.random.default_rng(0), 4)
+    row = FleetBoat(fleet, 2)
+    for _ in range(50):
+        row.update(WIND_DIRECTION, WIND_SPEED)
+        other.update(WIND_DIRECTION, WIND_SPEED)
+    for name in FIELDS:
+        assert getattr(row, name) == pytest.approx(getattr(other, name)[2], abs=1e-9)
+    row.speed = 3.0
+    assert fleet.speed[2] == 3.0
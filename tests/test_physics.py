@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from boat import Boat
+from constants import *
+from fleet import Fleet
+
+# A world large enough that nothing wraps around during the tests
+SIZE = 100000
+
+
+def new_boat():
+    boat = Boat(SIZE / 2, SIZE / 2)
+    boat.world_width = boat.world_height = SIZE
+    return boat
+
+
+def new_fleet(n):
+    fleet = Fleet(n, SIZE / 2, SIZE / 2)
+    fleet.world_width = fleet.world_height = SIZE
+    return fleet
+
+
+def sail(boat, seconds, dt, wind_direction=90):
+    for _ in range(round(seconds / dt)):
+        boat.update(wind_direction, WIND_SPEED, dt)
+    return boat
+
+
+@pytest.mark.parametrize('k', [2, 4, 10])
+def test_boat_step_of_k_ticks_matches_k_ticks(k):
+    # A boat sailing for 60 s ends up at the same speed and place whatever the step
+    ticks = sail(new_boat(), 60, PHYSICS_DT)
+    steps = sail(new_boat(), 60, PHYSICS_DT * k)
+    assert steps.speed == pytest.approx(ticks.speed, abs=1e-9)
+    assert (steps.x, steps.y) == pytest.approx((ticks.x, ticks.y), abs=1e-6)
+
+
+def test_boat_step_hits_speed_cap_like_ticks():
+    # Strong wind: the speed reaches BOAT_MAX_SPEED partway through the step
+    ticks, step = new_boat(), new_boat()
+    for _ in range(100):
+        ticks.update(90, WIND_SPEED * 50)
+    step.update(90, WIND_SPEED * 50, PHYSICS_DT * 100)
+    assert ticks.speed == step.speed == BOAT_MAX_SPEED
+    assert (step.x, step.y) == pytest.approx((ticks.x, ticks.y), abs=1e-6)
+
+
+@pytest.mark.parametrize('k', [4, 10])
+def test_fleet_step_of_k_ticks_matches_k_ticks(k):
+    wind = np.linspace(0, 360, 16, endpoint=False)
+    ticks, steps = new_fleet(16), new_fleet(16)
+    for _ in range(60 * PHYSICS_FPS):
+        ticks.update(wind, WIND_SPEED)
+    for _ in range(60 * PHYSICS_FPS // k):
+        steps.update(wind, WIND_SPEED, PHYSICS_DT * k)
+    np.testing.assert_allclose(steps.speed, ticks.speed, atol=1e-9)
+    np.testing.assert_allclose(steps.x, ticks.x, atol=1e-6)
+    np.testing.assert_allclose(steps.y, ticks.y, atol=1e-6)
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from constants import *
+from polar import PolarTable, thrust_coefficient
+
+
+@pytest.fixture(scope='module')
+def table():
+    return PolarTable()
+
+
+def test_lookup_at_grid_nodes(table):
+    for i in range(0, len(table.wind_angles) - 1, 7):
+        for j in range(0, len(table.deflections), 5):
+            wind, deflection = float(table.wind_angles[i]), float(table.deflections[j])
+            assert table.lookup(wind, deflection) == pytest.approx(table.thrust[i, j], abs=1e-12)
+    # Both ends of the deflection range and the wind angle wrapping at 360
+    assert table.lookup(90.0, BOOM_MAX_ANGLE_ADJUST) == pytest.approx(thrust_coefficient(90.0, BOOM_MAX_ANGLE_ADJUST))
+    assert table.lookup(90.0, -BOOM_MAX_ANGLE_ADJUST) == pytest.approx(thrust_coefficient(90.0, -BOOM_MAX_ANGLE_ADJUST))
+    assert table.lookup(360.0, 10.0) == pytest.approx(table.lookup(0.0, 10.0))
+
+
+def test_lookup_continuous_across_cell_edges(table):
+    eps = 1e-9
+    for wind in table.wind_angles[1:-1:5]:
+        for deflection in np.linspace(-80, 80, 9):
+            assert table.lookup(wind - eps, deflection) == pytest.approx(table.lookup(wind + eps, deflection), abs=1e-7)
+    for deflection in table.deflections[1:-1:3]:
+        for wind in (10.0, 95.5, 200.0, 333.3):
+            assert table.lookup(wind, deflection - eps) == pytest.approx(table.lookup(wind, deflection + eps), abs=1e-7)
+
+
+def test_lookup_matches_lookup_many_and_model(table):
+    rng = np.random.default_rng(0)
+    wind = rng.uniform(-360, 720, 500)
+    deflection = rng.uniform(-BOOM_MAX_ANGLE_ADJUST, BOOM_MAX_ANGLE_ADJUST, 500)
+    scalar = np.array([table.lookup(w, d) for w, d in zip(wind.tolist(), deflection.tolist())])
+    np.testing.assert_allclose(table.lookup_many(wind, deflection), scalar, atol=1e-12)
+    np.testing.assert_allclose(scalar, thrust_coefficient(wind % 360, deflection), atol=0.02)
@@ -0,0 +1,75 @@
+from constants import *
+from gate import Gate
+from server import ClientConnection, RaceServer
+
+
+class FakeTransport:
+    def is_closing(self):
+        return False
+
+    def get_write_buffer_size(self):
+        return 0
+
+
+class FakeWriter:
+    # Stands in for the asyncio StreamWriter of a connection (snapshots are dropped)
+    transport = FakeTransport()
+
+    def write(self, data):
+        pass
+
+
+def connect(server):
+    slot = server.join('player')
+    client = server.clients[slot] = ClientConnection(slot, 'player', FakeWriter())
+    return client
+
+
+def test_inputs_applied_after_a_pause():
+    # A client that connects, then sends nothing for a while (as client.play
+    # does while pygame opens its window) still steers once its inputs come
+    server = RaceServer(wind_shadow=False)
+    client = connect(server)
+    for _ in range(PHYSICS_FPS // 2):
+        server.tick()
+    assert server.fleet.angle[client.slot] == 0
+    for sequence in range(1, 61):
+        server.receive_input(client, sequence, 1, 0)
+        server.tick()
+    assert client.ack == 60
+    assert client.held <= 1 # Only the tick run since the last input
+    assert server.fleet.angle[client.slot] == 60 * BOAT_TURN_SPEED
+
+
+def test_late_input_keeps_queue_in_step():
+    # An input that misses its tick is acknowledged and held, not queued behind the next ones
+    server = RaceServer(wind_shadow=False)
+    client = connect(server)
+    server.receive_input(client, 1, 1, 0)
+    server.tick()
+    server.tick() # Input 2 is late
+    server.receive_input(client, 2, 1, 0)
+    assert client.ack == 2 and not client.inputs
+    server.receive_input(client, 3, -1, 0)
+    server.tick()
+    assert client.ack == 3
+    assert server.fleet.angle[client.slot] == BOAT_TURN_SPEED
+
+
+def sail_through(server, slot, x, y, heading):
+    # Puts the boat just before a gate line at full speed, so it crosses it in one tick
+    fleet = server.fleet
+    fleet.x[slot], fleet.y[slot], fleet.angle[slot], fleet.speed[slot] = x, y, heading, BOAT_MAX_SPEED
+    server.tick()
+
+
+def test_ordered_gates_only_score_in_order():
+    gates = [Gate(400, 100, 100, 0, verbose=False), Gate(400, 500, 100, 180, verbose=False)]
+    for ordered, first_points in ((True, 0), (False, POINTS_VALID_PASSAGE)):
+        server = RaceServer(gates, wind_shadow=False, ordered=ordered)
+        slot = connect(server).slot
+        sail_through(server, slot, 400, 497, 180) # Second gate first
+        assert server.score[slot] == first_points
+        sail_through(server, slot, 400, 103, 0)
+        sail_through(server, slot, 400, 497, 180)
+        assert server.score[slot] == 2 * POINTS_VALID_PASSAGE
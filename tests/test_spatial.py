@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from constants import *
+from gate import Gate
+from spatial import GateIndex
+
+SIZE = 3000 # World of 30 x 30 grid cells
+
+
+def random_gates(rng, n, swept):
+    # Gates anywhere in the world, including on its edges
+    return [Gate(rng.uniform(0, SIZE), rng.uniform(0, SIZE), rng.uniform(60, 200), rng.uniform(0, 360),
+                 verbose=False, swept=swept) for _ in range(n)]
+
+
+def random_moves(rng, n):
+    # Moves starting on or near cell boundaries and world edges, up to two cells long
+    cell = GATE_GRID_CELL_SIZE
+    start = rng.integers(0, SIZE // cell + 1, (n, 2)) * cell + rng.uniform(-3, 3, (n, 2))
+    start[: n // 4] = rng.choice([0.0, SIZE], (n // 4, 2)) + rng.uniform(-2, 2, (n // 4, 2))
+    start = np.clip(start, 0, SIZE)
+    end = np.clip(start + rng.uniform(-2 * cell, 2 * cell, (n, 2)), 0, SIZE)
+    return start[:, 0], start[:, 1], end[:, 0], end[:, 1]
+
+
+@pytest.mark.parametrize('swept', [False, True])
+def test_check_passages_matches_gate_loop(swept):
+    rng = np.random.default_rng(1 + swept)
+    specs = random_gates(rng, 1000, swept)
+    index = GateIndex(specs, (0, 0, SIZE, SIZE))
+    n = 80
+    attempted = np.zeros((n, len(specs)), dtype=bool)
+    passed = np.zeros_like(attempted)
+    own = [random_gates(np.random.default_rng(1 + swept), 1000, swept) for _ in range(n)] # Gate flags per boat
+    for _ in range(3):
+        x0, y0, x1, y1 = random_moves(rng, n)
+        score_change, _ = index.check_passages(x0, y0, x1, y1, attempted, passed, swept=swept)
+        for b in range(n):
+            expected = sum(gate.check_passage((x0[b], y0[b]), (x1[b], y1[b])) for gate in own[b])
+            assert score_change[b] == expected
+    for b in range(n):
+        assert attempted[b].tolist() == [gate.attempted_or_scored for gate in own[b]]
+        assert passed[b].tolist() == [gate.passed_successfully for gate in own[b]]
+    assert attempted.sum() > 50, attempted.sum()
+
+
+def test_check_passage_matches_gate_loop():
+    # The single-boat query (World without a course) against every gate
+    rng = np.random.default_rng(3)
+    indexed = random_gates(rng, 1000, False)
+    looped = random_gates(np.random.default_rng(3), 1000, False)
+    index = GateIndex(indexed, (0, 0, SIZE, SIZE))
+    for x0, y0, x1, y1 in zip(*random_moves(rng, 500)):
+        assert index.check_passage((x0, y0), (x1, y1)) == sum(gate.check_passage((x0, y0), (x1, y1)) for gate in looped)
+    assert [gate.points for gate in indexed] == [gate.points for gate in looped]
@@ -0,0 +1,36 @@
+import pytest
+
+from telemetry import TelemetryLog, TelemetryReader
+from world import Controls, World
+
+
+def test_log_read_back(tmp_path):
+    world = World()
+    world.telemetry = TelemetryLog(str(tmp_path), world.dt, tick_rows=16)
+    for _ in range(100):
+        world.tick(Controls(turn=1))
+    assert world.telemetry.close() == 100
+    reader = TelemetryReader(str(tmp_path))
+    assert len(reader) == 100
+    assert reader.ticks['angle'][-1] == pytest.approx(world.boat.angle)
+
+
+def test_close_after_write_error(tmp_path, monkeypatch):
+    # The writer's error is raised by close(), once the thread is stopped and the files closed
+    log = TelemetryLog(str(tmp_path), tick_rows=4, slots=2)
+
+    def fail(rows):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(log.ticks, 'write', fail)
+    world = World()
+    for _ in range(4):
+        log.record_tick(world)
+    # The full slot went to the writer and the other one is being filled: the
+    # writer hands the slot back once its write has failed
+    log.ticks.free.put(log.ticks.free.get())
+    assert log.error is not None
+    with pytest.raises(OSError, match="disk full"):
+        log.close()
+    assert not log.thread.is_alive() # close() joined it
+    assert all(file.file.closed for stream in (log.ticks, log.gates) for file in stream.files)
@@ -0,0 +1,274 @@
+import math
+
+import numpy as np
+
+from constants import *
+from spatial import neighbour_pairs
+
+# Wind that varies over the course and over time. Directions follow the rest of
+# the simulation: degrees the wind comes FROM, 0 = North, 90 = East.
+#
+# The field is evaluated on a coarse grid of nodes every WIND_GRID_UPDATE_INTERVAL
+# seconds. Two consecutive grids are kept and samples are interpolated bilinearly
+# in space and linearly between the two grids in time, so nothing is rebuilt per
+# frame: when time moves past the newer grid only one new grid is computed.
+# Winds are interpolated as vectors so directions never wrap around the wrong way.
+
+
+def wind_to_vector(direction, speed):
+    # (east, north) components of the wind's origin direction, scaled by speed
+    rad = np.radians(direction)
+    return speed * np.sin(rad), speed * np.cos(rad)
+
+
+def vector_to_wind(east, north):
+    return np.degrees(np.arctan2(east, north)) % 360, np.hypot(east, north)
+
+
+def _smoothstep(f):
+    return f * f * (3 - 2 * f)
+
+
+class GustNoise:
+    # Procedural gusts: smooth value noise over (x, y, t) giving a speed factor
+    # (1 +/- speed_amplitude) and a direction offset (+/- direction_amplitude degrees)
+    LATTICE = 32 # Random lattice size per axis (the noise repeats after that many cells)
+
+    def __init__(self, speed_amplitude=WIND_GUST_SPEED_AMPLITUDE, direction_amplitude=WIND_GUST_DIRECTION_AMPLITUDE,
+                 scale=WIND_GUST_SCALE, period=WIND_GUST_PERIOD, seed=0):
+        self.speed_amplitude = speed_amplitude
+        self.direction_amplitude = direction_amplitude
+        self.scale = scale
+        self.period = period
+        rng = np.random.default_rng(seed)
+        self.speed_lattice = rng.uniform(-1, 1, (self.LATTICE,) * 3)
+        self.direction_lattice = rng.uniform(-1, 1, (self.LATTICE,) * 3)
+
+    def _noise(self, lattice, x, y, t):
+        # Trilinear value noise with smoothstep fading, vectorized over x and y
+        n = self.LATTICE
+        gx, gy, gt = x / self.scale, y / self.scale, t / self.period
+        ix, iy, it = np.floor(gx).astype(np.int64), np.floor(gy).astype(np.int64), math.floor(gt)
+        fx, fy, ft = _smoothstep(gx - ix), _smoothstep(gy - iy), _smoothstep(gt - it)
+        x0, x1, y0, y1 = ix % n, (ix + 1) % n, iy % n, (iy + 1) % n
+        result = 0.0
+        for t_index, t_weight in ((it % n, 1 - ft), ((it + 1) % n, ft)):
+            layer = lattice[t_index]
+            top = layer[y0, x0] + (layer[y0, x1] - layer[y0, x0]) * fx
+            bottom = layer[y1, x0] + (layer[y1, x1] - layer[y1, x0]) * fx
+            result = result + (top + (bottom - top) * fy) * t_weight
+        return result
+
+    def modulate(self, x, y, t):
+        speed_factor = 1 + self.speed_amplitude * self._noise(self.speed_lattice, x, y, t)
+        direction_offset = self.direction_amplitude * self._noise(self.direction_lattice, x, y, t)
+        return speed_factor, direction_offset
+
+
+class WindData:
+    # Gridded wind read from a .npz file with arrays:
+    #   direction, speed   (ny, nx) or (nt, ny, nx)
+    #   bounds             (x0, y0, x1, y1) covered by the grid, in pixels
+    #   times              (nt,) seconds, only for time series (clamped outside the range)
+    def __init__(self, direction, speed, bounds, times=None):
+        direction = np.asarray(direction, dtype=float)
+        speed = np.asarray(speed, dtype=float)
+        if direction.ndim == 2:
+            direction, speed = direction[None], speed[None]
+        if direction.shape != speed.shape:
+            raise ValueError(f"direction {direction.shape} and speed {speed.shape} grids differ")
+        self.east, self.north = wind_to_vector(direction, speed)
+        self.bounds = tuple(float(v) for v in bounds)
+        self.times = np.zeros(1) if times is None else np.asarray(times, dtype=float)
+        if len(self.times) != len(direction):
+            raise ValueError(f"{len(self.times)} times for {len(direction)} wind grids")
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            times = data['times'] if 'times' in data.files else None
+            return cls(data['direction'], data['speed'], data['bounds'], times)
+
+    def save(self, path):
+        direction, speed = vector_to_wind(self.east, self.north)
+        np.savez(path, direction=direction, speed=speed, bounds=np.array(self.bounds), times=self.times)
+
+    def vectors(self, x, y, t):
+        # Bilinear (space) and linear (time) interpolation of the wind vector at x, y
+        nt, ny, nx = self.east.shape
+        x0, y0, x1, y1 = self.bounds
+        u = np.clip((x - x0) / (x1 - x0) * (nx - 1), 0, nx - 1)
+        v = np.clip((y - y0) / (y1 - y0) * (ny - 1), 0, ny - 1)
+        i = np.minimum(v.astype(np.int64), max(ny - 2, 0))
+        j = np.minimum(u.astype(np.int64), max(nx - 2, 0))
+        fu, fv = u - j, v - i
+        j1, i1 = np.minimum(j + 1, nx - 1), np.minimum(i + 1, ny - 1)
+
+        k = int(np.clip(np.searchsorted(self.times, t, side='right') - 1, 0, nt - 1))
+        k1 = min(k + 1, nt - 1)
+        ft = 0.0 if k1 == k else float(np.clip((t - self.times[k]) / (self.times[k1] - self.times[k]), 0, 1))
+
+        def at(grid):
+            top = grid[i, j] + (grid[i, j1] - grid[i, j]) * fu
+            bottom = grid[i1, j] + (grid[i1, j1] - grid[i1, j]) * fu
+            return top + (bottom - top) * fv
+        east = at(self.east[k]) * (1 - ft) + at(self.east[k1]) * ft
+        north = at(self.north[k]) * (1 - ft) + at(self.north[k1]) * ft
+        return east, north
+
+
+class WindField:
+    # Wind sampled per position and time: a uniform base wind (or gridded data),
+    # optional gusts, a rotation set by the wind shift controls, and optional wind
+    # shadow behind other boats (computed per sample, as boats move every tick).
+    def __init__(self, direction=WIND_DIRECTION, speed=WIND_SPEED, gusts=None, data=None,
+                 bounds=(0, 0, WORLD_WIDTH, WORLD_HEIGHT), cell_size=WIND_GRID_CELL_SIZE,
+                 update_interval=WIND_GRID_UPDATE_INTERVAL):
+        self.direction = direction
+        self.speed = speed
+        self.gusts = gusts
+        self.data = data
+        self.rotation = 0.0 # Degrees added to every direction (wind shifts)
+        self.bounds = bounds
+        self.cell_size = cell_size
+        self.update_interval = update_interval
+
+        x0, y0, x1, y1 = bounds
+        self.nx = int(math.ceil((x1 - x0) / cell_size)) + 1
+        self.ny = int(math.ceil((y1 - y0) / cell_size)) + 1
+        self.node_x, self.node_y = np.meshgrid(x0 + np.arange(self.nx) * cell_size,
+                                               y0 + np.arange(self.ny) * cell_size)
+        self.grids_computed = 0
+        self.invalidate()
+
+    def invalidate(self):
+        # Call after changing the base wind, gusts or data: grids are recomputed on the next sample
+        self.t0 = None
+        self.grid0 = self.grid1 = None
+
+    def rotate(self, degrees):
+        self.rotation = (self.rotation + degrees) % 360
+        self.invalidate()
+
+    def _compute_grid(self, t):
+        # Wind vectors at every node at time t, as (east, north) arrays and nested lists
+        if self.data is not None:
+            east, north = self.data.vectors(self.node_x, self.node_y, t)
+            direction, speed = vector_to_wind(east, north)
+        else:
+            direction = np.full(self.node_x.shape, float(self.direction))
+            speed = np.full(self.node_x.shape, float(self.speed))
+        if self.gusts is not None:
+            speed_factor, direction_offset = self.gusts.modulate(self.node_x, self.node_y, t)
+            speed = speed * speed_factor
+            direction = direction + direction_offset
+        east, north = wind_to_vector(direction + self.rotation, speed)
+        self.grids_computed += 1
+        return east, north, east.tolist(), north.tolist()
+
+    def advance(self, t):
+        # Make the two cached grids bracket t, computing as few new grids as possible.
+        # Grid times are whole multiples of the interval, so the grids only depend on t
+        # (not on the sampling history) and restored worlds continue bit-identically.
+        interval = self.update_interval
+        k = math.floor(t / interval)
+        if self.t0 is not None and k == self.k + 1: # Moved into the next interval: reuse the newer grid
+            self.grid0 = self.grid1
+            self.grid1 = self._compute_grid((k + 1) * interval)
+        elif self.t0 is None or k != self.k:
+            self.grid0 = self._compute_grid(k * interval)
+            self.grid1 = self._compute_grid((k + 1) * interval)
+        self.k = k
+        self.t0 = k * interval
+
+    def _cell(self, x, y):
+        x0, y0 = self.bounds[0], self.bounds[1]
+        u = (x - x0) / self.cell_size
+        v = (y - y0) / self.cell_size
+        return u, v
+
+    def sample(self, x, y, t):
+        # Local (direction, speed) at one position, without NumPy overhead
+        self.advance(t)
+        u, v = self._cell(x, y)
+        u = min(max(u, 0.0), self.nx - 1.0)
+        v = min(max(v, 0.0), self.ny - 1.0)
+        j = min(int(u), self.nx - 2)
+        i = min(int(v), self.ny - 2)
+        fu, fv = u - j, v - i
+        ft = (t - self.t0) / self.update_interval
+        components = []
+        for index in (2, 3): # east, north
+            value = 0.0
+            for grid, weight in ((self.grid0[index], 1 - ft), (self.grid1[index], ft)):
+                top = grid[i][j] + (grid[i][j + 1] - grid[i][j]) * fu
+                bottom = grid[i + 1][j] + (grid[i + 1][j + 1] - grid[i + 1][j]) * fu
+                value += (top + (bottom - top) * fv) * weight
+            components.append(value)
+        east, north = components
+        return math.degrees(math.atan2(east, north)) % 360, math.hypot(east, north)
+
+    def sample_many(self, x, y, t, shadow_x=None, shadow_y=None):
+        # Local (direction, speed) arrays for many positions. With shadow_x/shadow_y,
+        # boats at those positions slow the wind downwind of them (a boat does not
+        # shadow itself, so the sampled boats may be passed as their own shadow sources).
+        self.advance(t)
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        u, v = self._cell(x, y)
+        u = np.clip(u, 0, self.nx - 1)
+        v = np.clip(v, 0, self.ny - 1)
+        j = np.minimum(u.astype(np.int64), self.nx - 2)
+        i = np.minimum(v.astype(np.int64), self.ny - 2)
+        fu, fv = u - j, v - i
+        ft = (t - self.t0) / self.update_interval
+
+        def at(grid):
+            top = grid[i, j] + (grid[i, j + 1] - grid[i, j]) * fu
+            bottom = grid[i + 1, j] + (grid[i + 1, j + 1] - grid[i + 1, j]) * fu
+            return top + (bottom - top) * fv
+        east = at(self.grid0[0]) * (1 - ft) + at(self.grid1[0]) * ft
+        north = at(self.grid0[1]) * (1 - ft) + at(self.grid1[1]) * ft
+        direction, speed = vector_to_wind(east, north)
+        if shadow_x is not None:
+            speed = speed * self.shadow_factor(x, y, direction, shadow_x, shadow_y)
+        return direction, speed
+
+    @staticmethod
+    def shadow_factor(x, y, direction, shadow_x, shadow_y):
+        # Remaining fraction of the wind at each (x, y) after the shadows of the boats
+        # at (shadow_x, shadow_y): strongest right behind a boat, fading with distance
+        # downwind and towards the sides. Only the boats close enough to cast a shadow
+        # on a sample are paired with it (spatial.neighbour_pairs); with a single wind
+        # direction they are searched in the wind's frame, in shadow-shaped cells.
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        shadow_x = np.asarray(shadow_x, dtype=float)
+        shadow_y = np.asarray(shadow_y, dtype=float)
+        if np.ndim(direction) == 0:
+            rad = math.radians(direction)
+            downwind_x, downwind_y = -math.sin(rad), math.cos(rad)
+            sample, source = neighbour_pairs(x * downwind_x + y * downwind_y, x * downwind_y - y * downwind_x,
+                                             shadow_x * downwind_x + shadow_y * downwind_y,
+                                             shadow_x * downwind_y - shadow_y * downwind_x,
+                                             (WIND_SHADOW_LENGTH, WIND_SHADOW_WIDTH))
+        else:
+            sample, source = neighbour_pairs(x, y, shadow_x, shadow_y, math.hypot(WIND_SHADOW_LENGTH, WIND_SHADOW_WIDTH))
+        rad = np.radians(np.broadcast_to(direction, x.shape)[sample])
+        # Unit vector the wind blows towards, in screen coordinates (y down)
+        downwind_x, downwind_y = -np.sin(rad), np.cos(rad)
+        dx = x[sample] - shadow_x[source]
+        dy = y[sample] - shadow_y[source]
+        along = dx * downwind_x + dy * downwind_y
+        across = np.abs(dx * downwind_y - dy * downwind_x)
+        inside = (along > 0) & (along < WIND_SHADOW_LENGTH) & (across < WIND_SHADOW_WIDTH)
+        reduction = WIND_SHADOW_STRENGTH * (1 - along / WIND_SHADOW_LENGTH) * (1 - (across / WIND_SHADOW_WIDTH) ** 2)
+        # Product of the overlapping shadows, summed as logarithms per sample
+        remaining = np.bincount(sample, weights=np.log1p(-np.where(inside, reduction, 0.0)), minlength=len(x))
+        return np.exp(remaining)
+
+    def sample_fleet(self, fleet, t, shadow=True):
+        # Per-boat wind for Fleet.update, each boat in the shadow of the others
+        if shadow:
+            return self.sample_many(fleet.x, fleet.y, t, fleet.x, fleet.y)
+        return self.sample_many(fleet.x, fleet.y, t)
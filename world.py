@@ -0,0 +1,224 @@
+import random
+from collections import namedtuple
+
+from boat import BOAT_STATE_FIELDS, Boat
+from constants import *
+from course import CourseSequence
+from gate import Gate
+from spatial import GateIndex
+
+# Player inputs for one physics tick.
+# turn: -1 (port) / 0 / +1 (starboard), applied as BOAT_TURN_SPEED degrees
+# boom: -1 (sheet in) / 0 / +1 (ease out), applied as BOOM_ADJUST_SPEED degrees
+# wind_shift: number of 15 degree wind steps (negative = counter-clockwise)
+Controls = namedtuple('Controls', ['turn', 'boom', 'wind_shift'], defaults=(0, 0, 0))
+NO_CONTROLS = Controls()
+
+WIND_SHIFT_STEP = 15 # Degrees per wind change key press
+
+
+def random_gates(n, width=WORLD_WIDTH, height=WORLD_HEIGHT, seed=0, verbose=False):
+    # n gates scattered over a width x height world, for large-course tests
+    rng = random.Random(seed)
+    return [Gate(rng.uniform(50, width - 50), rng.uniform(50, height - 50), rng.uniform(80, 150),
+                 rng.choice((0, 90, 180, 270)), verbose)
+            for _ in range(n)]
+
+
+def default_gates(verbose=True):
+    return [
+        Gate(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 200, 100, 0, verbose),  # Northward passage
+        Gate(SCREEN_WIDTH // 2 + 200, SCREEN_HEIGHT // 2, 100, 90, verbose), # Eastward passage
+        Gate(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 200, 100, 180, verbose),# Southward passage
+        Gate(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2, 100, 270, verbose) # Westward passage
+    ]
+
+
+class World:
+    # Everything the race needs to advance, without any display, font or clock.
+    # main_simulation() drives one of these from the keyboard; batch runs call
+    # step()/run() directly and get the exact same trajectories for the same inputs.
+    dt = PHYSICS_DT # Seconds per tick; may be set per world (e.g. larger, with substeps, for batch runs)
+    substeps = PHYSICS_SUBSTEPS # Boat updates and gate checks per tick
+
+    def __init__(self, gates=None, wind_direction=WIND_DIRECTION, wind_speed=WIND_SPEED, verbose=False, wind_field=None,
+                 size=(WORLD_WIDTH, WORLD_HEIGHT), sequence=None):
+        self.size = size
+        self.boat = Boat(INITIAL_BOAT_X, INITIAL_BOAT_Y)
+        self.boat.world_width, self.boat.world_height = size
+        self.gates = gates if gates is not None else default_gates(verbose)
+        # Optional CourseSequence: only the gates of its current leg are tested.
+        # Without one, every gate near the boat's move is (through the index).
+        self.sequence = sequence
+        self.gate_index = GateIndex(self.gates, (0, 0) + tuple(size), lines=sequence is None)
+        self.wind_direction = wind_direction
+        self.wind_speed = wind_speed
+        self.score = 0
+        self.verbose = verbose
+        self.tick_count = 0
+        self.time_accumulator = 0.0
+        self.previous_pose = None # Boat (x, y, angle) before the last tick, for render interpolation
+        self.profiler = None # Optional FrameProfiler timing the physics and gate phases
+        self.telemetry = None # Optional telemetry.TelemetryLog recording every tick and gate event
+        # Optional WindField: wind_direction/wind_speed then hold the local wind at the boat
+        self.wind_field = wind_field
+        if wind_field is not None:
+            self.wind_direction, self.wind_speed = wind_field.sample(self.boat.x, self.boat.y, self.time)
+
+    @classmethod
+    def from_course(cls, course, verbose=False, wind_field=None):
+        # World for a course.Course, with its gates tested in sequence
+        gates, legs = course.gates(verbose)
+        world = cls(gates, verbose=verbose, size=course.world_size, sequence=CourseSequence(legs))
+        if course.start is not None:
+            boat = world.boat
+            boat.x, boat.y, boat.angle = course.start
+            boat.x_prev, boat.y_prev = boat.x, boat.y
+        world.wind_field = wind_field
+        if wind_field is not None:
+            world.wind_direction, world.wind_speed = wind_field.sample(world.boat.x, world.boat.y, world.time)
+        return world
+
+    @property
+    def finished(self):
+        # Every leg of the course sailed (never true without a course sequence)
+        return self.sequence is not None and self.sequence.finished
+
+    @property
+    def time(self):
+        return self.tick_count * self.dt
+
+    def interpolated_pose(self):
+        # Boat (x, y, angle) between the last two ticks, by the fraction of a tick
+        # accumulated since the last one (what the screen shows between ticks)
+        boat = self.boat
+        if self.previous_pose is None:
+            return boat.x, boat.y, boat.angle
+        alpha = min(self.time_accumulator / self.dt, 1.0)
+        x0, y0, angle0 = self.previous_pose
+        if abs(boat.x - x0) > self.size[0] / 2 or abs(boat.y - y0) > self.size[1] / 2:
+            return boat.x, boat.y, boat.angle # Wrapped around the world: no sweep across it
+        turn = (boat.angle - angle0 + 180) % 360 - 180
+        return x0 + (boat.x - x0) * alpha, y0 + (boat.y - y0) * alpha, (angle0 + turn * alpha) % 360
+
+    def snapshot(self):
+        # Complete simulation state, enough for restore() to continue bit-identically.
+        # The frame-time accumulator of step()/due_ticks() is not part of it: it
+        # depends on the frame times of the session, not on the ticks simulated.
+        snapshot = {
+            'boat': tuple(getattr(self.boat, name) for name in BOAT_STATE_FIELDS),
+            'wind_direction': self.wind_direction,
+            'wind_speed': self.wind_speed,
+            'score': self.score,
+            'tick_count': self.tick_count,
+            'gates': [(gate.attempted_or_scored, gate.passed_successfully, gate.points, gate.impact_time)
+                      for gate in self.gates],
+        }
+        if self.wind_field is not None:
+            snapshot['wind_rotation'] = self.wind_field.rotation
+        if self.sequence is not None:
+            snapshot['leg'] = self.sequence.leg
+        return snapshot
+
+    def restore(self, snapshot):
+        for name, value in zip(BOAT_STATE_FIELDS, snapshot['boat']):
+            setattr(self.boat, name, value)
+        self.wind_direction = snapshot['wind_direction']
+        self.wind_speed = snapshot['wind_speed']
+        self.score = snapshot['score']
+        self.tick_count = snapshot['tick_count']
+        self.time_accumulator = 0.0
+        self.previous_pose = None
+        for gate, (attempted, passed, points, impact_time) in zip(self.gates, snapshot['gates']):
+            gate.attempted_or_scored = attempted
+            gate.passed_successfully = passed
+            gate.points = points
+            gate.impact_time = impact_time
+        if 'leg' in snapshot:
+            self.sequence.leg = snapshot['leg']
+        if 'wind_rotation' in snapshot:
+            self.wind_field.rotation = snapshot['wind_rotation']
+            self.wind_field.invalidate()
+
+    def tick(self, controls=NO_CONTROLS):
+        # One fixed physics step of self.dt seconds, in the same order as the interactive
+        # loop, split into self.substeps boat updates each followed by the gate checks.
+        # Turning and boom rates are per PHYSICS_DT, so they are scaled to the substep.
+        boat = self.boat
+        self.previous_pose = (boat.x, boat.y, boat.angle)
+        if controls.wind_shift:
+            if self.wind_field is not None:
+                self.wind_field.rotate(controls.wind_shift * WIND_SHIFT_STEP)
+            else:
+                self.wind_direction = (self.wind_direction + controls.wind_shift * WIND_SHIFT_STEP) % 360
+        sub_dt = self.dt / self.substeps
+        ticks = sub_dt / PHYSICS_DT
+        score_change = 0
+        for substep in range(self.substeps):
+            if controls.turn:
+                boat.rotate(controls.turn * BOAT_TURN_SPEED * ticks)
+            if controls.boom:
+                boat.adjust_boom(controls.boom * BOOM_ADJUST_SPEED * ticks)
+            if self.wind_field is not None:
+                self.wind_direction, self.wind_speed = self.wind_field.sample(boat.x, boat.y, self.time + substep * sub_dt)
+
+            boat.update(self.wind_direction, self.wind_speed, sub_dt)
+            if self.profiler:
+                self.profiler.lap('physics')
+            score_change += self._check_gates()
+            if self.profiler:
+                self.profiler.lap('gates')
+        if self.telemetry:
+            self.telemetry.record_tick(self)
+        self.tick_count += 1
+        return score_change
+
+    def _check_gates(self):
+        boat = self.boat
+        start = boat.move_start()
+        score_change = 0
+        if self.sequence is not None:
+            candidates = self.sequence.active()
+        else:
+            # Only the gates near the boat's move can score (same outcomes as checking them all)
+            candidates = self.gate_index.candidates(start, (boat.x, boat.y))
+        for i in candidates:
+            gate_change = self.gates[i].check_passage(start, (boat.x, boat.y))
+            if gate_change != 0:
+                score_change += gate_change
+                self.score += gate_change
+                if self.telemetry:
+                    self.telemetry.gate_event(self.tick_count, i, gate_change)
+                if self.verbose:
+                    print(f"Score updated: {self.score} (Change: {gate_change})")
+        if self.sequence is not None and any(self.gates[i].attempted_or_scored for i in candidates):
+            self.sequence.advance(self.gates)
+        return score_change
+
+    def due_ticks(self, elapsed):
+        # Adds elapsed seconds to the accumulator and takes out the whole ticks now due
+        self.time_accumulator += elapsed
+        n = 0
+        # Small tolerance so that e.g. 3 * dt gives 3 ticks despite rounding
+        while self.time_accumulator >= self.dt * (1 - 1e-9):
+            self.time_accumulator -= self.dt
+            n += 1
+        return n
+
+    def step(self, controls=NO_CONTROLS, dt=PHYSICS_DT):
+        # Advance by dt seconds of simulated time in whole ticks.
+        # Leftover time is carried to the next call. Wind shifts are one-shot
+        # and only applied on the first tick. Returns the score change.
+        score_change = 0
+        for _ in range(self.due_ticks(dt)):
+            score_change += self.tick(controls)
+            controls = controls._replace(wind_shift=0)
+        return score_change
+
+    def run(self, n_steps, controls=NO_CONTROLS):
+        # controls is either fixed Controls or a callable(world) -> Controls
+        score_change = 0
+        policy = controls if callable(controls) else None
+        for _ in range(n_steps):
+            score_change += self.tick(policy(self) if policy else controls)
+        return score_change